@@ -1,24 +1,76 @@
 #!/usr/bin/env python3
 """Crawl every HTML page on the personal site + the b2g research site and check
 that every internal link resolves. Emits a tab-separated report grouped by
-status code, plus a summary of unique broken targets.
+status code, plus a summary of unique broken targets. Outbound links are
+checked too, on a separate, slower budget (see ``ExternalChecker``).
 
-Output: stdout. Exit code 1 if any HTTP status >= 400 found, else 0.
+Requests run on a small asyncio HTTP/1.1 client: one keep-alive
+connection pool per host, a global and a per-host concurrency limit, and
+one DNS lookup per host for the whole run, so an audit pays the TCP+TLS
+handshake a handful of times instead of once per URL.
+
+Redirect chains are followed and reported hop by hop: HTTP 3xx, then
+a meta refresh or ``location.replace`` in the page itself (the stubs
+``build_b2g_redirects.py`` writes), with what each hop added to the
+load. ``rewrite_redirect_links.py`` points our own links past them.
+
+``--offline`` audits the working tree instead: the personal site is
+served from this checkout and the research site from ``--mirror`` (a
+local checkout of ca-b2g-research), with no network involved.
+
+Crawl progress lives in sqlite (``--state``): the frontier, every URL
+seen and who links to it, checkpointed every few seconds. After a crash
+or Ctrl-C, ``--resume`` continues where the last checkpoint left off.
+
+``--load`` benchmarks instead of auditing: the pages an offline crawl
+finds are requested in waves against ``--target`` (``make serve``, or
+``offline``), reporting TTFB and total-latency percentiles, throughput
+and bytes per page, optionally as JSON to compare across commits.
+
+Output: stdout. Exit code 1 if any HTTP status >= 400 or network error
+found, else 0. URLs whose retries all failed transiently (timeouts,
+resets, temporary DNS errors, 502/503/504) are listed as UNREACHABLE but
+don't fail the run: an outage is not a broken link. Unknown hosts, bad
+certificates, refused connections and malformed responses still do.
 
 Usage:
     python3 scripts/audit_links.py
+    python3 scripts/audit_links.py --concurrency 32 --per-host 8
+    python3 scripts/audit_links.py --offline --mirror ../ca-b2g-research
+    python3 scripts/audit_links.py --offline --mirror ../ca-b2g-research --resume
+    python3 scripts/audit_links.py --load --target http://localhost:8000 --json load.json
 """
 
 from __future__ import annotations
 
 import argparse
+import asyncio
+import codecs
+import contextlib
+import hashlib
+import json
+import math
+import mimetypes
+import random
+import re
+import socket
+import sqlite3
+import ssl
+import subprocess
 import sys
-import urllib.error
+import time
 import urllib.parse
-import urllib.request
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator, Mapping, Sequence
+from dataclasses import astuple, dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
 from html.parser import HTMLParser
-from typing import Iterable
+from pathlib import Path
+from typing import Any
+
+from build_seo_assets import ROBOTS_TXT
+
+ROOT = Path(__file__).resolve().parent.parent
 
 PERSONAL = "https://avaluev.github.io"
 PROJECT = "https://avaluev.github.io/ca-b2g-research"
@@ -50,58 +102,1221 @@ SEED_URLS = [
     f"{PROJECT}/about/",
 ]
 
-# Domains we care about checking. Anything else (linkedin, github, t.me, etc.)
-# is reported but skipped — too rate-limited to crawl reliably.
+# Domains we crawl. Links anywhere else (linkedin, github, t.me, etc.) are
+# only status-checked, under the EXTERNAL_* budgets below.
 INTERNAL_DOMAINS = {"avaluev.github.io"}
 
 USER_AGENT = "ca-b2g-link-audit/1.0 (+https://avaluev.github.io/)"
+# Seconds to open a connection (DNS + TCP + TLS), and to wait for any
+# single read: the response head or the next piece of its body.
+CONNECT_TIMEOUT = 5
 TIMEOUT = 15
 
+# Failures that may pass (timeouts, resets, temporary DNS errors,
+# 502/503/504) are retried up to RETRIES times after a full-jitter
+# exponential backoff. BREAKER_THRESHOLD such failures in a row open a
+# host's circuit: for BREAKER_COOLDOWN seconds its requests fail at once
+# instead of each waiting out a timeout. A URL that still fails that way
+# is recorded with the UNREACHABLE status rather than as broken.
+RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = frozenset({502, 503, 504})
+UNREACHABLE = -1
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+
+# Defaults for the connection pool. Six connections per host is what
+# browsers open; every internal URL lives on one host, so the per-host
+# limit is what actually bounds an audit.
+CONCURRENCY = 16
+PER_HOST = 6
+MAX_REDIRECTS = 10
+REDIRECT_CODES = frozenset({301, 302, 303, 307, 308})
+DEFAULT_PORTS = {"http": 80, "https": 443}
+# Bodies are read READ_CHUNK bytes at a time and cut off after MAX_BODY.
+# An unwanted body up to DRAIN_LIMIT bytes is read and dropped to keep
+# the connection; a larger one costs the connection instead.
+READ_CHUNK = 64 * 1024
+MAX_BODY = 5 * 1024 * 1024
+DRAIN_LIMIT = 64 * 1024
+
+# Crawl shape. Depth 0 is the seed list; pages deeper than MAX_DEPTH are
+# still status-checked but not parsed for further links.
+MAX_DEPTH = 3
+# Per-host request rate (requests/second) for the politeness scheduler.
+RATE = 10.0
+# Crawl state (gitignored) for --resume: the frontier, every URL seen and
+# the link edges. Pages are fetched CRAWL_BATCH at a time and progress is
+# committed at most every CHECKPOINT_INTERVAL seconds; the Bloom filter
+# in front of the visited set is sized for BLOOM_CAPACITY URLs (~1.2 MB).
+CRAWL_STATE = ROOT / ".audit-crawl.sqlite"
+CRAWL_BATCH = 256
+CHECKPOINT_INTERVAL = 5.0
+BLOOM_CAPACITY = 1_000_000
+# Results of earlier runs (gitignored). Entries checked less than
+# CACHE_TTL seconds ago are trusted without a request.
+CACHE_DB = ROOT / ".audit-cache.sqlite"
+CACHE_TTL = 6 * 3600
+CACHE_VERSION = 2  # bump when the responses table changes; older caches are dropped
+# Outbound links: per-host request rate and burst, with slower fixed
+# spacing (seconds between requests) for hosts that throttle link
+# checkers hard. A 429 / 503 Retry-After pauses the whole host; waits
+# longer than MAX_RETRY_AFTER give up and report the link unverified.
+EXTERNAL_RATE = 1.0
+EXTERNAL_BURST = 2
+EXTERNAL_PER_HOST = 2
+EXTERNAL_DELAYS = {
+    "www.linkedin.com": 5.0,
+    "linkedin.com": 5.0,
+    "t.me": 2.0,
+    "www.youtube.com": 2.0,
+    "youtu.be": 2.0,
+}
+EXTERNAL_RETRIES = 2
+MAX_RETRY_AFTER = 60.0
+EXTERNAL_TTL = 7 * 24 * 3600
+# Only these prove an outbound link dead; other errors (403, 999, 5xx,
+# timeouts) usually mean the site refused a bot.
+BROKEN_EXTERNAL = frozenset({404, 410})
+# --load: measured waves over the crawled pages (after one warm-up wave),
+# the default target (`make serve`), and the latency percentiles reported.
+LOAD_WAVES = 5
+LOAD_TARGET = "http://localhost:8000"
+LOAD_PERCENTILES = (50, 95, 99)
+# Project sites GitHub Pages publishes under PERSONAL from their own
+# repos. --offline looks for each checkout next to this one.
+PROJECT_SITES = ("ca-b2g-research", "padel-market-analysis")
+# Linked files that are checked with HEAD instead of being fetched and
+# parsed as pages.
+ASSET_SUFFIXES = (
+    ".css", ".gif", ".ico", ".jpeg", ".jpg", ".js", ".json", ".pdf", ".png",
+    ".svg", ".txt", ".webmanifest", ".webp", ".xml", ".zip",
+)  # fmt: skip
+
+
+# <meta http-equiv="refresh" content="0; url=...">
+_REFRESH_RE = re.compile(r"""\s*\d*(?:\.\d*)?\s*[;,]\s*url\s*=\s*['"]?([^'"\s]+)""", re.IGNORECASE)
+# location = "...", location.href = "...", location.replace("...") / .assign("...")
+_SCRIPT_REDIRECT_RE = re.compile(
+    r"""location(?:\.href)?\s*=\s*(["'])(.+?)\1"""
+    r"""|location\.(?:replace|assign)\(\s*(["'])(.+?)\3\s*\)"""
+)
+
 
 class LinkExtractor(HTMLParser):
+    """Collects ``<a href>`` values, plus where the page sends the browser
+    by itself: a meta refresh URL and a literal ``location`` assignment
+    in an inline script."""
+
     def __init__(self) -> None:
         super().__init__()
         self.hrefs: list[str] = []
+        self.refresh: str | None = None
+        self.script_redirect: str | None = None
+        self._script: list[str] | None = None
 
     def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
-        if tag != "a":
+        if tag == "a":
+            for k, v in attrs:
+                if k == "href" and v:
+                    self.hrefs.append(v)
+        elif tag == "meta":
+            values = dict(attrs)
+            if (values.get("http-equiv") or "").lower() == "refresh" and self.refresh is None:
+                m = _REFRESH_RE.match(values.get("content") or "")
+                if m:
+                    self.refresh = m.group(1)
+        elif tag == "script" and not dict(attrs).get("src"):
+            self._script = []
+
+    def handle_data(self, data: str) -> None:
+        if self._script is not None:
+            self._script.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "script" and self._script is not None:
+            m = _SCRIPT_REDIRECT_RE.search("".join(self._script))
+            if m and self.script_redirect is None:
+                self.script_redirect = m.group(2) or m.group(4)
+            self._script = None
+
+
+# ------------------------------------------------------------- HTTP client
+
+
+class TokenBucket:
+    """Request-rate budget: ``rate`` tokens/second, bursts up to ``burst``.
+
+    ``reserve`` always takes a token and may drive the balance negative;
+    the debt is how long the caller must wait. Reservations are made in
+    call order, so once the burst is spent concurrent waiters are
+    released first-come, first-served at exactly ``rate``.
+    """
+
+    def __init__(self, rate: float, burst: float = 1.0) -> None:
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.stamp = time.monotonic()
+
+    def reserve(self) -> float:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class PolitenessScheduler:
+    """Per-host token buckets that space out request starts.
+
+    Each host gets ``rate`` requests/second with bursts of ``burst``;
+    ``slow_down`` lowers one host's rate (robots.txt Crawl-delay). A rate
+    of 0 means unlimited.
+    """
+
+    def __init__(self, rate: float = RATE, burst: float = PER_HOST) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._buckets: dict[str, TokenBucket] = {}
+
+    def slow_down(self, host: str, delay: float) -> None:
+        """Make ``host`` wait at least ``delay`` seconds between requests."""
+        if delay > 0 and (not self.rate or 1 / delay < self.rate):
+            self._buckets[host] = TokenBucket(1 / delay)
+
+    async def wait(self, host: str) -> None:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            if not self.rate:
+                return
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        delay = bucket.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+    def back_off(self, host: str, delay: float) -> None:
+        """Hold every request to ``host`` for ``delay`` seconds (Retry-After)."""
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate or RATE, self.burst)
+        bucket.reserve()  # bring the balance up to date
+        bucket.tokens = min(bucket.tokens, 1 - delay * bucket.rate)
+
+
+class CircuitOpenError(ConnectionError):
+    """Raised instead of contacting a host whose circuit is open."""
+
+
+class ProtocolError(ValueError):
+    """A response that isn't valid HTTP/1.x (status line, header, framing),
+    or a URL that can't be sent as a request line."""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker for one host.
+
+    Closed until ``threshold`` failures in a row, then open for
+    ``cooldown`` seconds: ``allow`` refuses every request. After the
+    cooldown a single trial request is let through (half-open); success
+    closes the circuit, failure opens it for another cooldown.
+    """
+
+    def __init__(
+        self, threshold: int = BREAKER_THRESHOLD, cooldown: float = BREAKER_COOLDOWN
+    ) -> None:
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial = False
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        if self._trial or time.monotonic() - self.opened_at < self.cooldown:
+            return False
+        self._trial = True
+        return True
+
+    def record(self, ok: bool) -> None:
+        self._trial = False
+        if ok:
+            self.failures, self.opened_at = 0, None
             return
-        for k, v in attrs:
-            if k == "href" and v:
-                self.hrefs.append(v)
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.threshold:
+            self.opened_at = time.monotonic()
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Whether a failed request might succeed if tried again."""
+    if isinstance(exc, CircuitOpenError | ConnectionRefusedError | ssl.SSLCertVerificationError):
+        return False
+    if isinstance(exc, socket.gaierror):
+        return exc.errno == socket.EAI_AGAIN
+    return isinstance(exc, TimeoutError | ConnectionError | asyncio.IncompleteReadError)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential backoff before retry number ``attempt`` (1-based)."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+@dataclass
+class Response:
+    status: int
+    headers: dict[str, str]
+    body: bytes  # empty when a consumer took or skipped the body
+    url: str  # after redirects
+    truncated: bool = False  # body cut off at the client's max_body
+    elapsed: float = 0.0  # seconds from connection slot to body read
+    history: list[Response] = field(default_factory=list)  # redirects followed, in order
+
+
+# Called with the status and headers once they arrive; returns where body
+# chunks should go, or None to skip the body without reading it. A retried
+# request calls it again, so a consumer must start over on each call.
+BodyConsumer = Callable[[int, Mapping[str, str]], Callable[[bytes], object] | None]
+
+
+def skip_body(_status: int, _headers: Mapping[str, str]) -> None:
+    """BodyConsumer for status checks: never read the body."""
+    return None
+
+
+@dataclass
+class _Connection:
+    reader: asyncio.StreamReader
+    writer: asyncio.StreamWriter
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+@dataclass
+class _HostPool:
+    """Idle keep-alive connections to one origin, plus its request slots."""
+
+    slots: asyncio.Semaphore
+    idle: list[_Connection] = field(default_factory=list)
 
 
-def fetch(url: str) -> tuple[int, str]:
-    req = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+async def _readline(reader: asyncio.StreamReader) -> bytes:
     try:
-        with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
-            return r.status, r.read().decode("utf-8", errors="replace")
-    except urllib.error.HTTPError as e:
-        return e.code, ""
-    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
-        return 0, str(e)
+        return await reader.readline()
+    except ValueError as exc:  # line longer than the stream's buffer limit
+        raise ProtocolError(str(exc)) from exc
+
+
+_DIGITS = {10: frozenset("0123456789"), 16: frozenset("0123456789abcdefABCDEF")}
+
+
+def _parse_int(text: str | bytes, what: str, base: int = 10) -> int:
+    """Plain digits from a status line or header as an int, or ProtocolError.
+
+    Stricter than int(), which would also take a sign, underscores,
+    surrounding spaces or a 0x prefix.
+    """
+    digits = text.decode("latin-1") if isinstance(text, bytes) else text
+    if not digits or not _DIGITS[base].issuperset(digits):
+        raise ProtocolError(f"bad {what}: {text!r}")
+    return int(digits, base)
+
+
+async def _read_head(reader: asyncio.StreamReader) -> tuple[str, int, dict[str, str]]:
+    """Parse an HTTP/1.x status line and header block."""
+    status_line = await _readline(reader)
+    if not status_line:
+        raise ConnectionResetError("connection closed before response")
+    version, _sep, rest = status_line.decode("latin-1").rstrip("\r\n").partition(" ")
+    status_text = rest.partition(" ")[0]
+    if not version.startswith("HTTP/") or len(status_text) != 3:
+        raise ProtocolError(f"bad status line: {status_line!r}")
+    status = _parse_int(status_text, "status code")
+    headers: dict[str, str] = {}
+    while True:
+        line = await _readline(reader)
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _sep, value = line.decode("latin-1").partition(":")
+        key = name.strip().lower()
+        headers[key] = f"{headers[key]}, {value.strip()}" if key in headers else value.strip()
+    return version, status, headers
+
+
+async def _iter_body(
+    reader: asyncio.StreamReader, headers: Mapping[str, str]
+) -> AsyncIterator[bytes]:
+    """Yield a message body in pieces of at most READ_CHUNK bytes.
+
+    Chunked transfer coding is decoded on the fly, so a large chunk is
+    never buffered whole.
+    """
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        while True:
+            size_line = await _readline(reader)
+            if not size_line:
+                raise asyncio.IncompleteReadError(b"", None)
+            size = _parse_int(size_line.split(b";", 1)[0].strip(), "chunk size", 16)
+            if size == 0:
+                # Trailer section ends with an empty line.
+                while (await _readline(reader)).strip():
+                    pass
+                return
+            while size:
+                piece = await reader.readexactly(min(size, READ_CHUNK))
+                size -= len(piece)
+                yield piece
+            await reader.readexactly(2)  # CRLF after each chunk
+    elif "content-length" in headers:
+        remaining = _parse_int(headers["content-length"], "Content-Length")
+        while remaining:
+            piece = await reader.readexactly(min(remaining, READ_CHUNK))
+            remaining -= len(piece)
+            yield piece
+    else:
+        while piece := await reader.read(READ_CHUNK):
+            yield piece
+
+
+class HttpClient:
+    """Minimal keep-alive HTTP/1.1 client for GET/HEAD link checks.
+
+    ``concurrency`` caps in-flight requests overall and ``per_host`` caps
+    them per origin, which also bounds each origin's pool size. Host
+    names resolve once per run; concurrent first lookups share one task,
+    and a lookup that fails is dropped so the next request tries again.
+    An optional ``scheduler`` rate-limits request starts per host. Bodies
+    stream in READ_CHUNK pieces and stop at ``max_body`` bytes.
+    ``connect_timeout`` bounds opening a connection and ``timeout`` each
+    read; transient failures are retried and counted against the host's
+    CircuitBreaker.
+    """
+
+    def __init__(
+        self,
+        *,
+        concurrency: int = CONCURRENCY,
+        per_host: int = PER_HOST,
+        timeout: float = TIMEOUT,
+        connect_timeout: float = CONNECT_TIMEOUT,
+        user_agent: str = USER_AGENT,
+        scheduler: PolitenessScheduler | None = None,
+        max_body: int = MAX_BODY,
+    ) -> None:
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_body = max_body
+        self.user_agent = user_agent
+        self.per_host = per_host
+        self.scheduler = scheduler
+        self.stats: Counter[str] = Counter()
+        self._global = asyncio.Semaphore(concurrency)
+        self._pools: dict[tuple[str, str, int], _HostPool] = {}
+        self._dns: dict[tuple[str, int], asyncio.Task[str]] = {}
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self._ssl = ssl.create_default_context()
+
+    async def __aenter__(self) -> HttpClient:
+        return self
+
+    async def __aexit__(self, *_exc: object) -> None:
+        await self.close()
+
+    async def close(self) -> None:
+        for pool in self._pools.values():
+            for conn in pool.idle:
+                conn.close()
+            pool.idle.clear()
+
+    async def _resolve(self, host: str, port: int) -> str:
+        key = (host, port)
+        if key not in self._dns:
+            self.stats["dns lookups"] += 1
+            task = asyncio.ensure_future(self._lookup(host, port))
+            task.add_done_callback(lambda done: self._forget_failed(key, done))
+            self._dns[key] = task
+        # Shielded: a caller's connect timeout must not cancel the lookup
+        # every other request to this host is waiting on.
+        return await asyncio.shield(self._dns[key])
+
+    def _forget_failed(self, key: tuple[str, int], task: asyncio.Task[str]) -> None:
+        """Drop a failed lookup so the next request to the host tries again."""
+        if (task.cancelled() or task.exception() is not None) and self._dns.get(key) is task:
+            del self._dns[key]
+
+    @staticmethod
+    async def _lookup(host: str, port: int) -> str:
+        infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+        return str(infos[0][4][0])
+
+    async def _connect(self, scheme: str, host: str, port: int) -> _Connection:
+        address = await self._resolve(host, port)
+        tls = scheme == "https"
+        reader, writer = await asyncio.open_connection(
+            address,
+            port,
+            ssl=self._ssl if tls else None,
+            server_hostname=host if tls else None,
+        )
+        self.stats["connections opened"] += 1
+        return _Connection(reader, writer)
+
+    def _pool(self, origin: tuple[str, str, int]) -> _HostPool:
+        if origin not in self._pools:
+            self._pools[origin] = _HostPool(asyncio.Semaphore(self.per_host))
+        return self._pools[origin]
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        consume: BodyConsumer | None = None,
+        retries: int = RETRIES,
+    ) -> Response:
+        """One request, no redirect handling. Raises on network errors.
+
+        Without ``consume`` the body is collected into ``Response.body``;
+        with it, the body goes wherever the consumer says, or nowhere.
+        Transient errors and RETRY_STATUSES are retried up to ``retries``
+        times with backoff; a response carrying Retry-After is returned for
+        the caller to honour.
+        """
+        host = urllib.parse.urlsplit(url).hostname or ""
+        breaker = self._breakers.setdefault(host, CircuitBreaker())
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                self.stats["circuit open"] += 1
+                raise CircuitOpenError(f"{host}: circuit open after {breaker.failures} failures")
+            try:
+                resp = await self._send(method, url, headers, consume)
+            except NETWORK_ERRORS as exc:
+                # Only failures worth retrying count against the host: an
+                # answer, even a refusal, means it isn't timing out.
+                transient = is_transient(exc)
+                breaker.record(ok=not transient)
+                if attempt >= retries or not transient:
+                    raise
+            else:
+                failed = resp.status in RETRY_STATUSES
+                breaker.record(ok=not failed)
+                if not failed or attempt >= retries or "retry-after" in resp.headers:
+                    return resp
+            attempt += 1
+            self.stats["retries"] += 1
+            await asyncio.sleep(backoff_delay(attempt))
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None,
+        consume: BodyConsumer | None,
+    ) -> Response:
+        try:
+            parsed = urllib.parse.urlsplit(url)
+            scheme = parsed.scheme
+            host = parsed.hostname or ""
+            port = parsed.port or DEFAULT_PORTS[scheme]
+            target = parsed.path or "/"
+            if parsed.query:
+                target += "?" + parsed.query
+            head = (
+                f"{method} {target} HTTP/1.1\r\n"
+                f"Host: {parsed.netloc}\r\n"
+                f"User-Agent: {self.user_agent}\r\n"
+                "Accept: */*\r\n"
+                + "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+                + "Connection: keep-alive\r\n\r\n"
+            ).encode("latin-1")
+        except (ValueError, KeyError) as exc:  # bad port, scheme or characters in the link
+            raise ProtocolError(f"cannot request {url!r}: {exc}") from exc
+
+        if self.scheduler is not None:
+            await self.scheduler.wait(host)
+        pool = self._pool((scheme, host, port))
+        async with pool.slots, self._global:
+            started = time.perf_counter()
+            # A pooled connection may have been closed by the server while
+            # idle; GET and HEAD are idempotent, so retry once on a new one.
+            while True:
+                reused = bool(pool.idle)
+                if reused:
+                    conn = pool.idle.pop()
+                else:
+                    async with asyncio.timeout(self.connect_timeout):
+                        conn = await self._connect(scheme, host, port)
+                try:
+                    async with asyncio.timeout(self.timeout):
+                        conn.writer.write(head)
+                        await conn.writer.drain()
+                        version, status, resp_headers = await _read_head(conn.reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    if reused:
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+                break
+            self.stats["requests"] += 1
+            self.stats["connections reused"] += reused
+            keep_alive = (
+                version == "HTTP/1.1" and resp_headers.get("connection", "").lower() != "close"
+            )
+            try:
+                resp, complete = await self._read_body(
+                    conn, method, url, status, resp_headers, consume
+                )
+            except BaseException:
+                conn.close()
+                raise
+            if keep_alive and complete:
+                pool.idle.append(conn)
+            else:
+                conn.close()
+            resp.elapsed = time.perf_counter() - started
+        return resp
+
+    async def _read_body(
+        self,
+        conn: _Connection,
+        method: str,
+        url: str,
+        status: int,
+        headers: dict[str, str],
+        consume: BodyConsumer | None,
+    ) -> tuple[Response, bool]:
+        """Read (or skip) the body; also report whether the stream is at a
+        message boundary, i.e. whether the connection can be reused."""
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return Response(status, headers, b"", url), True
+        framed = (
+            "content-length" in headers or "chunked" in headers.get("transfer-encoding", "").lower()
+        )
+        buffer = bytearray()
+        sink = buffer.extend if consume is None else consume(status, headers)
+        if sink is None:
+            if "content-length" not in headers:
+                length = -1
+            else:
+                length = _parse_int(headers["content-length"], "Content-Length")
+            if length < 0 or length > DRAIN_LIMIT:
+                self.stats["bodies skipped"] += 1
+                return Response(status, headers, b"", url), False
+            async with asyncio.timeout(self.timeout):
+                await conn.reader.readexactly(length)
+            return Response(status, headers, b"", url), True
+        received = 0
+        pieces = _iter_body(conn.reader, headers)
+        while True:
+            async with asyncio.timeout(self.timeout):
+                piece = await anext(pieces, None)
+            if piece is None:
+                break
+            received += len(piece)
+            if received > self.max_body:
+                self.stats["bodies truncated"] += 1
+                sink(piece[: len(piece) - (received - self.max_body)])
+                return Response(status, headers, bytes(buffer), url, truncated=True), False
+            sink(piece)
+        return Response(status, headers, bytes(buffer), url), framed
+
+    async def get(
+        self,
+        url: str,
+        method: str = "GET",
+        headers: Mapping[str, str] | None = None,
+        consume: BodyConsumer | None = None,
+    ) -> Response:
+        """Request ``url``, following up to MAX_REDIRECTS redirects.
+
+        ``headers`` and ``consume`` apply to every hop; conditional headers
+        only matter on the last one, since redirect responses ignore them.
+        The redirect responses are returned in the final one's ``history``.
+        """
+        history: list[Response] = []
+        for _hop in range(MAX_REDIRECTS):
+            resp = await self.request(method, url, headers, consume)
+            location = resp.headers.get("location")
+            if resp.status not in REDIRECT_CODES or not location:
+                resp.history = history
+                return resp
+            history.append(resp)
+            url = urllib.parse.urljoin(url, location)
+            if resp.status == 303 and method != "HEAD":
+                method = "GET"
+        resp.history = history[:-1]
+        return resp
+
+    def covers(self, url: str) -> bool:
+        """Whether this client can answer for ``url`` at all."""
+        return True
+
+
+class LocalClient(HttpClient):
+    """Answers requests from local directories instead of the network.
+
+    ``mounts`` maps URL prefixes (ending in "/") to directories, or to
+    None for prefixes that exist but have no local copy; the longest
+    matching prefix wins. Files are served the way GitHub Pages
+    serves them: a directory without a trailing slash redirects to one,
+    directories serve index.html, extensionless paths fall back to
+    ``.html``, and anything missing is a 404 with the tree's 404.html.
+    """
+
+    def __init__(self, mounts: Mapping[str, Path | None], **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.mounts = sorted(mounts.items(), key=lambda m: len(m[0]), reverse=True)
+
+    def _mount(self, url: str) -> tuple[str, Path | None]:
+        for prefix, root in self.mounts:
+            if url.startswith(prefix) or url == prefix.rstrip("/"):
+                return prefix, root
+        return "", None
+
+    def covers(self, url: str) -> bool:
+        return self._mount(url)[1] is not None
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        headers: Mapping[str, str] | None = None,
+        consume: BodyConsumer | None = None,
+        retries: int = RETRIES,
+    ) -> Response:
+        self.stats["requests"] += 1
+        started = time.perf_counter()
+        resp = self._serve(method, url, consume)
+        resp.elapsed = time.perf_counter() - started
+        return resp
+
+    def _serve(self, method: str, url: str, consume: BodyConsumer | None) -> Response:
+        parsed = urllib.parse.urlsplit(url)
+        target = urllib.parse.urlunsplit((parsed.scheme, parsed.netloc, parsed.path, "", ""))
+        prefix, root = self._mount(target)
+        if root is None:
+            raise OSError(f"{url} is not available offline")
+        if target == prefix.rstrip("/"):
+            return Response(301, {"location": prefix}, b"", url)
+        path = (root / urllib.parse.unquote(target[len(prefix) :])).resolve()
+        if not path.is_relative_to(root.resolve()):
+            return self._file(404, root / "404.html", method, url, consume)
+        if path.is_dir():
+            if not target.endswith("/"):
+                return Response(301, {"location": target + "/"}, b"", url)
+            path /= "index.html"
+        elif not path.exists() and not path.suffix:
+            path = path.with_name(path.name + ".html")
+        if not path.is_file():
+            return self._file(404, root / "404.html", method, url, consume)
+        return self._file(200, path, method, url, consume)
+
+    def _file(
+        self, status: int, path: Path, method: str, url: str, consume: BodyConsumer | None
+    ) -> Response:
+        if not path.is_file():
+            return Response(status, {"content-type": "text/plain", "content-length": "0"}, b"", url)
+        stat = path.stat()
+        ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        headers = {
+            "content-type": ctype,
+            "content-length": str(stat.st_size),
+            "last-modified": formatdate(stat.st_mtime, usegmt=True),
+        }
+        buffer = bytearray()
+        sink = buffer.extend if consume is None else consume(status, headers)
+        if method == "HEAD" or sink is None:
+            return Response(status, headers, b"", url)
+        with path.open("rb") as f:
+            while piece := f.read(READ_CHUNK):
+                if f.tell() > self.max_body:
+                    self.stats["bodies truncated"] += 1
+                    sink(piece[: len(piece) - (f.tell() - self.max_body)])
+                    return Response(status, headers, bytes(buffer), url, truncated=True)
+                sink(piece)
+        return Response(status, headers, bytes(buffer), url)
+
+
+# ------------------------------------------------------------------ robots
+
+
+def _robots_regex(pattern: str) -> re.Pattern[str]:
+    """``*`` matches any run of characters; a trailing ``$`` anchors the end."""
+    anchored = pattern.endswith("$")
+    body = re.escape(pattern.rstrip("$")).replace(r"\*", ".*")
+    return re.compile(body + ("$" if anchored else ""))
+
+
+class RobotsRules:
+    """robots.txt rules that apply to one user agent (RFC 9309).
+
+    Not ``urllib.robotparser``: that applies the first matching rule and
+    ignores ``*``/``$`` wildcards, while RFC 9309 takes the longest
+    matching rule, with Allow winning a tie.
+    """
+
+    def __init__(self, rules: Iterable[tuple[bool, str]] = (), crawl_delay: float = 0.0) -> None:
+        self.rules = [(allow, pattern, _robots_regex(pattern)) for allow, pattern in rules]
+        self.crawl_delay = crawl_delay
+
+    @classmethod
+    def parse(cls, text: str, user_agent: str) -> RobotsRules:
+        """Rules of the groups naming ``user_agent``'s product token, else of ``*``."""
+        product = user_agent.split("/", 1)[0].strip().lower()
+        groups: list[tuple[set[str], list[tuple[bool, str]], list[float]]] = []
+        in_agents = False
+        for raw in text.splitlines():
+            key, sep, value = raw.split("#", 1)[0].partition(":")
+            if not sep:
+                continue
+            key, value = key.strip().lower(), value.strip()
+            if key == "user-agent":
+                if not in_agents:
+                    groups.append((set(), [], []))
+                    in_agents = True
+                groups[-1][0].add(value.lower())
+                continue
+            in_agents = False
+            if not groups:
+                continue
+            if key in ("allow", "disallow") and value:
+                groups[-1][1].append((key == "allow", value))
+            elif key == "crawl-delay":
+                with contextlib.suppress(ValueError):
+                    groups[-1][2].append(float(value))
+        matched = [g for g in groups if product in g[0]] or [g for g in groups if "*" in g[0]]
+        return cls(
+            [rule for g in matched for rule in g[1]],
+            max((delay for g in matched for delay in g[2]), default=0.0),
+        )
+
+    def allowed(self, url: str) -> bool:
+        parsed = urllib.parse.urlsplit(url)
+        path = parsed.path or "/"
+        if parsed.query:
+            path += "?" + parsed.query
+        if path == "/robots.txt":
+            return True
+        verdict, best = True, -1
+        for allow, pattern, regex in self.rules:
+            if regex.match(path) and (len(pattern) > best or (len(pattern) == best and allow)):
+                verdict, best = allow, len(pattern)
+        return verdict
+
+
+class RobotsCache:
+    """robots.txt per origin, loaded once.
+
+    Our own hosts are judged by ``ROBOTS_TXT`` from build_seo_assets.py —
+    the rules we publish — instead of whatever is deployed right now.
+    Other origins are fetched: a 4xx means no rules, anything else that
+    isn't a 200 means disallow everything (RFC 9309 section 2.3.1).
+    A Crawl-delay slows that host down in the client's scheduler.
+    """
+
+    def __init__(self, client: HttpClient) -> None:
+        self.client = client
+        self._rules: dict[str, asyncio.Task[RobotsRules]] = {}
+
+    async def allowed(self, url: str) -> bool:
+        parsed = urllib.parse.urlsplit(url)
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin not in self._rules:
+            self._rules[origin] = asyncio.ensure_future(self._load(origin, parsed.netloc))
+        return (await self._rules[origin]).allowed(url)
+
+    async def _load(self, origin: str, netloc: str) -> RobotsRules:
+        if netloc in INTERNAL_DOMAINS:
+            rules = RobotsRules.parse(ROBOTS_TXT, self.client.user_agent)
+        else:
+            try:
+                resp = await self.client.get(f"{origin}/robots.txt")
+                status, text = resp.status, resp.body.decode("utf-8", errors="replace")
+            except NETWORK_ERRORS:
+                status, text = 0, ""
+            if status == 200:
+                rules = RobotsRules.parse(text, self.client.user_agent)
+            elif 400 <= status < 500:
+                rules = RobotsRules()
+            else:
+                rules = RobotsRules([(False, "/")])
+        if rules.crawl_delay and self.client.scheduler is not None:
+            self.client.scheduler.slow_down(
+                urllib.parse.urlsplit(origin).hostname or "", rules.crawl_delay
+            )
+        return rules
+
+
+# ------------------------------------------------------------------- cache
+
+
+@dataclass
+class Hop:
+    """One redirect: ``url`` sent the client on to ``target``."""
+
+    url: str
+    target: str
+    kind: str  # the HTTP status ("301"), "meta refresh" or "script"
+    seconds: float  # time spent on ``url`` before moving on
+
+
+@dataclass
+class CacheEntry:
+    url: str
+    status: int
+    etag: str | None
+    last_modified: str | None
+    content_hash: str | None  # sha256 of the body; pages only
+    links: list[str] | None  # links found in the body; pages only
+    checked_at: float
+    hops: list[Hop] = field(default_factory=list)  # redirects on the way; pages only
+
+
+class AuditCache:
+    """Per-URL results of earlier audits, in sqlite.
+
+    A fresh entry (checked within ``ttl`` seconds, status below 400) is
+    reused without a request; failures are always rechecked. Older
+    entries supply ETag / Last-Modified validators for a conditional
+    request, and a 304 or an unchanged body hash reuses the stored links
+    instead of parsing the page again.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS responses (
+            url TEXT PRIMARY KEY,
+            status INTEGER NOT NULL,
+            etag TEXT,
+            last_modified TEXT,
+            content_hash TEXT,
+            links TEXT,
+            checked_at REAL NOT NULL,
+            hops TEXT
+        );
+    """
+
+    def __init__(self, path: Path, ttl: float = CACHE_TTL) -> None:
+        self.ttl = ttl
+        self.stats: Counter[str] = Counter()
+        self._db = sqlite3.connect(path)
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != CACHE_VERSION:
+            self._db.executescript(
+                f"DROP TABLE IF EXISTS responses; PRAGMA user_version = {CACHE_VERSION};"
+            )
+        self._db.executescript(self.SCHEMA)
+
+    def close(self) -> None:
+        self._db.commit()
+        self._db.close()
+
+    def get(self, url: str) -> CacheEntry | None:
+        row = self._db.execute(
+            "SELECT status, etag, last_modified, content_hash, links, checked_at, hops"
+            " FROM responses WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        status, etag, last_modified, content_hash, links, checked_at, hops = row
+        return CacheEntry(
+            url,
+            status,
+            etag,
+            last_modified,
+            content_hash,
+            json.loads(links) if links is not None else None,
+            checked_at,
+            [Hop(*hop) for hop in json.loads(hops or "[]")],
+        )
+
+    def put(self, entry: CacheEntry) -> None:
+        self._db.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry.url,
+                entry.status,
+                entry.etag,
+                entry.last_modified,
+                entry.content_hash,
+                json.dumps(entry.links) if entry.links is not None else None,
+                entry.checked_at,
+                json.dumps([astuple(hop) for hop in entry.hops]) if entry.hops else None,
+            ),
+        )
+
+    def is_fresh(self, entry: CacheEntry, ttl: float | None = None) -> bool:
+        age = time.time() - entry.checked_at
+        return 0 < entry.status < 400 and age < (self.ttl if ttl is None else ttl)
+
+    @staticmethod
+    def validators(entry: CacheEntry | None) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if entry is not None and entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry is not None and entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+
+# ------------------------------------------------------------------- audit
+
+NETWORK_ERRORS = (OSError, TimeoutError, asyncio.IncompleteReadError, ProtocolError)
+
+
+class PageReader:
+    """Streams a page body through sha256 and LinkExtractor as it arrives.
+
+    Use ``consume`` as the request's BodyConsumer: only a 200 HTML
+    response is read, so redirects, errors and non-HTML files never
+    touch the parser. Bytes are decoded incrementally as UTF-8, so a
+    character split across chunks survives.
+
+    Given the ``known_hash`` of the body seen last time, the reader
+    holds the chunks back instead (the client's max_body bounds them)
+    and only parses them in ``links`` if the body turned out to differ:
+    an ``unchanged`` page is hashed but never parsed.
+    """
+
+    def __init__(self, url: str, known_hash: str | None = None) -> None:
+        self.url = url
+        self.known_hash = known_hash
+        self.html = False
+        self.digest = hashlib.sha256()
+        self._pending: list[bytes] = []
+        self._parser = LinkExtractor()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._error: Exception | None = None
+
+    def consume(self, status: int, headers: Mapping[str, str]) -> Callable[[bytes], None] | None:
+        self.html = status == 200 and "html" in headers.get("content-type", "html")
+        if not self.html:
+            return None
+        self.digest = hashlib.sha256()
+        self._pending = []
+        self._parser = LinkExtractor()
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._error = None
+        return self.feed
+
+    def feed(self, chunk: bytes) -> None:
+        self.digest.update(chunk)
+        if self.known_hash is not None:
+            self._pending.append(chunk)
+        else:
+            self._parse(chunk)
+
+    def _parse(self, chunk: bytes) -> None:
+        if self._error is None:
+            try:
+                self._parser.feed(self._decoder.decode(chunk))
+            except Exception as exc:
+                self._error = exc
 
+    @property
+    def unchanged(self) -> bool:
+        """Whether the whole body read matches ``known_hash``."""
+        return self.known_hash is not None and self.digest.hexdigest() == self.known_hash
 
-def head(url: str) -> int:
+    def links(self, base: str) -> set[str] | None:
+        """Canonical http(s) links seen, resolved against ``base`` (the URL
+        the page was served from), or None if the page couldn't be parsed."""
+        for chunk in self._pending:
+            self._parse(chunk)
+        self._pending = []
+        try:
+            if self._error is None:
+                self._parser.feed(self._decoder.decode(b"", final=True))
+                self._parser.close()
+        except Exception as exc:
+            self._error = exc
+        if self._error is not None:
+            print(f"[parse-fail] {self.url} {self._error}", file=sys.stderr)
+            return None
+        return _canonical_links(self._parser.hrefs, base)
+
+    def redirect(self, base: str) -> tuple[str, str] | None:
+        """``(kind, target)`` if the page sends the browser on by itself.
+
+        A script redirect wins over a meta refresh: browsers run the
+        script as the page is parsed, before any refresh timer fires.
+        Call after ``links``.
+        """
+        for kind, href in (
+            ("script", self._parser.script_redirect),
+            ("meta refresh", self._parser.refresh),
+        ):
+            target = normalise(href, base) if href else None
+            if target and target != canonicalize(base):
+                return kind, target
+        return None
+
+
+def _http_hops(resp: Response) -> list[Hop]:
+    """The 3xx responses ``resp`` was reached through, as hops."""
+    hops: list[Hop] = []
+    for r in resp.history:
+        target = canonicalize(urllib.parse.urljoin(r.url, r.headers.get("location", "")))
+        if target != canonicalize(r.url):
+            hops.append(Hop(canonicalize(r.url), target, str(r.status), r.elapsed))
+    return hops
+
+
+async def fetch_page(
+    client: HttpClient, url: str, cache: AuditCache | None = None
+) -> tuple[int, set[str], list[Hop]]:
+    """GET a page; return its status, the links it contains and the
+    redirects on the way.
+
+    The hops are the HTTP redirects followed, then a meta refresh or
+    script redirect in the page itself, whose target is also returned
+    as a link so the crawl checks it.
+
+    With a ``cache``, a fresh entry answers without a request, and a stale
+    one turns the GET conditional, so an unchanged page costs a 304 and
+    no parsing; a server that ignores the validators sends the body, but
+    one whose hash matches the stored one still isn't parsed. New pages
+    are parsed as they stream in (``PageReader``); non-HTML bodies are
+    never read.
+    """
+    entry = cache.get(url) if cache is not None else None
+    if entry is not None and entry.links is None:
+        entry = None  # a HEAD-only record has no links to fall back on
+    if cache is not None and entry is not None and cache.is_fresh(entry):
+        cache.stats["fresh"] += 1
+        return entry.status, set(entry.links or ()), entry.hops
+    page = PageReader(url, entry.content_hash if entry is not None else None)
+    try:
+        resp = await client.get(url, headers=AuditCache.validators(entry), consume=page.consume)
+    except NETWORK_ERRORS as e:
+        print(f"[fetch-error] {url} {type(e).__name__}: {e}", file=sys.stderr)
+        return failure_status(e), set(), []
+
+    digest: str | None = None
+    hops = _http_hops(resp)
+    if resp.status == 304 and entry is not None:
+        status, digest, links = entry.status, entry.content_hash, set(entry.links or ())
+        hops += [hop for hop in entry.hops if not hop.kind.isdigit()]
+        label = "not modified"
+    elif page.html and not resp.truncated and page.unchanged and entry is not None:
+        status, digest, links = resp.status, entry.content_hash, set(entry.links or ())
+        hops += [hop for hop in entry.hops if not hop.kind.isdigit()]
+        label = "unchanged"
+    elif page.html:
+        status, links = resp.status, page.links(resp.url) or set()
+        if (redirect := page.redirect(resp.url)) is not None:
+            kind, target = redirect
+            hops.append(Hop(canonicalize(resp.url), target, kind, resp.elapsed))
+            links.add(target)
+        if resp.truncated:
+            print(f"[truncated] {url} after {client.max_body:,} bytes", file=sys.stderr)
+            label = "truncated"
+        else:
+            digest = page.digest.hexdigest()
+            label = "parsed"
+    else:
+        status, links, label = resp.status, set(), "not html"
+    if cache is not None:
+        cache.stats[label] += 1
+        cache.put(
+            CacheEntry(
+                url,
+                status,
+                resp.headers.get("etag") or (entry.etag if entry else None),
+                resp.headers.get("last-modified") or (entry.last_modified if entry else None),
+                digest,
+                sorted(links),
+                time.time(),
+                hops,
+            )
+        )
+    return status, links, hops
+
+
+async def head(client: HttpClient, url: str, cache: AuditCache | None = None) -> int:
     """Return HTTP status; follow redirects; HEAD with GET fallback."""
-    req = urllib.request.Request(url, method="HEAD", headers={"User-Agent": USER_AGENT})
+    entry = cache.get(url) if cache is not None else None
+    if cache is not None and entry is not None and cache.is_fresh(entry):
+        cache.stats["fresh"] += 1
+        return entry.status
+    headers = AuditCache.validators(entry)
     try:
-        with urllib.request.urlopen(req, timeout=TIMEOUT) as r:
-            return r.status
-    except urllib.error.HTTPError as e:
-        if e.code == 405:
-            # HEAD not allowed — try GET
-            try:
-                req2 = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
-                with urllib.request.urlopen(req2, timeout=TIMEOUT) as r:
-                    return r.status
-            except urllib.error.HTTPError as e2:
-                return e2.code
-            except Exception:
-                return 0
-        return e.code
-    except (urllib.error.URLError, TimeoutError, ConnectionError):
-        return 0
+        resp = await client.get(url, method="HEAD", headers=headers)
+        if resp.status == 405:
+            # HEAD not allowed — try GET, but don't download the file
+            resp = await client.get(url, headers=headers, consume=skip_body)
+    except NETWORK_ERRORS as exc:
+        return failure_status(exc)
+    unchanged = resp.status == 304 and entry is not None
+    status = entry.status if unchanged and entry is not None else resp.status
+    if cache is not None:
+        cache.stats["not modified" if unchanged else "checked"] += 1
+        cache.put(
+            CacheEntry(
+                url,
+                status,
+                # A 304 may omit the validators; keep the stored ones then.
+                resp.headers.get("etag") or (entry.etag if unchanged and entry else None),
+                resp.headers.get("last-modified")
+                or (entry.last_modified if unchanged and entry else None),
+                entry.content_hash if unchanged and entry is not None else None,
+                entry.links if unchanged and entry is not None else None,
+                time.time(),
+            )
+        )
+    return status
+
+
+_UNRESERVED = frozenset("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-._~")
+_ESCAPE_RE = re.compile(r"%([0-9A-Fa-f]{2})")
+
+
+def _normalise_escapes(text: str) -> str:
+    """Decode escaped unreserved characters; upper-case the remaining hex."""
+
+    def fix(m: re.Match[str]) -> str:
+        char = chr(int(m.group(1), 16))
+        return char if char in _UNRESERVED else "%" + m.group(1).upper()
+
+    return _ESCAPE_RE.sub(fix, text)
+
+
+def _remove_dot_segments(path: str) -> str:
+    out: list[str] = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(out) > 1:
+                out.pop()
+        elif segment != ".":
+            out.append(segment)
+    if path.endswith(("/.", "/..")):
+        out.append("")
+    return "/".join(out) or "/"
+
+
+def canonicalize(url: str) -> str:
+    """One spelling per resource, so the crawl requests each URL once.
+
+    Lower-cases scheme and host, drops default ports, the fragment and a
+    bare ``?``, resolves dot segments, normalises percent-escapes, and
+    maps a trailing ``index.html`` to its directory (GitHub Pages serves
+    both identically).
+    """
+    parsed = urllib.parse.urlsplit(url)
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    port = parsed.port
+    netloc = host if port in (None, DEFAULT_PORTS.get(scheme)) else f"{host}:{port}"
+    path = _normalise_escapes(_remove_dot_segments(parsed.path or "/"))
+    if path.endswith("/index.html"):
+        path = path[: -len("index.html")]
+    return urllib.parse.urlunsplit((scheme, netloc, path, _normalise_escapes(parsed.query), ""))
 
 
 def normalise(href: str, page_url: str) -> str | None:
@@ -113,90 +1328,861 @@ def normalise(href: str, page_url: str) -> str | None:
     if parsed.scheme not in ("http", "https"):
         return None
     # Drop fragment for the check (we only verify the page exists)
-    return urllib.parse.urlunparse(parsed._replace(fragment=""))
-
-
-def discover_links(seeds: Iterable[str]) -> dict[str, set[str]]:
-    """For each seed page, return the set of internal links it points at."""
-    out: dict[str, set[str]] = {}
-    with ThreadPoolExecutor(max_workers=8) as ex:
-        futs = {ex.submit(fetch, u): u for u in seeds}
-        for f in as_completed(futs):
-            url = futs[f]
-            status, body = f.result()
-            if status != 200:
-                out[url] = set()
-                print(f"[seed-fail] {status:>3} {url}", file=sys.stderr)
-                continue
-            ex2 = LinkExtractor()
-            try:
-                ex2.feed(body)
-            except Exception as exc:  # noqa: BLE001
-                print(f"[parse-fail] {url} {exc}", file=sys.stderr)
+    return canonicalize(abs_url)
+
+
+def is_internal(url: str) -> bool:
+    return urllib.parse.urlsplit(url).netloc in INTERNAL_DOMAINS
+
+
+def failure_status(exc: BaseException) -> int:
+    """Status to record for a URL whose request raised ``exc``.
+
+    HttpClient.request only gives up on a transient error once its retries
+    are spent, and a circuit only opens after transient failures, so those
+    are UNREACHABLE. Any other network error is 0: the link is broken.
+    """
+    return UNREACHABLE if isinstance(exc, CircuitOpenError) or is_transient(exc) else 0
+
+
+def is_unreachable(status: int) -> bool:
+    """Transient failure or gateway error that outlasted the retries."""
+    return status == UNREACHABLE or status in RETRY_STATUSES
+
+
+def is_page(url: str) -> bool:
+    return not urllib.parse.urlsplit(url).path.lower().endswith(ASSET_SUFFIXES)
+
+
+def _canonical_links(hrefs: Iterable[str], page_url: str) -> set[str]:
+    links: set[str] = set()
+    for h in hrefs:
+        norm = normalise(h, page_url)
+        if norm:
+            links.add(norm)
+    return links
+
+
+def retry_after(value: str | None) -> float | None:
+    """Seconds to wait from a Retry-After header (delta or HTTP date)."""
+    if not value:
+        return None
+    if value.strip().isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ExternalChecker:
+    """Status checks for outbound links, run alongside the internal crawl.
+
+    Uses its own client, so slow or throttled hosts never hold up internal
+    requests: each host gets a token bucket (EXTERNAL_RATE, or the
+    spacing in EXTERNAL_DELAYS) and at most EXTERNAL_PER_HOST requests in
+    flight. A 429 or 503 with Retry-After pauses that host and retries.
+    HEAD comes first; if it fails, a GET asks for a single byte with
+    Range, since many sites mishandle HEAD. Bodies are never read, so a
+    server that ignores Range costs a connection, not a download.
+    Results go to ``cache`` and
+    are trusted for EXTERNAL_TTL. Hosts are not crawled, so robots.txt
+    is not consulted.
+    """
+
+    def __init__(self, client: HttpClient, cache: AuditCache | None = None) -> None:
+        self.client = client
+        self.cache = cache
+        self.stats: Counter[str] = Counter()
+        self._tasks: dict[str, asyncio.Task[int]] = {}
+        if client.scheduler is not None:
+            for host, delay in EXTERNAL_DELAYS.items():
+                client.scheduler.slow_down(host, delay)
+
+    def submit(self, url: str) -> None:
+        if url not in self._tasks:
+            self._tasks[url] = asyncio.ensure_future(self._check(url))
+
+    async def results(self) -> dict[str, int]:
+        statuses = await asyncio.gather(*self._tasks.values())
+        return dict(zip(self._tasks, statuses, strict=True))
+
+    async def _check(self, url: str) -> int:
+        cache = self.cache
+        entry = cache.get(url) if cache is not None else None
+        if cache is not None and entry is not None and cache.is_fresh(entry, EXTERNAL_TTL):
+            self.stats["fresh"] += 1
+            return entry.status
+        try:
+            resp = await self._request(url, "HEAD")
+            if resp.status >= 400 and resp.status != 429:
+                self.stats["ranged GET"] += 1
+                resp = await self._request(url, "GET", {"Range": "bytes=0-0"})
+        except NETWORK_ERRORS as exc:
+            self.stats["failed"] += 1
+            return failure_status(exc)
+        self.stats["checked"] += 1
+        if cache is not None:
+            cache.put(CacheEntry(url, resp.status, None, None, None, None, time.time()))
+        return resp.status
+
+    async def _request(
+        self, url: str, method: str, headers: Mapping[str, str] | None = None
+    ) -> Response:
+        for attempt in range(EXTERNAL_RETRIES + 1):
+            resp = await self.client.get(url, method, headers, consume=skip_body)
+            if resp.status not in (429, 503) or attempt == EXTERNAL_RETRIES:
+                break
+            delay = retry_after(resp.headers.get("retry-after"))
+            if delay is None and resp.status == 429:
+                delay = 2.0**attempt
+            if delay is None or delay > MAX_RETRY_AFTER or self.client.scheduler is None:
+                break
+            self.stats["throttled"] += 1
+            self.client.scheduler.back_off(urllib.parse.urlsplit(resp.url).hostname or "", delay)
+        return resp
+
+
+class BloomFilter:
+    """Approximate set of strings: no false negatives, about ``error_rate``
+    false positives while it holds at most ``capacity`` items.
+
+    Positions come from one blake2b digest split into two hashes
+    (Kirsch-Mitzenmacher double hashing).
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> Iterator[int]:
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str) -> None:
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class CrawlStore:
+    """Crawl state in sqlite, so memory stays flat and a crash loses little.
+
+    ``urls`` holds every URL seen with its depth, its kind (``page`` to
+    GET and parse, ``asset`` to HEAD, ``external``, ``blocked`` by
+    robots.txt, or ``skipped`` because the client can't answer for it)
+    and its status; rows without a status are the frontier. ``edges``
+    records which page links to which URL, and ``hops`` where a fetched
+    URL redirected to. ``meta`` holds the crawl's settings, so a resumed
+    crawl can tell it is continuing the same one.
+
+    Membership checks go through a BloomFilter first: most discovered
+    links are new, and those never touch the database. Writes are
+    committed by ``checkpoint`` every CHECKPOINT_INTERVAL seconds.
+    """
+
+    SCHEMA = """
+        PRAGMA journal_mode = WAL;
+        PRAGMA synchronous = NORMAL;
+        CREATE TABLE IF NOT EXISTS urls (
+            url TEXT PRIMARY KEY,
+            depth INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            status INTEGER
+        );
+        CREATE INDEX IF NOT EXISTS urls_pending ON urls (kind, status, depth);
+        CREATE TABLE IF NOT EXISTS edges (
+            dst TEXT NOT NULL,
+            src TEXT NOT NULL,
+            PRIMARY KEY (dst, src)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS hops (
+            url TEXT PRIMARY KEY,
+            target TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            seconds REAL NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+    """
+
+    def __init__(self, path: Path | str = ":memory:") -> None:
+        self._db = sqlite3.connect(path)
+        self._db.executescript(self.SCHEMA)
+        self._bloom = BloomFilter(BLOOM_CAPACITY)
+        for (url,) in self._db.execute("SELECT url FROM urls"):
+            self._bloom.add(url)
+        self._saved = time.monotonic()
+
+    def start(self, params: Mapping[str, object], resume: bool = False) -> bool:
+        """Begin a crawl with ``params``; return True if a stored one with
+        the same params is being resumed instead.
+
+        Raises ValueError when asked to resume a crawl made with other
+        settings.
+        """
+        wanted = {key: json.dumps(value) for key, value in params.items()}
+        stored = dict(self._db.execute("SELECT key, value FROM meta WHERE key != 'finished'"))
+        if resume and stored:
+            if stored != wanted:
+                raise ValueError("stored crawl was made with different settings")
+            return True
+        with self._db:
+            self._db.execute("DELETE FROM urls")
+            self._db.execute("DELETE FROM edges")
+            self._db.execute("DELETE FROM hops")
+            self._db.execute("DELETE FROM meta")
+            self._db.executemany("INSERT INTO meta VALUES (?, ?)", wanted.items())
+        self._bloom = BloomFilter(BLOOM_CAPACITY)
+        return False
+
+    def __contains__(self, url: str) -> bool:
+        if url not in self._bloom:
+            return False
+        return self._db.execute("SELECT 1 FROM urls WHERE url = ?", (url,)).fetchone() is not None
+
+    def add(self, url: str, depth: int, kind: str) -> None:
+        self._db.execute("INSERT OR IGNORE INTO urls VALUES (?, ?, ?, NULL)", (url, depth, kind))
+        self._bloom.add(url)
+
+    def set_status(self, url: str, status: int) -> None:
+        self._db.execute("UPDATE urls SET status = ? WHERE url = ?", (status, url))
+
+    def add_edges(self, src: str, dsts: Iterable[str]) -> None:
+        self._db.executemany(
+            "INSERT OR IGNORE INTO edges VALUES (?, ?)", ((dst, src) for dst in dsts)
+        )
+
+    def add_hops(self, hops: Iterable[Hop]) -> None:
+        self._db.executemany("INSERT OR REPLACE INTO hops VALUES (?, ?, ?, ?)", map(astuple, hops))
+
+    def redirected(self) -> Iterator[str]:
+        """Checked URLs that redirect, by URL."""
+        rows = self._db.execute(
+            "SELECT url FROM hops JOIN urls USING (url) WHERE status IS NOT NULL ORDER BY url"
+        )
+        for (url,) in rows:
+            yield url
+
+    def chain(self, url: str) -> list[Hop]:
+        """The redirects from ``url`` to wherever they end, at most
+        MAX_REDIRECTS long; a loop ends the chain where it closes."""
+        hops: list[Hop] = []
+        seen = {url}
+        while len(hops) < MAX_REDIRECTS:
+            row = self._db.execute(
+                "SELECT target, kind, seconds FROM hops WHERE url = ?", (url,)
+            ).fetchone()
+            if row is None:
+                break
+            hops.append(Hop(url, *row))
+            url = row[0]
+            if url in seen:
+                break
+            seen.add(url)
+        return hops
+
+    def next_depth(self) -> int | None:
+        """Shallowest depth with pages left to fetch."""
+        row = self._db.execute(
+            "SELECT MIN(depth) FROM urls WHERE kind = 'page' AND status IS NULL"
+        ).fetchone()
+        return None if row[0] is None else int(row[0])
+
+    def pending(self, kind: str, depth: int | None = None, limit: int = -1) -> list[str]:
+        sql = "SELECT url FROM urls WHERE kind = ? AND status IS NULL"
+        args: list[object] = [kind]
+        if depth is not None:
+            sql += " AND depth = ?"
+            args.append(depth)
+        rows = self._db.execute(sql + " ORDER BY url LIMIT ?", (*args, limit))
+        return [url for (url,) in rows]
+
+    def count(self, kind: str, depth: int | None = None, pending: bool = False) -> int:
+        sql = "SELECT COUNT(*) FROM urls WHERE kind = ?"
+        args: list[object] = [kind]
+        if depth is not None:
+            sql += " AND depth = ?"
+            args.append(depth)
+        if pending:
+            sql += " AND status IS NULL"
+        return int(self._db.execute(sql, args).fetchone()[0])
+
+    def status_counts(self, kinds: Sequence[str]) -> list[tuple[int, int]]:
+        marks = ", ".join("?" * len(kinds))
+        rows = self._db.execute(
+            f"SELECT status, COUNT(*) FROM urls WHERE kind IN ({marks})"
+            " AND status IS NOT NULL GROUP BY status ORDER BY status",
+            kinds,
+        )
+        return [(int(status), int(n)) for status, n in rows]
+
+    def results(self, kinds: Sequence[str], status: int | None = None) -> Iterator[tuple[str, int]]:
+        """Checked ``(url, status)`` pairs of the given kinds, by URL."""
+        marks = ", ".join("?" * len(kinds))
+        sql = f"SELECT url, status FROM urls WHERE kind IN ({marks}) AND status IS NOT NULL"
+        args: list[object] = list(kinds)
+        if status is not None:
+            sql += " AND status = ?"
+            args.append(status)
+        yield from self._db.execute(sql + " ORDER BY url", args)
+
+    def urls(self, kind: str) -> Iterator[str]:
+        for (url,) in self._db.execute("SELECT url FROM urls WHERE kind = ? ORDER BY url", (kind,)):
+            yield url
+
+    def referrers(self, url: str, limit: int = 5) -> list[str]:
+        rows = self._db.execute(
+            "SELECT src FROM edges WHERE dst = ? ORDER BY src LIMIT ?", (url, limit)
+        )
+        return [src for (src,) in rows]
+
+    def checkpoint(self, force: bool = False) -> None:
+        """Commit if CHECKPOINT_INTERVAL has passed since the last commit."""
+        if force or time.monotonic() - self._saved >= CHECKPOINT_INTERVAL:
+            self._db.commit()
+            self._saved = time.monotonic()
+
+    def finish(self) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta VALUES ('finished', 'true')")
+        self.checkpoint(force=True)
+
+    def close(self) -> None:
+        """Close, dropping anything written since the last checkpoint: a
+        half-processed batch is redone on resume rather than kept."""
+        self._db.close()
+
+
+async def crawl(
+    client: HttpClient,
+    seeds: Iterable[str],
+    max_depth: int = MAX_DEPTH,
+    cache: AuditCache | None = None,
+    external: ExternalChecker | None = None,
+    store: CrawlStore | None = None,
+) -> CrawlStore:
+    """Breadth-first crawl of the internal pages reachable from ``seeds``.
+
+    Every internal URL is requested once. Pages up to ``max_depth`` links
+    from a seed are fetched with GET and their links feed the next level;
+    assets and pages past the limit are only checked with HEAD. URLs our
+    robots.txt disallows for the audit user agent are recorded as
+    ``blocked`` and never requested, and URLs the client doesn't cover
+    (see ``LocalClient``) as ``skipped``. ``cache`` short-circuits URLs
+    checked recently. Outbound links go to ``external`` as soon as they
+    are found, or are only recorded without one.
+
+    All state lives in ``store`` (in memory if not given), which is
+    returned. Pages are fetched CRAWL_BATCH at a time, and a store that
+    already holds part of a crawl picks up where it stopped.
+    """
+    store = store if store is not None else CrawlStore()
+    robots = RobotsCache(client)
+
+    async def discover(urls: Iterable[str], depth: int) -> None:
+        for url in urls:
+            if url in store:
                 continue
-            links: set[str] = set()
-            for h in ex2.hrefs:
-                norm = normalise(h, url)
-                if not norm:
-                    continue
-                host = urllib.parse.urlparse(norm).netloc
-                if host in INTERNAL_DOMAINS:
-                    links.add(norm)
-            out[url] = links
-    return out
-
-
-def check_links(targets: Iterable[str]) -> dict[str, int]:
-    out: dict[str, int] = {}
-    with ThreadPoolExecutor(max_workers=8) as ex:
-        futs = {ex.submit(head, u): u for u in targets}
-        for f in as_completed(futs):
-            out[futs[f]] = f.result()
-    return out
+            if not is_internal(url):
+                kind = "external"
+                if external is not None:
+                    external.submit(url)
+            elif not client.covers(url):
+                kind = "skipped"
+            elif not await robots.allowed(url):
+                kind = "blocked"
+            else:
+                kind = "page" if depth <= max_depth and is_page(url) else "asset"
+            store.add(url, depth, kind)
+
+    async def visit(url: str) -> tuple[int, set[str], list[Hop]]:
+        status, links, hops = await fetch_page(client, url, cache)
+        if status != 200:
+            print(f"[page-fail] {status:>3} {url}", file=sys.stderr)
+        return status, links, hops
+
+    await discover(map(canonicalize, seeds), 0)
+    if external is not None:
+        for url in store.pending("external"):
+            external.submit(url)
+
+    depth = -1
+    while (next_depth := store.next_depth()) is not None:
+        if next_depth != depth:
+            depth = next_depth
+            print(
+                f"# depth {depth}: {store.count('page', depth, pending=True)} page(s)", flush=True
+            )
+        pages = store.pending("page", depth, limit=CRAWL_BATCH)
+        visited = await asyncio.gather(*(visit(u) for u in pages))
+        for url, (status, links, hops) in zip(pages, visited, strict=True):
+            store.set_status(url, status)
+            store.add_edges(url, links)
+            store.add_hops(hops)
+            await discover(sorted(links), depth + 1)
+        store.checkpoint()
+
+    print(
+        f"# Assets and depth-limited targets to verify: {store.count('asset', pending=True)}",
+        flush=True,
+    )
+    while heads := store.pending("asset", limit=CRAWL_BATCH):
+        for url, status in (await check_links(client, heads, cache)).items():
+            store.set_status(url, status)
+        store.checkpoint()
+    if external is not None:
+        for url, status in (await external.results()).items():
+            store.set_status(url, status)
+    store.finish()
+    return store
+
+
+async def check_links(
+    client: HttpClient, targets: Iterable[str], cache: AuditCache | None = None
+) -> dict[str, int]:
+    targets = list(targets)
+    statuses = await asyncio.gather(*(head(client, u, cache) for u in targets))
+    return dict(zip(targets, statuses, strict=True))
+
+
+# -------------------------------------------------------------------- load
+
+
+@dataclass
+class Sample:
+    url: str
+    status: int
+    ttfb: float  # seconds until the response head arrived
+    total: float  # seconds until the body was read
+    size: int  # body bytes
+
+
+async def timed_get(client: HttpClient, url: str) -> Sample:
+    """GET ``url`` once, timing the first byte and the whole response.
+
+    Never retried: a sample that silently included backoff and a second
+    attempt would inflate the latency it reports.
+    """
+    start = time.perf_counter()
+    ttfb = 0.0
+    size = 0
+
+    def count(chunk: bytes) -> None:
+        nonlocal size
+        size += len(chunk)
+
+    def consume(_status: int, _headers: Mapping[str, str]) -> Callable[[bytes], None]:
+        nonlocal ttfb, size
+        ttfb, size = time.perf_counter() - start, 0
+        return count
+
+    try:
+        status = (await client.request("GET", url, consume=consume, retries=0)).status
+    except NETWORK_ERRORS:
+        status = 0
+    return Sample(url, status, ttfb, time.perf_counter() - start, size)
+
+
+async def load_test(
+    client: HttpClient, urls: Sequence[str], waves: int, concurrency: int
+) -> tuple[list[Sample], float]:
+    """Request every URL once per wave, ``concurrency`` at a time.
+
+    An extra first wave warms connections and caches and is not
+    measured. Returns the samples and the measured waves' wall time.
+    """
+    gate = asyncio.Semaphore(concurrency)
+
+    async def one(url: str) -> Sample:
+        async with gate:
+            return await timed_get(client, url)
+
+    samples: list[Sample] = []
+    wall = 0.0
+    for wave in range(waves + 1):
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(u) for u in urls))
+        if wave:
+            wall += time.perf_counter() - start
+            samples.extend(results)
+    return samples, wall
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of ``values`` (``q`` in 0..100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def _ms(values: Sequence[float]) -> dict[str, float]:
+    return {f"p{q}": round(percentile(values, q) * 1000, 2) for q in LOAD_PERCENTILES}
+
+
+def summarize(samples: Sequence[Sample], wall: float) -> dict[str, Any]:
+    """Latency percentiles, throughput and page weight, overall and per URL."""
+    ok = [s for s in samples if 200 <= s.status < 300]
+    by_url: dict[str, list[Sample]] = {}
+    for s in ok:
+        by_url.setdefault(s.url, []).append(s)
+    total_bytes = sum(s.size for s in ok)
+    return {
+        "requests": len(samples),
+        "errors": len(samples) - len(ok),
+        "seconds": round(wall, 3),
+        "requests_per_second": round(len(samples) / wall, 1) if wall else 0.0,
+        "bytes_per_second": round(total_bytes / wall) if wall else 0,
+        "bytes_per_page": round(total_bytes / len(ok)) if ok else 0,
+        "ttfb_ms": _ms([s.ttfb for s in ok]),
+        "total_ms": _ms([s.total for s in ok]),
+        "pages": {
+            url: {
+                "bytes": runs[-1].size,
+                "ttfb_ms": _ms([s.ttfb for s in runs]),
+                "total_ms": _ms([s.total for s in runs]),
+            }
+            for url, runs in sorted(by_url.items())
+        },
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return out.stdout.strip()
+
+
+def print_load_report(report: dict[str, Any], baseline: dict[str, Any] | None = None) -> None:
+    def delta(new: float, old: float | None) -> str:
+        if old is None:
+            return ""
+        return f" ({new - old:+.2f})"
+
+    base = baseline or {}
+    print(f"{'':8}" + "".join(f"{f'p{q}':>18}" for q in LOAD_PERCENTILES))
+    for key, label in (("ttfb_ms", "TTFB"), ("total_ms", "total")):
+        cells = []
+        for q in LOAD_PERCENTILES:
+            new = report[key][f"p{q}"]
+            old = base.get(key, {}).get(f"p{q}")
+            cells.append(f"{f'{new:.2f} ms' + delta(new, old):>18}")
+        print(f"{label:8}" + "".join(cells))
+    print(
+        f"# {report['requests']} requests in {report['seconds']} s: "
+        f"{report['requests_per_second']} req/s, {report['bytes_per_second']:,} bytes/s, "
+        f"{report['bytes_per_page']:,} bytes/page"
+        + delta(report["bytes_per_page"], base.get("bytes_per_page"))
+        + f", {report['errors']} errors"
+    )
+    if baseline is not None:
+        print(f"# compared with {baseline.get('revision') or 'baseline'} (deltas in parentheses)")
+
+
+async def _load_pages(args: argparse.Namespace) -> list[str]:
+    """The crawl's pages that answered 200, discovered from the working tree."""
+    async with _local_client(args) as local:
+        store = await crawl(local, SEED_URLS, args.max_depth)
+    pages = [url for url, _status in store.results(["page"], status=200)]
+    store.close()
+    return pages
+
+
+async def _run_load(args: argparse.Namespace) -> dict[str, Any]:
+    pages = await _load_pages(args)
+    client: HttpClient
+    if args.target == "offline":
+        client, urls = _local_client(args), pages
+    else:
+        # The target serves this checkout only; the project sites live elsewhere.
+        siblings = tuple(f"{PERSONAL}/{name}/" for name in PROJECT_SITES)
+        urls = [
+            args.target.rstrip("/") + u[len(PERSONAL) :]
+            for u in pages
+            if not u.startswith(siblings)
+        ]
+        client = HttpClient(
+            concurrency=args.concurrency,
+            per_host=args.concurrency,
+            timeout=args.timeout,
+            connect_timeout=args.connect_timeout,
+            max_body=args.max_body,
+        )
+    print(
+        f"# Load: {len(urls)} pages x {args.waves} waves, concurrency {args.concurrency}, "
+        f"target {args.target}",
+        flush=True,
+    )
+    async with client:
+        samples, wall = await load_test(client, urls, args.waves, args.concurrency)
+    report = {
+        "revision": _git_revision(),
+        "target": args.target,
+        "waves": args.waves,
+        "concurrency": args.concurrency,
+        **summarize(samples, wall),
+    }
+    return report
+
+
+def _load_main(args: argparse.Namespace) -> int:
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    report = asyncio.run(_run_load(args))
+    print_load_report(report, baseline)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"# wrote {args.json}")
+    return 1 if report["errors"] else 0
+
+
+# --------------------------------------------------------------------- CLI
+
+
+def _local_client(args: argparse.Namespace) -> LocalClient:
+    mounts: dict[str, Path | None] = {f"{PERSONAL}/": ROOT}
+    for name in PROJECT_SITES:
+        mirror = args.mirror if name == "ca-b2g-research" and args.mirror else ROOT.parent / name
+        mounts[f"{PERSONAL}/{name}/"] = mirror if mirror.is_dir() else None
+        if not mirror.is_dir():
+            print(f"# No local copy of /{name}/ at {mirror}; its URLs are skipped", flush=True)
+    return LocalClient(
+        mounts, concurrency=args.concurrency, per_host=args.per_host, max_body=args.max_body
+    )
+
+
+async def _run(args: argparse.Namespace, store: CrawlStore) -> None:
+    client: HttpClient
+    external: ExternalChecker | None = None
+    if args.offline:
+        # Local reads are free and must not land in the live site's cache.
+        client, cache = _local_client(args), None
+    else:
+        client = HttpClient(
+            concurrency=args.concurrency,
+            per_host=args.per_host,
+            timeout=args.timeout,
+            connect_timeout=args.connect_timeout,
+            scheduler=PolitenessScheduler(args.rate, burst=args.per_host),
+            max_body=args.max_body,
+        )
+        cache = None if args.no_cache else AuditCache(args.cache, args.ttl)
+        if not args.no_external:
+            external_client = HttpClient(
+                concurrency=args.concurrency,
+                per_host=EXTERNAL_PER_HOST,
+                timeout=args.timeout,
+                connect_timeout=args.connect_timeout,
+                scheduler=PolitenessScheduler(EXTERNAL_RATE, burst=EXTERNAL_BURST),
+            )
+            external = ExternalChecker(external_client, cache)
+    async with client:
+        print(f"# Link audit — seeds: {len(SEED_URLS)}, max depth: {args.max_depth}", flush=True)
+        try:
+            await crawl(client, SEED_URLS, args.max_depth, cache, external, store)
+        finally:
+            if external is not None:
+                await external.client.close()
+            if cache is not None:
+                cache.close()
+        stats = client.stats
+        if args.offline:
+            print(f"# {stats['requests']} requests served from local files", flush=True)
+        else:
+            print(
+                f"# {stats['requests']} requests over {stats['connections opened']} connections "
+                f"({stats['connections reused']} reused), {stats['dns lookups']} DNS lookups, "
+                f"{stats['retries']} retries, {stats['circuit open']} refused by open circuits",
+                flush=True,
+            )
+        for label, counts in (
+            ("cache", cache.stats if cache is not None else None),
+            ("external", external.stats if external is not None else None),
+        ):
+            if counts:
+                summary = ", ".join(f"{n} {k}" for k, n in sorted(counts.items()))
+                print(f"# {label}: {summary}", flush=True)
 
 
 def main() -> int:
     parser = argparse.ArgumentParser(description=__doc__)
     parser.add_argument("--quiet", action="store_true", help="Only print broken-link summary.")
+    parser.add_argument(
+        "--concurrency", type=int, default=CONCURRENCY, help="Max requests in flight overall."
+    )
+    parser.add_argument(
+        "--per-host", type=int, default=PER_HOST, help="Max connections / requests per host."
+    )
+    parser.add_argument(
+        "--timeout", type=float, default=TIMEOUT, help="Per-read timeout in seconds."
+    )
+    parser.add_argument(
+        "--connect-timeout",
+        type=float,
+        default=CONNECT_TIMEOUT,
+        help="Seconds to open a connection (DNS + TCP + TLS).",
+    )
+    parser.add_argument(
+        "--max-depth", type=int, default=MAX_DEPTH, help="Link hops from a seed to crawl."
+    )
+    parser.add_argument(
+        "--rate", type=float, default=RATE, help="Max requests/second per host (0 = unlimited)."
+    )
+    parser.add_argument(
+        "--max-body", type=int, default=MAX_BODY, help="Bytes of a page to read before giving up."
+    )
+    parser.add_argument("--cache", type=Path, default=CACHE_DB, help="sqlite result cache.")
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Ignore and don't update the cache."
+    )
+    parser.add_argument(
+        "--ttl", type=float, default=CACHE_TTL, help="Seconds a cached OK result is trusted."
+    )
+    parser.add_argument(
+        "--no-external", action="store_true", help="Don't check links to other sites."
+    )
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Audit the working tree instead of the live site (implies --no-external).",
+    )
+    parser.add_argument(
+        "--mirror",
+        type=Path,
+        help="Checkout served as /ca-b2g-research/ with --offline (default: ../ca-b2g-research).",
+    )
+    parser.add_argument(
+        "--state", type=Path, default=CRAWL_STATE, help="sqlite file holding the crawl's progress."
+    )
+    parser.add_argument(
+        "--resume", action="store_true", help="Continue the crawl recorded in --state."
+    )
+    load = parser.add_argument_group("load benchmark")
+    load.add_argument(
+        "--load", action="store_true", help="Benchmark page latency instead of auditing links."
+    )
+    load.add_argument(
+        "--target",
+        default=LOAD_TARGET,
+        help="Base URL serving this checkout, or 'offline' for the in-process stand-in.",
+    )
+    load.add_argument("--waves", type=int, default=LOAD_WAVES, help="Measured request waves.")
+    load.add_argument("--json", type=Path, help="Write the results here as JSON.")
+    load.add_argument("--compare", type=Path, help="Earlier --json results to diff against.")
     args = parser.parse_args()
+    if args.load:
+        return _load_main(args)
 
-    print(f"# Link audit — seeds: {len(SEED_URLS)}", flush=True)
-    page_links = discover_links(SEED_URLS)
-    all_targets: set[str] = set()
-    for links in page_links.values():
-        all_targets.update(links)
-    # Also check that the seed pages themselves return 200.
-    all_targets.update(SEED_URLS)
-    print(f"# Unique internal targets to verify: {len(all_targets)}", flush=True)
-
-    statuses = check_links(all_targets)
-
-    # Build reverse map: which seed pages reference each broken target
-    referrers: dict[str, list[str]] = {}
-    for page, links in page_links.items():
-        for link in links:
-            referrers.setdefault(link, []).append(page)
+    store = CrawlStore(args.state)
+    params = {
+        "seeds": SEED_URLS,
+        "max_depth": args.max_depth,
+        "offline": args.offline,
+        "mirror": str(args.mirror) if args.mirror else None,
+        "external": not (args.offline or args.no_external),
+    }
+    try:
+        if store.start(params, args.resume):
+            print(f"# Resuming the crawl in {args.state}", flush=True)
+    except ValueError as exc:
+        print(f"[error] can't resume {args.state}: {exc}", file=sys.stderr)
+        return 2
+    try:
+        asyncio.run(_run(args, store))
+        return report(store, args.quiet)
+    finally:
+        store.close()
 
-    # Group by status
-    by_status: dict[int, list[str]] = {}
-    for url, code in statuses.items():
-        by_status.setdefault(code, []).append(url)
 
+def report(store: CrawlStore, quiet: bool = False) -> int:
+    """Print the audit report; return the exit code."""
     print()
-    for code in sorted(by_status):
-        n = len(by_status[code])
-        label = "OK" if code == 200 else "REDIR" if 300 <= code < 400 else "BROKEN" if code >= 400 else "ERROR"
+    broken = 0
+    for code, n in store.status_counts(["page", "asset"]):
+        label = (
+            "OK"
+            if code == 200
+            else "REDIR"
+            if 300 <= code < 400
+            else "UNREACHABLE"
+            if is_unreachable(code)
+            else "BROKEN"
+            if code >= 400
+            else "ERROR"
+        )
         print(f"## HTTP {code:>3}  ({label}) — {n}")
-        if args.quiet and code < 400:
+        failed = (code >= 400 or code == 0) and not is_unreachable(code)
+        if failed:
+            broken += n
+        elif quiet:
             continue
-        for url in sorted(by_status[code]):
+        for url, _code in store.results(["page", "asset"], status=code):
             print(f"  {url}")
-            if code >= 400:
-                refs = referrers.get(url, [])
-                for r in sorted(set(refs))[:5]:
+            if failed:
+                for r in store.referrers(url):
                     print(f"    ← linked from {r}")
 
-    broken = sum(len(by_status.get(c, [])) for c in by_status if c >= 400 or c == 0)
+    redirected = list(store.redirected())
+    if redirected:
+        print(f"## Redirect chains — {len(redirected)}")
+        if not quiet:
+            for url in redirected:
+                hops = store.chain(url)
+                kinds = ", ".join(hop.kind for hop in hops)
+                added = sum(hop.seconds for hop in hops) * 1000
+                print(f"  {url}\n    → {hops[-1].target}")
+                print(f"    {len(hops)} hop(s): {kinds}; +{added:.0f} ms")
+                for r in store.referrers(url):
+                    print(f"    ← linked from {r}")
+
+    blocked = store.count("blocked")
+    if blocked:
+        print(f"## robots.txt disallowed (not requested) — {blocked}")
+        if not quiet:
+            for url in store.urls("blocked"):
+                print(f"  {url}")
+
+    checked = sum(n for _code, n in store.status_counts(["external"]))
+    if checked:
+        dead: list[tuple[str, int]] = []
+        unverified: list[tuple[str, int]] = []
+        for url, code in store.results(["external"]):
+            if code in BROKEN_EXTERNAL:
+                dead.append((url, code))
+            elif code >= 400 or code <= 0:
+                unverified.append((url, code))
+        print(
+            f"## External links — {checked} checked, {len(dead)} broken, "
+            f"{len(unverified)} unverified"
+        )
+        for url, code in dead:
+            print(f"  {code:>3} {url}")
+            for r in store.referrers(url):
+                print(f"    ← linked from {r}")
+        if not quiet:
+            for url, code in unverified:
+                print(f"  {code:>3} {url}  (unverified)")
+        broken += len(dead)
+
+    skipped = store.count("skipped")
+    if skipped:
+        print(f"## Not available offline (not checked) — {skipped}")
+        if not quiet:
+            for url in store.urls("skipped"):
+                print(f"  {url}")
+
     print(f"\n# Total broken/errored: {broken}")
     return 1 if broken > 0 else 0
 
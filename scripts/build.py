@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""Run the asset generators as a dependency graph, skipping what is current.
+
+Each generator is a ``Task`` that declares the files it reads and the
+files it writes (globs relative to the repo root). A task waits for an
+earlier one in ``TASKS`` when one of them writes a file the other reads
+or writes; everything else runs concurrently. Declaration order is the build order wherever tasks touch the
+same files, so the graph can't have a cycle even though some
+generators rewrite their own inputs in place (``optimize_png.py``, or
+``build_og_image.py`` pointing each page's og:image at its card).
+
+``--jobs`` counts worker processes, not tasks. The generators that start
+a process pool of their own (``pool=True``) run one at a time, each with
+the whole budget as its ``--jobs``; the single-process ones share what
+is left between them.
+
+A task is skipped when the hash of its inputs, its outputs and its
+command matches the stamp from its last successful run, kept in
+``.build-state.json``. Outputs are part of the stamp, so an output
+edited or deleted by hand is rebuilt. Stamps are recorded once the
+whole build has finished: a later task rewriting an earlier task's
+files (as the declared order intends) does not leave the earlier one
+looking stale on the next run.
+
+A task that isn't current is looked up in the artifact cache
+(``build_cache.py``) by the hash of its command and inputs alone; a hit
+restores the outputs it produced from those inputs before, on any
+branch or checkout, instead of running it. Tasks that do run are
+stored there afterwards.
+
+Usage::
+
+    python3 scripts/build.py                      # everything that changed
+    python3 scripts/build.py seo-assets           # one task and what it waits for
+    python3 scripts/build.py --force --jobs 2
+    python3 scripts/build.py --dry-run
+    python3 scripts/build.py --no-cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import time
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from pathlib import Path
+
+from build_b2g_redirects import SLUGS
+from build_cache import CACHE_DIR, MAX_SIZE, ArtifactCache
+from build_icons import ICON_SIZES
+from build_seo_assets import PAGES
+
+ROOT = Path(__file__).resolve().parent.parent
+STATE = ROOT / ".build-state.json"
+
+PAGE_FILES = tuple(name for name, _title, _summary in PAGES)
+STUB_FILES = tuple(f"{slug}/index.html" for slug, _title, _description in SLUGS)
+SHIPPED_PNGS = ("og-default.png", "og/*.png", *ICON_SIZES)
+
+
+@dataclass(frozen=True)
+class Task:
+    name: str
+    script: str  # under scripts/
+    inputs: tuple[str, ...]  # globs relative to ROOT, the scripts it imports included
+    outputs: tuple[str, ...]
+    args: tuple[str, ...] = ()
+    env: tuple[str, ...] = ()  # environment variables the output depends on
+    pool: bool = False  # runs its own process pool, sized with --jobs
+
+    @property
+    def command(self) -> list[str]:
+        return [sys.executable, str(ROOT / "scripts" / self.script), *self.args]
+
+    def files(self, patterns: Iterable[str] | None = None) -> list[Path]:
+        """Existing files matching ``patterns`` (default: everything the
+        task reads or writes), sorted."""
+        found: set[Path] = set()
+        for pattern in (*self.inputs, *self.outputs) if patterns is None else patterns:
+            found.update(p for p in ROOT.glob(pattern) if p.is_file())
+        return sorted(found)
+
+    def _hash(self, files: Iterable[Path]) -> str:
+        digest = hashlib.sha256()
+        digest.update(json.dumps([self.script, self.args]).encode())
+        for name in self.env:
+            digest.update(f"\0{name}={os.environ.get(name, '')}".encode())
+        for path in files:
+            digest.update(f"\0{path.relative_to(ROOT).as_posix()}\0".encode())
+            digest.update(hashlib.sha256(path.read_bytes()).digest())
+        return digest.hexdigest()
+
+    def stamp(self) -> str:
+        """Hash of the command, inputs and outputs: equal means current."""
+        return self._hash(self.files())
+
+    def key(self) -> str:
+        """Hash of the command and inputs: what the outputs are cached under."""
+        return self._hash(self.files(self.inputs))
+
+
+def _scripts(*names: str) -> tuple[str, ...]:
+    return tuple(f"scripts/{name}" for name in names)
+
+
+TASKS: list[Task] = [
+    Task(
+        "redirects",
+        "build_b2g_redirects.py",
+        inputs=(*_scripts("build_b2g_redirects.py"), "404.html"),
+        outputs=(*STUB_FILES, "404.html"),
+    ),
+    Task(
+        "og-image",
+        "build_og_image.py",
+        pool=True,
+        inputs=(
+            *_scripts(
+                "build_og_image.py",
+                "build_b2g_redirects.py",
+                "build_seo_assets.py",
+                "search_index.py",
+            ),
+            *PAGE_FILES,
+            "404.html",  # router mode drops the routed slugs' cards
+        ),
+        outputs=("og-default.png", "og/*.png", *PAGE_FILES),
+    ),
+    Task(
+        "icons",
+        "build_icons.py",
+        pool=True,
+        inputs=(
+            *_scripts("build_icons.py", "optimize_png.py", "build_og_image.py"),
+            "scripts/icon-master.png",
+        ),
+        outputs=(*ICON_SIZES, "favicon.ico"),
+    ),
+    Task(
+        "optimize-images",
+        "optimize_png.py",
+        pool=True,
+        inputs=(*_scripts("optimize_png.py", "build_og_image.py"), *SHIPPED_PNGS),
+        outputs=SHIPPED_PNGS,
+    ),
+    Task(
+        "direct-links",
+        "rewrite_redirect_links.py",
+        inputs=(
+            *_scripts(
+                "rewrite_redirect_links.py",
+                "audit_links.py",
+                "build_b2g_redirects.py",
+                "build_seo_assets.py",
+                "search_index.py",
+            ),
+            *PAGE_FILES,
+            *STUB_FILES,
+            "404.html",
+        ),
+        outputs=(*PAGE_FILES, "404.html"),
+    ),
+    Task(
+        "seo-assets",
+        "build_seo_assets.py",
+        inputs=(
+            *_scripts("build_seo_assets.py", "search_index.py"),
+            *PAGE_FILES,
+            "scripts/lastmod-manifest.json",
+        ),
+        outputs=(
+            "robots.txt",
+            "llms*.txt",
+            "search-index.json",
+            "sitemap.xml",
+            "feed*.xml",
+            "feed*.json",
+            "atom*.xml",
+            "changed-urls.txt",
+            "scripts/lastmod-manifest.json",
+            "humans.txt",
+            ".well-known/security.txt",
+            "manifest.webmanifest",
+        ),
+        env=("SOURCE_DATE_EPOCH",),
+    ),
+]
+
+
+def _touched(patterns: Iterable[str]) -> set[str]:
+    """The patterns themselves plus every file they match, as comparable
+    strings: two tasks overlap if they name the same glob or file."""
+    touched: set[str] = set()
+    for pattern in patterns:
+        touched.add(pattern)
+        touched.update(p.relative_to(ROOT).as_posix() for p in ROOT.glob(pattern))
+    return touched
+
+
+def dependencies(tasks: Sequence[Task]) -> dict[str, list[str]]:
+    """For each task, the earlier tasks it must wait for."""
+    reads = {t.name: _touched(t.inputs) for t in tasks}
+    writes = {t.name: _touched(t.outputs) for t in tasks}
+    deps: dict[str, list[str]] = {}
+    for i, task in enumerate(tasks):
+        deps[task.name] = [
+            earlier.name
+            for earlier in tasks[:i]
+            if writes[earlier.name] & (reads[task.name] | writes[task.name])
+            or reads[earlier.name] & writes[task.name]
+        ]
+    return deps
+
+
+def select(tasks: Sequence[Task], names: Sequence[str]) -> list[Task]:
+    """``names`` and everything they wait for, in declaration order."""
+    deps = dependencies(tasks)
+    wanted: set[str] = set()
+    todo = list(names)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return [t for t in tasks if t.name in wanted]
+
+
+def load_state(path: Path = STATE) -> dict[str, str]:
+    try:
+        state = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def save_state(state: dict[str, str], path: Path = STATE) -> None:
+    path.write_text(json.dumps(state, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+
+
+def restore(task: Task, files: dict[str, str], cache: ArtifactCache) -> int:
+    """Make ``task``'s outputs exactly the cached ``files``: copy them in
+    and delete other files its output globs match, as a run would."""
+    changed = cache.restore(files)
+    for path in task.files(task.outputs):
+        if path.relative_to(ROOT).as_posix() not in files:
+            path.unlink()
+            changed += 1
+    return changed
+
+
+async def build(
+    tasks: Sequence[Task],
+    jobs: int,
+    force: bool,
+    state: dict[str, str],
+    cache: ArtifactCache | None = None,
+) -> bool:
+    """Run ``tasks`` in dependency order; update ``state`` with the
+    stamps of the tasks that ended up current. Returns True if every
+    task ran, was restored from ``cache`` or was skipped."""
+    deps = dependencies(tasks)
+    jobs = max(1, jobs)
+    # One slot per worker process. A pool task takes every slot and hands
+    # its script --jobs, so the pools never stack up to jobs x cpus; the
+    # lock stops two of them each holding part of the budget.
+    gate = asyncio.Semaphore(jobs)
+    pool_lock = asyncio.Lock()
+    results: dict[str, asyncio.Task[bool]] = {}
+
+    async def acquire(task: Task) -> int:
+        if not task.pool:
+            await gate.acquire()
+            return 1
+        async with pool_lock:
+            for _slot in range(jobs):
+                await gate.acquire()
+        return jobs
+
+    async def run(task: Task) -> bool:
+        waited = [await results[name] for name in deps[task.name] if name in results]
+        if not all(waited):
+            print(f"{'[blocked]':<9} {task.name}", flush=True)
+            return False
+        if not force and state.get(task.name) == task.stamp():
+            print(f"{'[skip]':<9} {task.name} (inputs unchanged)", flush=True)
+            return True
+        key = task.key()
+        cached = cache.get(key) if cache is not None and not force else None
+        if cache is not None and cached is not None:
+            changed = restore(task, cached, cache)
+            print(f"{'[cached]':<9} {task.name} ({changed} file(s) restored)", flush=True)
+            return True
+        slots = await acquire(task)
+        try:
+            start = time.perf_counter()
+            command = [*task.command, "--jobs", str(slots)] if task.pool else task.command
+            proc = await asyncio.create_subprocess_exec(
+                *command,
+                cwd=ROOT,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+            output, _ = await proc.communicate()
+        finally:
+            for _slot in range(slots):
+                gate.release()
+        label = "[ran]" if proc.returncode == 0 else f"[failed {proc.returncode}]"
+        print(f"{label:<9} {task.name} in {time.perf_counter() - start:.1f}s", flush=True)
+        for line in output.decode(errors="replace").splitlines():
+            print(f"    {line}")
+        if proc.returncode != 0:
+            return False
+        if cache is not None:
+            outputs = task.files(task.outputs)
+            cache.put(key, task.name, {p.relative_to(ROOT).as_posix(): p for p in outputs})
+        return True
+
+    for task in tasks:
+        results[task.name] = asyncio.ensure_future(run(task))
+    ok = await asyncio.gather(*results.values())
+    for task, succeeded in zip(tasks, ok, strict=True):
+        if succeeded:
+            state[task.name] = task.stamp()
+        else:
+            state.pop(task.name, None)
+    return all(ok)
+
+
+def main() -> int:
+    names = [t.name for t in TASKS]
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("tasks", nargs="*", metavar="TASK", help=f"Any of {names}.")
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes at once, across tasks and their own pools.",
+    )
+    parser.add_argument("--force", action="store_true", help="Run tasks even if current.")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Show what would run, and what it waits for."
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Don't use the artifact cache.")
+    parser.add_argument(
+        "--cache-dir", type=Path, default=CACHE_DIR, help="Artifact cache (env BUILD_CACHE_DIR)."
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=MAX_SIZE // (1024 * 1024),
+        metavar="MIB",
+        help="Evict least recently used artifacts beyond this size.",
+    )
+    args = parser.parse_args()
+    unknown = sorted(set(args.tasks) - set(names))
+    if unknown:
+        parser.error(f"unknown task(s) {unknown}; choose from {names}")
+
+    tasks = select(TASKS, args.tasks) if args.tasks else TASKS
+    state = load_state()
+    if args.dry_run:
+        deps = dependencies(tasks)
+        for task in tasks:
+            current = not args.force and state.get(task.name) == task.stamp()
+            after = f" after {', '.join(deps[task.name])}" if deps[task.name] else ""
+            label = "[current]" if current else "[run]"
+            print(f"{label:<9} {task.name}{after}")
+        return 0
+
+    cache = None if args.no_cache else ArtifactCache(args.cache_dir, args.cache_size * 1024 * 1024)
+    start = time.perf_counter()
+    ok = asyncio.run(build(tasks, args.jobs, args.force, state, cache))
+    save_state(state)
+    if cache is not None:
+        cache.prune()
+        print(
+            f"[cache] {cache.stats['hits']} hit(s), {cache.stats['stored']} stored, "
+            f"{cache.stats['evicted']} evicted; {cache.size():,} bytes in {args.cache_dir}"
+        )
+    print(f"\nBuild {'finished' if ok else 'FAILED'} in {time.perf_counter() - start:.1f}s.")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
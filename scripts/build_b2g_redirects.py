@@ -12,16 +12,37 @@ The redirect HTML carries:
 - inline JS location.replace for instant client-side hop
 - minimal body content as a fallback
 
+Stubs cost one HTML document per slug, which stops scaling once hundreds
+of report routes are mirrored. ``--router`` compiles the slugs into a
+prefix trie instead, embedded as minified JSON with a small resolver in
+404.html (which GitHub Pages serves for any unknown path), and keeps
+stubs only for ``STUB_SLUGS``. A router-only slug answers with HTTP 404
+before the script sends the visitor on, so crawlers never index it;
+slugs that need a crawlable canonical belong in ``STUB_SLUGS``. Stubs
+left over from the other mode are removed, so the tree always matches
+the mode of the last run.
+
 Idempotent: re-running produces byte-identical output.
+
+Usage::
+
+    python3 scripts/build_b2g_redirects.py [--router]
 """
 
 from __future__ import annotations
 
+import argparse
+import json
+import re
+import urllib.parse
 from html import escape
 from pathlib import Path
+from typing import Any
 
 ROOT = Path(__file__).resolve().parents[1]
 PROJECT_BASE = "https://avaluev.github.io/ca-b2g-research"
+# Social cards rendered by build_og_image.py.
+OG_BASE = "https://avaluev.github.io/og"
 
 # Slugs from the project site that should be reachable at the root domain.
 # Keep in lock-step with ca-b2g-research/outputs/site/ directory tree.
@@ -49,6 +70,22 @@ SLUGS: list[tuple[str, str, str]] = [
 ]
 
 
+# Slugs that keep a full stub page in --router mode: the ones linked from
+# outside, whose short URL should stay crawlable.
+STUB_SLUGS = frozenset({"uzbekistan", "kyrgyzstan", "initiatives"})
+
+NOT_FOUND = ROOT / "404.html"
+ROUTER_START = "<!-- slug-router: generated by scripts/build_b2g_redirects.py --router -->\n"
+ROUTER_END = "<!-- /slug-router -->\n"
+_ROUTER_RE = re.compile(re.escape(ROUTER_START) + r"(.*?)" + re.escape(ROUTER_END), re.DOTALL)
+_TRIE_RE = re.compile(r"var t=(\{.*?\}),b=")
+
+
+def og_card_name(slug: str) -> str:
+    """File name of a slug's social card under og/ ("decrees/uz" -> "decrees-uz.png")."""
+    return slug.replace("/", "-") + ".png"
+
+
 def render_redirect(slug: str, title: str, description: str) -> str:
     target = f"{PROJECT_BASE}/{slug}/"
     return (
@@ -66,6 +103,10 @@ def render_redirect(slug: str, title: str, description: str) -> str:
         f'<meta property="og:title" content="{escape(title)}">\n'
         f'<meta property="og:description" content="{escape(description)}">\n'
         f'<meta property="og:url" content="{target}">\n'
+        f'<meta property="og:image" content="{OG_BASE}/{og_card_name(slug)}">\n'
+        '<meta property="og:image:width" content="1200">\n'
+        '<meta property="og:image:height" content="630">\n'
+        '<meta name="twitter:card" content="summary_large_image">\n'
         '<style>body{font-family:system-ui,-apple-system,sans-serif;max-width:640px;'
         'margin:80px auto;padding:24px;line-height:1.6;color:#0d1117}a{color:#0057cc}</style>\n'
         '</head>\n'
@@ -79,22 +120,168 @@ def render_redirect(slug: str, title: str, description: str) -> str:
     )
 
 
+def build_trie(slugs: list[str]) -> dict[str, Any]:
+    """Prefix trie over path segments.
+
+    A slug ends where a node has the key "" (value 1); a node that is
+    nothing but an ending collapses to 1, so leaves cost two bytes:
+    ``{"decrees": {"kg": 1, "uz": 1}, "mvp": {"": 1, "kg": 1, "uz": 1}}``.
+    """
+    trie: dict[str, Any] = {}
+    for slug in slugs:
+        node = trie
+        for segment in slug.split("/"):
+            node = node.setdefault(segment, {})
+        node[""] = 1
+
+    def compact(node: dict[str, Any]) -> dict[str, Any] | int:
+        if node == {"": 1}:
+            return 1
+        return {key: value if key == "" else compact(value) for key, value in node.items()}
+
+    return {key: compact(value) for key, value in trie.items()}
+
+
+_BAD_ESCAPE_RE = re.compile(r"%(?![0-9A-Fa-f]{2})")
+
+
+def _decode_segment(raw: str) -> tuple[str, str]:
+    """``(decoded, encoded)`` for one path segment, as decodeURIComponent
+    and encodeURIComponent see it; a malformed escape keeps it raw."""
+    if not _BAD_ESCAPE_RE.search(raw):
+        try:
+            decoded = urllib.parse.unquote(raw, errors="strict")
+        except UnicodeDecodeError:
+            pass
+        else:
+            return decoded, urllib.parse.quote(decoded, safe="!'()*")
+    return raw, raw
+
+
+def route(trie: dict[str, Any], path: str) -> str | None:
+    """Where the 404 router sends ``path``, or None; mirrors ROUTER_JS.
+
+    Any path at or below a slug goes to the same path on the project
+    site; directories (no extension in the last segment) get their
+    trailing slash so the project site doesn't add a 301. Segments are
+    matched decoded and sent on re-encoded.
+    """
+    pairs = [_decode_segment(s) for s in path.removesuffix("index.html").split("/") if s]
+    segments = [decoded for decoded, _encoded in pairs]
+    node: dict[str, Any] | int = trie
+    matched = False
+    for segment in segments:
+        if not isinstance(node, dict) or segment not in node:
+            break
+        node = node[segment]
+        matched = matched or node == 1 or (isinstance(node, dict) and "" in node)
+    if not matched:
+        return None
+    rest = "/".join(encoded for _decoded, encoded in pairs)
+    return f"{PROJECT_BASE}/{rest}" + ("" if "." in segments[-1] else "/")
+
+
+# Minified twin of route(); t is the trie, b the project base, s the
+# decoded segments and e their re-encoded form. A malformed escape makes
+# decodeURIComponent throw, so that segment stays raw instead of the
+# script dying before the 404 page renders.
+ROUTER_JS = (
+    "(function(){{var t={trie},b={base},s=[],e=[],"
+    "n=t,m=0,h=Object.prototype.hasOwnProperty;"
+    "location.pathname.replace(/index\\.html$/,'').split('/').forEach(function(x){{"
+    "if(!x)return;try{{var d=decodeURIComponent(x);s.push(d);e.push(encodeURIComponent(d))}}"
+    "catch(_){{s.push(x);e.push(x)}}}});"
+    "for(var i=0;i<s.length;i++){{if(n===1||!h.call(n,s[i]))break;n=n[s[i]];"
+    "if(n===1||h.call(n,''))m=1}}"
+    "if(m)location.replace(b+'/'+e.join('/')+(/\\./.test(s[s.length-1])?'':'/')"
+    "+location.search+location.hash)}})();"
+)
+
+
+def render_router(trie: dict[str, Any]) -> str:
+    script = ROUTER_JS.format(
+        trie=json.dumps(trie, separators=(",", ":"), sort_keys=True),
+        base=json.dumps(PROJECT_BASE),
+    )
+    return f"{ROUTER_START}<script>{script}</script>\n{ROUTER_END}"
+
+
+def read_router(html: str) -> dict[str, Any] | None:
+    """The trie embedded in a 404 page, if it has a router."""
+    m = _ROUTER_RE.search(html)
+    t = _TRIE_RE.search(m.group(1)) if m else None
+    return json.loads(t.group(1)) if t else None
+
+
+def with_router(html: str, router: str) -> str:
+    """``html`` with its router block replaced by ``router`` (or removed,
+    if empty); a new block goes right after <meta charset> so it runs
+    before the page loads anything else."""
+    html = _ROUTER_RE.sub("", html)
+    if not router:
+        return html
+    head, sep, tail = html.partition('<meta charset="utf-8">\n')
+    if not sep:
+        raise ValueError(f"{NOT_FOUND.name} has no <meta charset> line to put the router after")
+    return head + sep + router + tail
+
+
+def _write(path: Path, new: str, label: str) -> bool:
+    if path.exists() and path.read_text(encoding="utf-8") == new:
+        print(f"[nochange] {label}")
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(new, encoding="utf-8")
+    print(f"[wrote]    {label}")
+    return True
+
+
+def _remove_stub(slug: str) -> bool:
+    out_file = ROOT / slug / "index.html"
+    if not out_file.exists():
+        return False
+    out_file.unlink()
+    for parent in (out_file.parent, *out_file.parent.parents):
+        if parent == ROOT or any(parent.iterdir()):
+            break
+        parent.rmdir()
+    print(f"[removed]  /{slug}/")
+    return True
+
+
 def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--router",
+        action="store_true",
+        help="Redirect from 404.html via a slug trie; keep stubs only for STUB_SLUGS.",
+    )
+    args = parser.parse_args()
+
     written = 0
     unchanged = 0
+    removed = 0
+    routed = [slug for slug, _title, _description in SLUGS if slug not in STUB_SLUGS]
     for slug, title, description in SLUGS:
-        out_dir = ROOT / slug
-        out_dir.mkdir(parents=True, exist_ok=True)
-        out_file = out_dir / "index.html"
-        new = render_redirect(slug, title, description)
-        if out_file.exists() and out_file.read_text(encoding="utf-8") == new:
-            unchanged += 1
-            print(f"[nochange] /{slug}/")
+        if args.router and slug in routed:
+            removed += _remove_stub(slug)
             continue
-        out_file.write_text(new, encoding="utf-8")
+        page = render_redirect(slug, title, description)
+        if _write(ROOT / slug / "index.html", page, f"/{slug}/"):
+            written += 1
+        else:
+            unchanged += 1
+
+    router = render_router(build_trie(routed)) if args.router else ""
+    if _write(NOT_FOUND, with_router(NOT_FOUND.read_text(encoding="utf-8"), router), "/404.html"):
         written += 1
-        print(f"[wrote]    /{slug}/")
-    print(f"\nTotal: {written} written, {unchanged} unchanged, {len(SLUGS)} total slugs.")
+    else:
+        unchanged += 1
+    mode = f"{len(routed)} routed from 404.html" if args.router else "no router"
+    print(
+        f"\nTotal: {written} written, {unchanged} unchanged, {removed} removed, "
+        f"{len(SLUGS)} total slugs ({mode})."
+    )
     return 0
 
 
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""Content-addressed store for build outputs.
+
+``build.py`` keys every task by the hash of its command and its input
+files. After a task runs, the files it wrote are saved here under that
+key; when the same inputs come back (switching branches, reverting a
+page, a fresh CI checkout) the outputs are copied back instead of
+regenerating them. Contents are stored once, by their own sha256, so
+the many unchanged files shared between entries cost nothing extra.
+
+Layout::
+
+    .build-cache/
+      objects/ab/abcdef...   file contents, named by their sha256
+      tasks/<key>.json       {"task": name, "files": {path: sha256, ...}}
+
+The store is capped in size (``build.py --cache-size``, 256 MiB by
+default): least recently used objects (by mtime, refreshed on every hit)
+are evicted first, and entries that lost an object are dropped with
+them. Nothing in it is tied to this
+checkout, so CI can keep it between runs by caching the directory, and
+``BUILD_CACHE_DIR`` points any checkout at a shared one.
+
+Usage::
+
+    python3 scripts/build_cache.py                 # entries and size
+    python3 scripts/build_cache.py --prune 64      # evict down to 64 MiB
+    python3 scripts/build_cache.py --clear
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+from collections import Counter
+from collections.abc import Mapping
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+CACHE_DIR = Path(os.environ.get("BUILD_CACHE_DIR") or ROOT / ".build-cache")
+MAX_SIZE = 256 * 1024 * 1024
+
+
+def _atomic_write(path: Path, data: bytes) -> None:
+    """Write via a temporary file, so a shared store never holds half a file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class ArtifactCache:
+    """Task outputs by input key; see the module docstring for the layout."""
+
+    def __init__(self, root: Path = CACHE_DIR, max_size: int = MAX_SIZE) -> None:
+        self.root = root
+        self.max_size = max_size
+        self.stats: Counter[str] = Counter()
+
+    def _object(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _entry(self, key: str) -> Path:
+        return self.root / "tasks" / f"{key}.json"
+
+    def get(self, key: str) -> dict[str, str] | None:
+        """``{path: sha256}`` of the outputs stored under ``key``, or None."""
+        entry = self._entry(key)
+        try:
+            files: dict[str, str] = json.loads(entry.read_text(encoding="utf-8"))["files"]
+        except (OSError, ValueError, KeyError):
+            self.stats["misses"] += 1
+            return None
+        objects = [self._object(digest) for digest in files.values()]
+        if not all(p.is_file() for p in objects):
+            self.stats["misses"] += 1
+            return None
+        for path in (entry, *objects):
+            os.utime(path)
+        self.stats["hits"] += 1
+        return files
+
+    def put(self, key: str, task: str, files: Mapping[str, Path]) -> None:
+        """Store ``files`` (``{path relative to the checkout: file}``) under ``key``."""
+        digests: dict[str, str] = {}
+        for rel, path in files.items():
+            data = path.read_bytes()
+            digest = hashlib.sha256(data).hexdigest()
+            obj = self._object(digest)
+            if obj.is_file():
+                os.utime(obj)
+            else:
+                _atomic_write(obj, data)
+            digests[rel] = digest
+        entry = {"task": task, "files": dict(sorted(digests.items()))}
+        _atomic_write(self._entry(key), (json.dumps(entry, indent=1) + "\n").encode())
+        self.stats["stored"] += 1
+
+    def restore(self, files: Mapping[str, str], root: Path = ROOT) -> int:
+        """Copy stored outputs into ``root``; return how many files changed."""
+        changed = 0
+        for rel, digest in files.items():
+            path = root / rel
+            if path.is_file() and hashlib.sha256(path.read_bytes()).hexdigest() == digest:
+                continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(self._object(digest), path)
+            changed += 1
+        return changed
+
+    def size(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*/**/*") if p.is_file())
+
+    def prune(self, max_size: int | None = None) -> int:
+        """Evict least recently used objects until the store fits in
+        ``max_size`` bytes, then the entries that needed them. Returns
+        the number of bytes freed."""
+        limit = self.max_size if max_size is None else max_size
+        objects = sorted(
+            (p.stat().st_mtime, p.stat().st_size, p)
+            for p in self.root.glob("objects/*/*")
+            if p.is_file()
+        )
+        total = self.size()
+        freed = 0
+        for _mtime, size, path in objects:
+            if total - freed <= limit:
+                break
+            path.unlink()
+            freed += size
+            self.stats["evicted"] += 1
+        if freed:
+            for entry in self.root.glob("tasks/*.json"):
+                try:
+                    files = json.loads(entry.read_text(encoding="utf-8"))["files"]
+                    complete = all(self._object(d).is_file() for d in files.values())
+                except (OSError, ValueError, KeyError):
+                    complete = False
+                if not complete:
+                    freed += entry.stat().st_size
+                    entry.unlink()
+        return freed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--dir", type=Path, default=CACHE_DIR, help="Cache directory.")
+    parser.add_argument("--prune", type=int, metavar="MIB", help="Evict down to this size.")
+    parser.add_argument("--clear", action="store_true", help="Delete the whole cache.")
+    args = parser.parse_args()
+
+    if args.clear:
+        shutil.rmtree(args.dir, ignore_errors=True)
+        print(f"[cleared] {args.dir}")
+        return 0
+    cache = ArtifactCache(args.dir)
+    if args.prune is not None:
+        freed = cache.prune(args.prune * 1024 * 1024)
+        print(f"[pruned] {freed:,} bytes, {cache.stats['evicted']} object(s)")
+    entries = Counter(
+        json.loads(p.read_text(encoding="utf-8")).get("task", "?")
+        for p in sorted(args.dir.glob("tasks/*.json"))
+    )
+    objects = sum(1 for p in args.dir.glob("objects/*/*") if p.is_file())
+    print(f"{args.dir}: {cache.size():,} bytes in {objects} object(s)")
+    for task, n in sorted(entries.items()):
+        print(f"  {task:<16} {n} entr{'y' if n == 1 else 'ies'}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
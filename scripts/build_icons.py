@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""Derive every favicon / PWA icon from one master PNG.
+
+Pure stdlib, built on the PNG decoder and optimiser in
+``optimize_png.py``. Decodes the master (``scripts/icon-master.png``),
+area-averages it down to each size in ``ICON_SIZES`` in premultiplied-
+alpha space (so transparent edges don't pick up dark fringes), and
+writes each output through the optimiser's encoding search. Also
+assembles a multi-size ``favicon.ico`` from PNG-compressed entries.
+
+The master is only ever read: the full-size ``android-chrome-512x512.png``
+is derived from it like every other size, so every icon shares the same
+encoder and ``optimize_png.py`` finds nothing left to shrink. Idempotent:
+outputs depend on the master alone, and files are only written when their
+bytes change.
+
+Usage::
+
+    python3 scripts/build_icons.py [--jobs N]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import struct
+import sys
+from collections.abc import Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+
+from optimize_png import Image, decode_png, optimize_image
+
+ROOT = Path(__file__).resolve().parent.parent
+MASTER = ROOT / "scripts" / "icon-master.png"
+
+# Output file -> edge length in pixels. Referenced from every page's
+# <link rel="icon"> tags and from manifest.webmanifest.
+ICON_SIZES: dict[str, int] = {
+    "android-chrome-512x512.png": 512,
+    "android-chrome-192x192.png": 192,
+    "apple-touch-icon.png": 180,
+    "favicon-32x32.png": 32,
+    "favicon-16x16.png": 16,
+}
+
+FAVICON_ICO = ROOT / "favicon.ico"
+ICO_SIZES = (16, 32, 48)
+
+
+# ---------------------------------------------------------------- resample
+
+
+def _box_weights(src: int, dst: int) -> list[tuple[int, int, int, int]]:
+    """Per output pixel: (first, last, first weight, last weight).
+
+    Output pixel ``i`` covers the source interval [i*src/dst,
+    (i+1)*src/dst). Measured in units of 1/dst of a source pixel every
+    weight is an integer: pixels strictly inside weigh ``dst``, the two
+    edge pixels their partial coverage, and each span totals ``src``.
+    Integer weights keep the output bit-identical across Python versions.
+    """
+    spans: list[tuple[int, int, int, int]] = []
+    for i in range(dst):
+        lo = i * src
+        hi = (i + 1) * src
+        first = lo // dst
+        last = (hi - 1) // dst
+        w_first = min(hi, (first + 1) * dst) - lo
+        w_last = hi - last * dst if last > first else w_first
+        spans.append((first, last, w_first, w_last))
+    return spans
+
+
+def _resample_line(
+    line: list[int], channels: int, spans: list[tuple[int, int, int, int]], inner: int
+) -> list[int]:
+    """Weighted sums over one interleaved line; interior taps are summed in C via slices."""
+    out: list[int] = []
+    for first, last, w_first, w_last in spans:
+        for c in range(channels):
+            total = line[first * channels + c] * w_first
+            if last > first:
+                total += line[last * channels + c] * w_last
+                total += inner * sum(
+                    line[(first + 1) * channels + c : last * channels + c : channels]
+                )
+            out.append(total)
+    return out
+
+
+def resize(image: Image, size: int) -> Image:
+    """Box-filter (area-average) ``image`` to ``size`` x ``size``.
+
+    Works in premultiplied alpha so fully transparent pixels carry no
+    colour into their neighbours, then un-premultiplies and rounds.
+    """
+    if image.width == size and image.height == size:
+        return image
+    w, h = image.width, image.height
+    px = image.rgba
+    # Premultiply without dividing: colour * alpha, alpha as-is.
+    premul = [0] * (w * h * 4)
+    alphas = px[3::4]
+    for c in range(3):
+        premul[c::4] = [v * a for v, a in zip(px[c::4], alphas, strict=True)]
+    premul[3::4] = list(alphas)
+
+    x_spans = _box_weights(w, size)
+    rows = [_resample_line(premul[y * w * 4 : (y + 1) * w * 4], 4, x_spans, size) for y in range(h)]
+
+    total = w * h  # sum of all x weights times all y weights
+    out = bytearray(size * size * 4)
+    for j, (first, last, w_first, w_last) in enumerate(_box_weights(h, size)):
+        acc = [v * w_first for v in rows[first]]
+        for k in range(first + 1, last + 1):
+            weight = w_last if k == last else size
+            acc = [a + v * weight for a, v in zip(acc, rows[k], strict=True)]
+        base = j * size * 4
+        for x in range(size):
+            a = acc[x * 4 + 3]
+            out[base + x * 4 + 3] = (2 * a + total) // (2 * total)
+            if not out[base + x * 4 + 3]:
+                continue  # fully transparent pixels carry no colour
+            for c in range(3):
+                out[base + x * 4 + c] = min(255, (2 * acc[x * 4 + c] + a) // (2 * a))
+    return Image(size, size, bytes(out))
+
+
+def build_ico(images: Sequence[Image], executor: Executor | None = None) -> bytes:
+    """Multi-size ICO with PNG-compressed entries (Windows Vista+ / all browsers)."""
+    blobs = [optimize_image(img, executor=executor) for img in images]
+    header = struct.pack("<HHH", 0, 1, len(images))
+    offset = len(header) + 16 * len(images)
+    entries = b""
+    for img, blob in zip(images, blobs, strict=True):
+        dim = img.width if img.width < 256 else 0
+        entries += struct.pack("<BBBBHHII", dim, dim, 0, 0, 1, 32, len(blob), offset)
+        offset += len(blob)
+    return header + entries + b"".join(blobs)
+
+
+# -------------------------------------------------------------------- main
+
+
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.write_bytes(data)
+    return True
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Encoding trial worker processes."
+    )
+    args = parser.parse_args()
+
+    master = decode_png(MASTER.read_bytes())
+    if master.width != master.height:
+        print(f"[error] {MASTER.name} must be square", file=sys.stderr)
+        return 1
+    for name, size in ICON_SIZES.items():
+        if size > master.width:
+            print(f"[error] {name} ({size}px) exceeds master {master.width}px", file=sys.stderr)
+            return 1
+
+    outputs: list[tuple[Path, bytes]] = []
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for name, size in ICON_SIZES.items():
+            outputs.append((ROOT / name, optimize_image(resize(master, size), executor=executor)))
+        ico_images = [resize(master, size) for size in ICO_SIZES]
+        outputs.append((FAVICON_ICO, build_ico(ico_images, executor)))
+
+    for path, data in outputs:
+        verb = "wrote" if _write_if_changed(path, data) else "nochange"
+        print(f"[{verb}] {path.name} ({len(data):,} bytes)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,35 +1,63 @@
 #!/usr/bin/env python3
-"""Generate og-default.png — a 1200×630 social preview card.
+"""Generate og-default.png and per-page og/*.png 1200×630 social cards.
 
 Pure-stdlib PNG generation: no PIL, no Cairo, no external deps. Builds
-a brand-coloured card with a centred title and a thin accent bar. The
-output is referenced from every page's `<meta property="og:image">`.
-
-Idempotent: only writes the file if its bytes differ from the current
-file on disk.
+a brand-coloured card with a centred title and a thin accent bar.
+``og-default.png`` is the site-wide fallback (JSON-LD, 404). One card
+per ``PAGES`` entry and per redirect stub page (every slug in
+``build_b2g_redirects.SLUGS``, or only ``STUB_SLUGS`` once 404.html
+carries the slug router) goes to ``og/``, rendered on a process pool from a shared background
+template; each published page's og:image / twitter:image is pointed at
+its own card.
+
+The card is drawn into an indexed framebuffer and written as a palette
+PNG (colour type 3, 2-bit) with per-row adaptive filtering and streaming
+zlib compression; ``encode_png`` also handles grey/RGB/alpha images.
+
+Idempotent: every card embeds a fingerprint of its render inputs (text,
+palette, glyph table, size, encoder version, this file's source) as a
+PNG tEXt chunk. Cards whose fingerprint matches are not rendered at all;
+the rest are only written if their bytes differ from the file on disk.
 
 Usage::
 
     python3 scripts/build_og_image.py
+    python3 scripts/build_og_image.py --jobs 1   # render inline
 """
 
 from __future__ import annotations
 
+import argparse
+import functools
+import hashlib
+import json
+import math
+import os
+import re
 import struct
 import sys
 import zlib
+from collections.abc import Iterable, Iterator, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Literal
+
+from build_b2g_redirects import NOT_FOUND, OG_BASE, SLUGS, STUB_SLUGS, og_card_name, read_router
+from build_seo_assets import PAGES
 
 ROOT = Path(__file__).resolve().parent.parent
 OUT = ROOT / "og-default.png"
+# Per-page cards, one per PAGES entry and redirect slug.
+OG_DIR = ROOT / "og"
 
 WIDTH = 1200
 HEIGHT = 630
 
 # Brand palette.
-BG = (10, 11, 16)        # near-black background
-ACCENT = (37, 99, 235)   # blue-600
-INK = (245, 245, 248)    # near-white text
+BG = (10, 11, 16)  # near-black background
+ACCENT = (37, 99, 235)  # blue-600
+INK = (245, 245, 248)  # near-white text
 INK_MUTE = (160, 165, 180)
 
 # 7×7 pixel font for ASCII glyphs. Each glyph is a list of 7 strings of
@@ -78,135 +106,700 @@ GLYPHS: dict[str, list[str]] = {
     "-": ["......", "......", "......", "######", "......", "......", "......"],
     "/": ["......", ".....#", "....#.", "...#..", "..#...", ".#....", "#....."],
     ":": ["......", "..##..", "..##..", "......", "..##..", "..##..", "......"],
+    ",": ["......", "......", "......", "......", "..##..", "..##..", ".##..."],
+    "'": ["..##..", "..##..", "..#...", "......", "......", "......", "......"],
+    "(": ["...##.", "..#...", ".#....", ".#....", ".#....", "..#...", "...##."],
+    ")": [".##...", "...#..", "....#.", "....#.", "....#.", "...#..", ".##..."],
+    "!": ["..##..", "..##..", "..##..", "..##..", "......", "..##..", "..##.."],
+    "?": [".####.", "#....#", ".....#", "...##.", "..#...", "......", "..#..."],
 }
 
-
-def _scale_glyph(glyph: list[str], scale: int) -> list[str]:
-    """Scale a glyph by integer factor (each pixel becomes a scale×scale square)."""
-    out: list[str] = []
-    for row in glyph:
-        scaled_row = "".join(c * scale for c in row)
-        out.extend([scaled_row] * scale)
-    return out
+# Typographic characters in registry titles mapped onto the glyph set.
+TEXT_FOLDS = str.maketrans(
+    {
+        "\u2014": "-",  # em dash
+        "\u2013": "-",  # en dash
+        "\u2019": "'",  # right single quote
+        "\u2018": "'",  # left single quote
+        "\u00b7": "-",  # middle dot
+        "\u2026": "...",  # ellipsis
+    }
+)
+
+
+Color = tuple[int, int, int]
+
+
+class Canvas:
+    """Flat indexed framebuffer: one palette-index byte per pixel.
+
+    Colours are assigned palette slots in order of first use (the
+    background is always index 0), which keeps the palette — and so the
+    encoded PNG — deterministic. All drawing goes through horizontal span
+    fills, which are single slice assignments into the ``bytearray``; no
+    per-pixel Python objects are created while rendering or encoding.
+    """
+
+    def __init__(self, width: int, height: int, bg: Color) -> None:
+        self.width = width
+        self.height = height
+        self.palette: list[Color] = [bg]
+        self._slots: dict[Color, int] = {bg: 0}
+        self.buf = bytearray(width * height)
+
+    def _slot(self, color: Color) -> int:
+        slot = self._slots.get(color)
+        if slot is None:
+            if len(self.palette) == 256:
+                raise ValueError("Canvas palette is limited to 256 colours")
+            slot = self._slots[color] = len(self.palette)
+            self.palette.append(color)
+        return slot
+
+    def fill_span(self, x: int, y: int, length: int, color: Color) -> None:
+        """Fill ``length`` pixels of row ``y`` from column ``x``, clipped."""
+        if not 0 <= y < self.height:
+            return
+        x0 = max(x, 0)
+        x1 = min(x + length, self.width)
+        if x1 <= x0:
+            return
+        off = y * self.width + x0
+        self.buf[off : off + x1 - x0] = bytes((self._slot(color),)) * (x1 - x0)
+
+    def fill_rect(self, x: int, y: int, w: int, h: int, color: Color) -> None:
+        for row in range(y, y + h):
+            self.fill_span(x, row, w, color)
+
+    def fill_circle(self, cx: int, cy: int, r: int, color: Color) -> None:
+        """Fill every pixel with dx² + dy² <= r², one span per row."""
+        for dy in range(-r, r + 1):
+            half = math.isqrt(r * r - dy * dy)
+            self.fill_span(cx - half, cy + dy, 2 * half + 1, color)
+
+    def copy(self) -> Canvas:
+        clone = Canvas.__new__(Canvas)
+        clone.width = self.width
+        clone.height = self.height
+        clone.palette = list(self.palette)
+        clone._slots = dict(self._slots)
+        clone.buf = bytearray(self.buf)
+        return clone
+
+    def rows(self) -> Iterator[memoryview]:
+        view = memoryview(self.buf)
+        for y in range(self.height):
+            yield view[y * self.width : (y + 1) * self.width]
+
+
+GLYPH_W = 7
+GLYPH_H = 7
+
+# Horizontal margin kept clear when centring and wrapping text.
+MARGIN_X = 80
+
+
+@dataclass(frozen=True)
+class Glyph:
+    """A glyph pre-scaled to one size, stored as horizontal ink runs."""
+
+    advance: int
+    runs: tuple[tuple[int, int, int], ...]  # (dy, dx, length) in pixels
+
+
+@functools.cache
+def _glyph(ch: str, scale: int) -> Glyph:
+    """Scale ``ch`` once per (character, scale) and keep its ink runs.
+
+    Each '#' run in a glyph row becomes one (dy, dx, length) span per
+    scaled pixel row, so drawing is a handful of slice assignments per
+    character instead of a per-pixel loop. Unknown characters render as
+    a space. The advance is the glyph width plus one glyph pixel of
+    tracking.
+    """
+    rows = GLYPHS.get(ch, GLYPHS[" "])
+    runs: list[tuple[int, int, int]] = []
+    for row_idx, row in enumerate(rows):
+        for m in re.finditer(r"#+", row):
+            for sub in range(scale):
+                runs.append(
+                    (row_idx * scale + sub, m.start() * scale, (m.end() - m.start()) * scale)
+                )
+    return Glyph(advance=(GLYPH_W + 1) * scale, runs=tuple(runs))
 
 
 def _draw_text(
-    pixels: list[list[tuple[int, int, int]]],
+    canvas: Canvas,
     text: str,
     x: int,
     y: int,
-    color: tuple[int, int, int],
+    color: Color,
     scale: int = 1,
 ) -> int:
     """Draw text starting at (x, y). Returns the next x position after the text."""
     cur_x = x
-    glyph_w = 7
-    glyph_h = 7
-    space = max(1, scale)
     for ch in text.upper():
-        glyph = GLYPHS.get(ch, GLYPHS[" "])
-        scaled = _scale_glyph(glyph, scale)
-        for row_idx, row in enumerate(scaled):
-            for col_idx, c in enumerate(row):
-                if c == "#":
-                    px = cur_x + col_idx
-                    py = y + row_idx
-                    if 0 <= px < WIDTH and 0 <= py < HEIGHT:
-                        pixels[py][px] = color
-        cur_x += glyph_w * scale + space * scale
+        glyph = _glyph(ch, scale)
+        for dy, dx, length in glyph.runs:
+            canvas.fill_span(cur_x + dx, y + dy, length, color)
+        cur_x += glyph.advance
     return cur_x
 
 
 def _text_width(text: str, scale: int) -> int:
-    glyph_w = 7
-    space = max(1, scale)
-    return len(text) * (glyph_w * scale + space * scale)
-
-
-def build_png() -> bytes:
-    pixels: list[list[tuple[int, int, int]]] = [
-        [BG for _ in range(WIDTH)] for _ in range(HEIGHT)
-    ]
+    """Ink width of ``text``: advances minus the trailing tracking."""
+    if not text:
+        return 0
+    return sum(_glyph(ch, scale).advance for ch in text.upper()) - scale
+
+
+def _wrap_text(text: str, scale: int, max_width: int) -> list[str]:
+    """Greedy word wrap; a word wider than ``max_width`` gets its own line."""
+    lines: list[str] = []
+    current = ""
+    for word in text.split():
+        candidate = f"{current} {word}" if current else word
+        if current and _text_width(candidate, scale) > max_width:
+            lines.append(current)
+            current = word
+        else:
+            current = candidate
+    if current:
+        lines.append(current)
+    return lines
+
+
+def _fit_text(
+    text: str, scales: tuple[int, ...], max_width: int, max_lines: int
+) -> tuple[int, list[str]]:
+    """Largest scale in ``scales`` whose wrapped lines all fit.
+
+    If nothing fits, the smallest scale is used and the text is cut after
+    ``max_lines`` lines, ending in "..." where words were dropped.
+    """
+    for scale in scales:
+        lines = _wrap_text(text, scale, max_width)
+        if len(lines) <= max_lines and all(_text_width(line, scale) <= max_width for line in lines):
+            return scale, lines
+    scale = scales[-1]
+    lines = _wrap_text(text, scale, max_width)
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        last = lines[-1]
+        while last and _text_width(last + "...", scale) > max_width:
+            last = last.rsplit(" ", 1)[0] if " " in last else last[:-1]
+        lines[-1] = last.rstrip(" ,;:-") + "..."
+    return scale, lines
+
+
+def _draw_centered(canvas: Canvas, text: str, y: int, color: Color, scale: int) -> None:
+    x = (canvas.width - _text_width(text, scale)) // 2
+    _draw_text(canvas, text, x, y, color, scale=scale)
+
+
+def render_template() -> Canvas:
+    """Background shared by every card: accent bar, logo dot, brand name."""
+    canvas = Canvas(WIDTH, HEIGHT, BG)
 
     # Top accent bar.
-    for y in range(0, 8):
-        for x in range(WIDTH):
-            pixels[y][x] = ACCENT
+    canvas.fill_rect(0, 0, WIDTH, 8, ACCENT)
 
     # Logo dot + brand name.
     dot_x = 80
     dot_y = 88
     dot_r = 14
-    for dy in range(-dot_r, dot_r + 1):
-        for dx in range(-dot_r, dot_r + 1):
-            if dx * dx + dy * dy <= dot_r * dot_r:
-                px = dot_x + dx
-                py = dot_y + dy
-                if 0 <= px < WIDTH and 0 <= py < HEIGHT:
-                    pixels[py][px] = ACCENT
-    _draw_text(pixels, "ALEX VALUEV", dot_x + 36, dot_y - 14, INK, scale=3)
-
-    # Title — wrap at ~24 chars per line. We pre-split.
-    title_lines = ["SENIOR AI", "PRODUCT MANAGER", "& CAREER COACH"]
-    line_height = 7 * 8 + 18  # 7 px glyph * scale 8 + leading
+    canvas.fill_circle(dot_x, dot_y, dot_r, ACCENT)
+    _draw_text(canvas, "ALEX VALUEV", dot_x + 36, dot_y - 14, INK, scale=3)
+    return canvas
+
+
+def build_png(template: Canvas | None = None, fingerprint: str = "") -> bytes:
+    canvas = (template or render_template()).copy()
+
+    # Title — largest scale that wraps into three lines within the margins.
+    title = "SENIOR AI PRODUCT MANAGER & CAREER COACH"
+    scale, title_lines = _fit_text(title, (8, 7, 6, 5), WIDTH - 2 * MARGIN_X, 3)
+    line_height = GLYPH_H * scale + 18  # glyph height + leading
     title_y = 200
     for i, line in enumerate(title_lines):
-        scale = 8 if len(line) <= 18 else 7
-        w = _text_width(line, scale)
-        x = (WIDTH - w) // 2
-        _draw_text(pixels, line, x, title_y + i * line_height, INK, scale=scale)
+        _draw_centered(canvas, line, title_y + i * line_height, INK, scale)
 
     # Subtitle.
-    subtitle = "PORTFOLIO  +  RESEARCH  +  COACHING"
-    sub_scale = 3
-    sw = _text_width(subtitle, sub_scale)
-    sx = (WIDTH - sw) // 2
     sy = HEIGHT - 100
-    _draw_text(pixels, subtitle, sx, sy, INK_MUTE, scale=sub_scale)
+    _draw_centered(canvas, "PORTFOLIO  +  RESEARCH  +  COACHING", sy, INK_MUTE, 3)
 
     # Domain pin.
-    domain = "AVALUEV.GITHUB.IO"
-    d_scale = 2
-    dw = _text_width(domain, d_scale)
-    dx = (WIDTH - dw) // 2
-    dy = sy + 50
-    _draw_text(pixels, domain, dx, dy, ACCENT, scale=d_scale)
-
-    return _encode_png(pixels)
-
-
-def _encode_png(pixels: list[list[tuple[int, int, int]]]) -> bytes:
-    """Encode an RGB pixel grid as a valid PNG."""
-    raw_rows: list[bytes] = []
-    for row in pixels:
-        line = b"\x00"  # filter type: None
-        for r, g, b in row:
-            line += bytes((r, g, b))
-        raw_rows.append(line)
-    raw = b"".join(raw_rows)
-    compressed = zlib.compress(raw, level=9)
-
-    def chunk(tag: bytes, data: bytes) -> bytes:
-        crc = zlib.crc32(tag + data) & 0xFFFFFFFF
-        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
-
-    header = b"\x89PNG\r\n\x1a\n"
-    ihdr_data = struct.pack(">IIBBBBB", WIDTH, HEIGHT, 8, 2, 0, 0, 0)
-    return (
-        header
-        + chunk(b"IHDR", ihdr_data)
-        + chunk(b"IDAT", compressed)
-        + chunk(b"IEND", b"")
+    _draw_centered(canvas, "AVALUEV.GITHUB.IO", sy + 50, ACCENT, 2)
+
+    return encode_canvas(canvas, fingerprint)
+
+
+# --------------------------------------------------------- per-page cards
+
+
+@dataclass(frozen=True)
+class CardJob:
+    """One social card: output file under OG_DIR plus the text to draw."""
+
+    filename: str
+    title: str
+    subtitle: str
+    path: str  # URL path shown in the domain pin, e.g. "/about.html"
+
+
+def card_jobs() -> list[CardJob]:
+    """A card for every PAGES entry and every redirect stub page.
+
+    Slugs routed from 404.html have no page of their own to carry an
+    og:image, so in router mode only STUB_SLUGS get a card.
+    """
+    routed = read_router(NOT_FOUND.read_text(encoding="utf-8")) is not None
+    jobs: list[CardJob] = []
+    for name, title, summary in PAGES:
+        path = "/" if name == "index.html" else f"/{name}"
+        jobs.append(CardJob(Path(name).stem + ".png", title, summary, path))
+    for slug, title, description in SLUGS:
+        if routed and slug not in STUB_SLUGS:
+            continue
+        jobs.append(CardJob(og_card_name(slug), title, description, f"/{slug}/"))
+    names = [job.filename for job in jobs]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate OG card names: {sorted(names)}")
+    return jobs
+
+
+def render_card(job: CardJob, template: Canvas, fingerprint: str = "") -> bytes:
+    canvas = template.copy()
+    inner = WIDTH - 2 * MARGIN_X
+
+    scale, lines = _fit_text(job.title.translate(TEXT_FOLDS), (8, 7, 6, 5, 4), inner, 3)
+    line_height = GLYPH_H * scale + 18
+    y = 180
+    for line in lines:
+        _draw_centered(canvas, line, y, INK, scale)
+        y += line_height
+
+    sub_scale, sub_lines = _fit_text(job.subtitle.translate(TEXT_FOLDS), (3, 2), inner, 3)
+    y = max(y + 24, 420)
+    for line in sub_lines:
+        _draw_centered(canvas, line, y, INK_MUTE, sub_scale)
+        y += GLYPH_H * sub_scale + 10
+
+    _draw_centered(canvas, f"AVALUEV.GITHUB.IO{job.path}", HEIGHT - 50, ACCENT, 2)
+    return encode_canvas(canvas, fingerprint)
+
+
+# Per-process copy of the pre-rendered background, set by _init_worker.
+_WORKER_TEMPLATE: Canvas | None = None
+
+
+def _init_worker() -> None:
+    global _WORKER_TEMPLATE
+    _WORKER_TEMPLATE = render_template()
+
+
+def _render_job(job: CardJob) -> tuple[str, bytes]:
+    if _WORKER_TEMPLATE is None:
+        _init_worker()
+    assert _WORKER_TEMPLATE is not None
+    return job.filename, render_card(job, _WORKER_TEMPLATE, card_fingerprint(job))
+
+
+def render_cards(jobs: Sequence[CardJob], workers: int) -> Iterator[tuple[str, bytes]]:
+    """Render cards on a process pool; each worker renders the template once."""
+    if workers <= 1 or len(jobs) <= 1:
+        yield from map(_render_job, jobs)
+        return
+    chunksize = max(1, len(jobs) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        yield from pool.map(_render_job, jobs, chunksize=chunksize)
+
+
+# ------------------------------------------------------------ fingerprints
+
+# Bump when encode_png output changes for identical pixels (chunk layout,
+# filter heuristic, compression settings).
+ENCODER_VERSION = 1
+
+# tEXt keyword carrying the render-input fingerprint in every card.
+FINGERPRINT_KEY = "og-fingerprint"
+
+# Layout code lives in this file, so its source is a render input too;
+# editing it invalidates every card even if ENCODER_VERSION is not bumped.
+_SOURCE_DIGEST = hashlib.sha256(Path(__file__).read_bytes()).hexdigest()
+
+
+def _fingerprint(*text: str) -> str:
+    """Digest of everything that determines a card's bytes."""
+    payload = json.dumps(
+        {
+            "encoder": ENCODER_VERSION,
+            "size": [WIDTH, HEIGHT],
+            "palette": [BG, ACCENT, INK, INK_MUTE],
+            "glyphs": GLYPHS,
+            "source": _SOURCE_DIGEST,
+            "text": text,
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def default_fingerprint() -> str:
+    return _fingerprint("og-default")
+
+
+def card_fingerprint(job: CardJob) -> str:
+    return _fingerprint(job.filename, job.title, job.subtitle, job.path)
+
+
+def read_png_text(path: Path) -> dict[str, str]:
+    """tEXt chunks of an existing PNG, reading no further than the first IDAT."""
+    text: dict[str, str] = {}
+    try:
+        with path.open("rb") as fh:
+            if fh.read(8) != PNG_SIGNATURE:
+                return text
+            while True:
+                head = fh.read(8)
+                if len(head) < 8:
+                    return text
+                length, tag = struct.unpack(">I4s", head)
+                if tag in (b"IDAT", b"IEND"):
+                    return text
+                data = fh.read(length)
+                fh.seek(4, os.SEEK_CUR)  # CRC
+                if tag == b"tEXt":
+                    key, _sep, value = data.partition(b"\0")
+                    text[key.decode("latin-1")] = value.decode("latin-1")
+    except FileNotFoundError:
+        return text
+
+
+def is_current(path: Path, fingerprint: str) -> bool:
+    return read_png_text(path).get(FINGERPRINT_KEY) == fingerprint
+
+
+_OG_IMAGE_META_RE = re.compile(
+    r'(<meta (?:property="og:image"|name="twitter:image") content=")[^"]*(")'
+)
+
+
+def point_og_image(html_path: Path, url: str) -> bool:
+    """Rewrite a page's og:image / twitter:image content to ``url``.
+
+    Returns True if the file changed. Width/height tags stay valid: every
+    card is WIDTH x HEIGHT.
+    """
+    html = html_path.read_text(encoding="utf-8")
+    new = _OG_IMAGE_META_RE.sub(lambda m: f"{m.group(1)}{url}{m.group(2)}", html)
+    if new == html:
+        return False
+    html_path.write_text(new, encoding="utf-8")
+    return True
+
+
+# ---------------------------------------------------------------- PNG writer
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# PNG colour types (IHDR byte 9) and the channels each one carries.
+COLOR_GRAY = 0
+COLOR_RGB = 2
+COLOR_PALETTE = 3
+COLOR_GRAY_ALPHA = 4
+COLOR_RGBA = 6
+CHANNELS = {COLOR_GRAY: 1, COLOR_RGB: 3, COLOR_PALETTE: 1, COLOR_GRAY_ALPHA: 2, COLOR_RGBA: 4}
+
+FILTER_NONE = 0
+FILTER_SUB = 1
+FILTER_UP = 2
+FILTER_AVERAGE = 3
+FILTER_PAETH = 4
+
+# Per-row candidates for the adaptive filter heuristic.
+ADAPTIVE_FILTERS: tuple[int, ...] = (FILTER_NONE, FILTER_SUB, FILTER_UP, FILTER_PAETH)
+
+# Compressed bytes are flushed into IDAT chunks of at most this size as
+# the compressor produces them, instead of holding one giant IDAT.
+IDAT_CHUNK_SIZE = 1 << 16
+
+# Maps a filtered byte to |signed value|, so ``sum(row.translate(...))``
+# scores a candidate row for the minimum-sum-of-absolute-differences
+# heuristic without a Python-level loop.
+_ABS_SIGNED = bytes(min(b, 256 - b) for b in range(256))
+
+
+def png_chunk(tag: bytes, data: bytes) -> bytes:
+    crc = zlib.crc32(tag + data) & 0xFFFFFFFF
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", crc)
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+@functools.cache
+def _byte_masks(n: int) -> tuple[int, int]:
+    """``0x80`` and ``0x7F`` repeated ``n`` times, as integers."""
+    return int.from_bytes(b"\x80" * n, "big"), int.from_bytes(b"\x7f" * n, "big")
+
+
+def _sub_bytes(x: int, y: int, n: int) -> bytes:
+    """Bytewise ``(x - y) & 0xFF`` over two ``n``-byte big-endian integers.
+
+    Setting every byte's high bit in ``x`` and clearing it in ``y`` keeps a
+    borrow from crossing into the next byte; the xor puts the real high
+    bits back (Hacker's Delight, 2-18).
+    """
+    high, low = _byte_masks(n)
+    return (((x | high) - (y & low)) ^ ((x ^ y ^ high) & high)).to_bytes(n, "big")
+
+
+def _mean_bytes(x: int, y: int, n: int) -> int:
+    """Bytewise ``(x + y) >> 1``; no byte can carry into its neighbour."""
+    _high, low = _byte_masks(n)
+    return (x & y) + (((x ^ y) >> 1) & low)
+
+
+def filter_row(ftype: int, row: bytes, prev: bytes, bpp: int) -> bytes:
+    """Apply PNG filter ``ftype`` to ``row`` (``prev`` is the unfiltered row above).
+
+    None, Sub, Up and Average treat the row as one big integer, so they
+    run at C speed; only Paeth, whose predictor picks per byte, loops.
+    """
+    if ftype == FILTER_NONE:
+        return row
+    n = len(row)
+    x = int.from_bytes(row, "big")
+    if ftype == FILTER_UP:
+        return _sub_bytes(x, int.from_bytes(prev, "big"), n)
+    # Shifting right by bpp bytes lines each byte up with the one to its left.
+    if ftype == FILTER_SUB:
+        return _sub_bytes(x, x >> (8 * bpp), n)
+    if ftype == FILTER_AVERAGE:
+        mean = _mean_bytes(x >> (8 * bpp), int.from_bytes(prev, "big"), n)
+        return _sub_bytes(x, mean, n)
+    left = bytes(bpp) + row[:-bpp]
+    upleft = bytes(bpp) + prev[:-bpp]
+    return bytes(
+        (x - _paeth(a, b, c)) & 0xFF for x, a, b, c in zip(row, left, prev, upleft, strict=True)
+    )
+
+
+def _best_filtered(row: bytes, prev: bytes, bpp: int, candidates: Sequence[int]) -> bytes:
+    """Filter-type byte + filtered row with the lowest MSAD score.
+
+    A row equal to the one above is all zeros under Up — the best any
+    filter can do — so it is taken without trying the others.
+    """
+    if len(candidates) == 1:
+        return bytes((candidates[0],)) + filter_row(candidates[0], row, prev, bpp)
+    if FILTER_UP in candidates and row == prev:
+        return bytes((FILTER_UP,)) + bytes(len(row))
+    best = b""
+    best_score = -1
+    for ftype in candidates:
+        filtered = filter_row(ftype, row, prev, bpp)
+        score = sum(filtered.translate(_ABS_SIGNED))
+        if best_score < 0 or score < best_score:
+            best, best_score = bytes((ftype,)) + filtered, score
+    return best
+
+
+def filter_rows(
+    rows: Iterable[bytes | memoryview],
+    stride: int,
+    bpp: int,
+    filters: Sequence[int] = ADAPTIVE_FILTERS,
+) -> Iterator[bytes]:
+    """Yield each scanline as IDAT stores it: filter-type byte + filtered bytes.
+
+    Inside a run of identical rows every row after the second filters
+    exactly like the one before it, so that output is reused.
+    """
+    prev = bytes(stride)
+    last: tuple[bytes, bytes, bytes] | None = None
+    for row in rows:
+        row = bytes(row)
+        if last is not None and last[0] == row and last[1] == prev:
+            line = last[2]
+        else:
+            line = _best_filtered(row, prev, bpp, filters)
+            last = (row, prev, line)
+        yield line
+        prev = row
+
+
+_CastCode = Literal["B", "H", "I", "Q"]
+_CAST_CODES: dict[int, _CastCode] = {1: "B", 2: "H", 4: "I", 8: "Q"}
+
+
+@functools.cache
+def _pack_table(depth: int) -> tuple[_CastCode, dict[int, int]]:
+    """memoryview cast code + lookup from N index bytes to one packed byte."""
+    per_byte = 8 // depth
+    code = _CAST_CODES[per_byte]
+    table: dict[int, int] = {}
+    for packed in range(256):
+        values = [(packed >> (8 - depth * (i + 1))) & ((1 << depth) - 1) for i in range(per_byte)]
+        table[int.from_bytes(bytes(values), sys.byteorder)] = packed
+    return code, table
+
+
+def pack_indices(row: bytes | memoryview, depth: int) -> bytes:
+    """Pack one byte per sample into ``depth``-bit samples (MSB first).
+
+    Groups of ``8 // depth`` samples are reinterpreted as one machine
+    integer and mapped through a 256-entry table, so packing runs at C
+    speed via ``map``. Rows are zero-padded to a whole output byte.
+    """
+    if depth == 8:
+        return bytes(row)
+    code, table = _pack_table(depth)
+    per_byte = 8 // depth
+    pad = -len(row) % per_byte
+    data = bytes(row) + bytes(pad)
+    return bytes(map(table.__getitem__, memoryview(data).cast(code)))
+
+
+def smallest_bit_depth(n_colors: int) -> int:
+    for depth in (1, 2, 4):
+        if n_colors <= 1 << depth:
+            return depth
+    return 8
+
+
+def encode_png(
+    width: int,
+    height: int,
+    rows: Iterable[bytes | memoryview],
+    *,
+    color_type: int,
+    bit_depth: int = 8,
+    palette: Sequence[tuple[int, ...]] = (),
+    filters: Sequence[int] = ADAPTIVE_FILTERS,
+    level: int = 9,
+    strategy: int = zlib.Z_DEFAULT_STRATEGY,
+    text: Sequence[tuple[str, str]] = (),
+) -> bytes:
+    """Encode packed, unfiltered scanlines as a PNG.
+
+    ``rows`` yields ``height`` scanlines already packed to ``bit_depth``.
+    Each row is filtered with the best of ``filters`` and fed straight to
+    a streaming ``zlib.compressobj``, so only the current and previous
+    row are held uncompressed. Palette entries may carry a fourth (alpha)
+    component, which is written as a tRNS chunk. ``text`` pairs become
+    tEXt chunks ahead of the image data.
+    """
+    bits_per_pixel = CHANNELS[color_type] * bit_depth
+    bpp = max(1, bits_per_pixel // 8)
+    stride = (width * bits_per_pixel + 7) // 8
+
+    out = [
+        PNG_SIGNATURE,
+        png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, color_type, 0, 0, 0)),
+    ]
+    if color_type == COLOR_PALETTE:
+        out.append(png_chunk(b"PLTE", b"".join(bytes(c[:3]) for c in palette)))
+        alphas = bytes(c[3] if len(c) > 3 else 255 for c in palette).rstrip(b"\xff")
+        if alphas:
+            out.append(png_chunk(b"tRNS", alphas))
+    for keyword, value in text:
+        out.append(png_chunk(b"tEXt", keyword.encode("latin-1") + b"\0" + value.encode("latin-1")))
+
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 15, 9, strategy)
+    pending = bytearray()
+    for line in filter_rows(rows, stride, bpp, filters):
+        pending += compressor.compress(line)
+        while len(pending) >= IDAT_CHUNK_SIZE:
+            out.append(png_chunk(b"IDAT", bytes(pending[:IDAT_CHUNK_SIZE])))
+            del pending[:IDAT_CHUNK_SIZE]
+    pending += compressor.flush()
+    for off in range(0, len(pending), IDAT_CHUNK_SIZE):
+        out.append(png_chunk(b"IDAT", bytes(pending[off : off + IDAT_CHUNK_SIZE])))
+    out.append(png_chunk(b"IEND", b""))
+    return b"".join(out)
+
+
+def encode_canvas(canvas: Canvas, fingerprint: str = "") -> bytes:
+    """Encode a canvas as colour type 3 at the smallest sufficient bit depth.
+
+    The OG card uses four colours, so indices pack four to a byte (2-bit).
+    A non-empty ``fingerprint`` is embedded as a tEXt chunk.
+    """
+    depth = smallest_bit_depth(len(canvas.palette))
+    return encode_png(
+        canvas.width,
+        canvas.height,
+        (pack_indices(row, depth) for row in canvas.rows()),
+        color_type=COLOR_PALETTE,
+        bit_depth=depth,
+        palette=canvas.palette,
+        text=((FINGERPRINT_KEY, fingerprint),) if fingerprint else (),
     )
 
 
+def _write_if_changed(path: Path, data: bytes) -> bool:
+    if path.exists() and path.read_bytes() == data:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return True
+
+
 def main() -> int:
-    data = build_png()
-    if OUT.exists() and OUT.read_bytes() == data:
-        print(f"[nochange] {OUT.name} ({len(data):,} bytes)")
-        return 0
-    OUT.write_bytes(data)
-    print(f"[wrote] {OUT.name} ({len(data):,} bytes)")
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Worker processes for per-page cards (1 = render inline).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Re-render even when the embedded fingerprint matches.",
+    )
+    args = parser.parse_args()
+
+    fingerprint = default_fingerprint()
+    if not args.force and is_current(OUT, fingerprint):
+        print(f"[skip] {OUT.name} (fingerprint unchanged)")
+    else:
+        data = build_png(fingerprint=fingerprint)
+        verb = "wrote" if _write_if_changed(OUT, data) else "nochange"
+        print(f"[{verb}] {OUT.name} ({len(data):,} bytes)")
+
+    jobs = card_jobs()
+    todo = [
+        job
+        for job in jobs
+        if args.force or not is_current(OG_DIR / job.filename, card_fingerprint(job))
+    ]
+    written = 0
+    for filename, data in render_cards(todo, args.jobs):
+        if _write_if_changed(OG_DIR / filename, data):
+            written += 1
+            print(f"[wrote] {OG_DIR.name}/{filename} ({len(data):,} bytes)")
+    expected = {job.filename for job in jobs}
+    for stale in sorted(OG_DIR.glob("*.png")):
+        if stale.name not in expected:
+            stale.unlink()
+            print(f"[removed] {OG_DIR.name}/{stale.name}")
+    print(
+        f"[cards] {written} written, {len(todo) - written} unchanged, "
+        f"{len(jobs) - len(todo)} skipped (fingerprint unchanged)"
+    )
+
+    for name, _title, _summary in PAGES:
+        url = f"{OG_BASE}/{Path(name).stem}.png"
+        if point_og_image(ROOT / name, url):
+            print(f"[og:image] {name} -> {url}")
     return 0
 
 
@@ -11,9 +11,18 @@ GitHub Pages user-pages):
 - ``llms.txt`` — concise machine-readable index per the llmstxt.org spec.
 - ``llms-full.txt`` — full plain-text concatenation of every published
   page's body content, for LLM training and citation use.
-- ``sitemap.xml`` — XML sitemap with lastmod from the file mtime.
+- ``llms-small.txt`` / ``llms-medium.txt`` — token-budgeted subsets of
+  ``llms-full.txt`` for consumers with small context windows.
+- ``search-index.json`` — static BM25 inverted index over the same
+  Markdown (see ``search_index.py`` for the format and a query CLI).
+- ``sitemap.xml`` — XML sitemap with per-page lastmod from the content-hash
+  manifest ``scripts/lastmod-manifest.json`` (also committed).
 - ``humans.txt`` — human credit file.
-- ``feed.xml`` — RSS feed of pages.
+- ``feed.xml`` / ``atom.xml`` / ``feed.json`` — RSS, Atom and JSON Feed
+  views of one item stream (pubDate = per-page lastmod), capped at
+  ``FEED_PAGE_SIZE`` items with RFC 5005 paged archives beyond that.
+- ``changed-urls.txt`` — URLs whose content changed in the latest batch,
+  one per line, for IndexNow-style ping tooling.
 - ``.well-known/security.txt`` — RFC 9116 security policy.
 - ``manifest.webmanifest`` — minimal PWA manifest.
 - ``favicon.svg`` — SVG favicon (skipped if it already exists; the brand
@@ -34,11 +43,20 @@ from __future__ import annotations
 
 import argparse
 import datetime as dt
+import functools
+import hashlib
+import json
+import os
 import re
 import sys
 import xml.etree.ElementTree as ET
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass
 from html.parser import HTMLParser
 from pathlib import Path
+from xml.sax.saxutils import escape as xml_escape
+
+import search_index
 
 ROOT = Path(__file__).resolve().parent.parent
 
@@ -52,11 +70,16 @@ SITE_DESCRIPTION = (
 )
 LICENSE_URL = "https://opensource.org/licenses/MIT"
 
-# Hardcoded build date so feed/sitemap output is byte-for-byte identical
-# between local re-runs and CI rebuilds. Bump manually when content changes
-# materially. Format: ISO-8601 date (YYYY-MM-DD).
+# Hardcoded build date so humans.txt / security.txt output is byte-for-byte
+# identical between local re-runs and CI rebuilds. Per-page sitemap and
+# feed dates come from LASTMOD_MANIFEST instead. Format: ISO-8601 date.
 BUILD_DATE = "2026-05-04"
 
+# Committed per-page record of content hash + the date that hash was first
+# seen. Rebuilding with unchanged content leaves it (and every date derived
+# from it) untouched, so the build stays deterministic.
+LASTMOD_MANIFEST = ROOT / "scripts" / "lastmod-manifest.json"
+
 # Page registry. Order matters for sitemap and llms.txt.
 # Entries: (filename, title, summary).
 PAGES: list[tuple[str, str, str]] = [
@@ -105,15 +128,76 @@ def _abs(href: str) -> str:
     return f"{SITE_ORIGIN}/{href}"
 
 
+def _today() -> str:
+    """UTC date for newly seen content; honours SOURCE_DATE_EPOCH."""
+    epoch = os.environ.get("SOURCE_DATE_EPOCH")
+    if epoch:
+        return dt.datetime.fromtimestamp(int(epoch), tz=dt.UTC).date().isoformat()
+    return dt.datetime.now(tz=dt.UTC).date().isoformat()
+
+
+def _content_hash(name: str, title: str, summary: str) -> str:
+    """Hash what readers see: registry title + summary + main-content Markdown.
+
+    Hashing the converted Markdown rather than the raw HTML means shared
+    chrome (nav, <head> meta, inline CSS) can change without bumping every
+    page's lastmod.
+    """
+    h = hashlib.sha256()
+    for part in (title, summary, _markdown_for_page(name)):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+@functools.cache
+def page_lastmods() -> dict[str, dict[str, str]]:
+    """Resolve the manifest against the current page contents.
+
+    Pages whose hash matches the committed entry keep its date; new or
+    changed pages get today's date. Pages dropped from PAGES drop out.
+    """
+    previous: dict[str, dict[str, str]] = {}
+    if LASTMOD_MANIFEST.exists():
+        previous = json.loads(LASTMOD_MANIFEST.read_text(encoding="utf-8"))
+    resolved: dict[str, dict[str, str]] = {}
+    for name, title, summary in PAGES:
+        digest = _content_hash(name, title, summary)
+        entry = previous.get(name)
+        if entry and entry.get("sha256") == digest:
+            resolved[name] = entry
+        else:
+            resolved[name] = {"sha256": digest, "lastmod": _today()}
+    return resolved
+
+
 def _file_lastmod_iso(name: str) -> str:
-    """Return BUILD_DATE as the lastmod for every page.
+    return f"{page_lastmods()[name]['lastmod']}T00:00:00Z"
+
 
-    Using a single BUILD_DATE keeps the generated assets byte-for-byte
-    deterministic across local builds and CI rebuilds, which is what the
-    idempotency check enforces. Real content updates require bumping
-    BUILD_DATE explicitly.
+def _rfc822(date: str) -> str:
+    d = dt.datetime.fromisoformat(f"{date}T00:00:00+00:00")
+    return d.strftime("%a, %d %b %Y %H:%M:%S +0000")
+
+
+def build_lastmod_manifest() -> str:
+    return json.dumps(page_lastmods(), indent=2, sort_keys=True) + "\n"
+
+
+def build_changed_urls_txt() -> str:
+    """URLs in the most recent change batch (newest lastmod), for ping tools.
+
+    Derived from the manifest rather than from what this run rewrote, so it
+    is stable across rebuilds and CI sees the same list the author did.
     """
-    return f"{BUILD_DATE}T00:00:00Z"
+    lastmods = page_lastmods()
+    newest = max(entry["lastmod"] for entry in lastmods.values())
+    urls = [
+        _abs("" if name == "index.html" else name)
+        for name, _title, _summary in PAGES
+        if lastmods[name]["lastmod"] == newest
+    ]
+    return "\n".join(urls) + "\n"
 
 
 # --------------------------------------------------------------- robots.txt
@@ -212,7 +296,8 @@ Sitemap: {SITE_ORIGIN}/sitemap.xml
 # ------------------------------------------------------------------ llms.txt
 
 
-def build_llms_txt() -> str:
+def build_llms_txt(tiers: dict[str, int]) -> str:
+    """Return llms.txt, listing the tiered variants at their ``tiers`` budgets."""
     lines = [
         f"# {SITE_TITLE}",
         "",
@@ -229,6 +314,8 @@ def build_llms_txt() -> str:
     lines.append(
         f"- [Full text]({_abs('llms-full.txt')}): All page bodies concatenated for retrieval contexts."
     )
+    for name, budget in tiers.items():
+        lines.append(f"- [Full text, ~{budget:,} tokens]({_abs(name)}): {LLMS_TIER_PURPOSES[name]}")
     lines.append(
         "- [Central Asia B2G Intelligence](https://avaluev.github.io/ca-b2g-research/): "
         "External — Alex's just-shipped flagship research portfolio. 12-agent pipeline "
@@ -478,48 +565,208 @@ class _HtmlToMarkdown(HTMLParser):
         return out.strip()
 
 
+_MAIN_OPEN_RE = re.compile(r"<main\b[^>]*>", re.IGNORECASE)
+_MAIN_CLOSE_RE = re.compile(r"</main\s*>", re.IGNORECASE)
+
+
+def _main_region(html: str) -> str | None:
+    """Return the ``<main>…</main>`` slice of ``html``, tags included.
+
+    The converter ignores everything outside <main>, but tokenizing the
+    <head> (JSON-LD, inline <style>, <svg> icons) still costs as much as
+    the body. A pair of regex scans finds the slice without tokenizing.
+    Returns None when the markup is ambiguous — no <main>, more than one
+    open or close tag (including commented-out or scripted ones), or a
+    close before the open — so the caller falls back to a full parse.
+    """
+    opens = list(_MAIN_OPEN_RE.finditer(html))
+    closes = list(_MAIN_CLOSE_RE.finditer(html))
+    if len(opens) != 1 or len(closes) != 1:
+        return None
+    start, end = opens[0].start(), closes[0].end()
+    if end <= start:
+        return None
+    return html[start:end]
+
+
 def _markdown_for_page(name: str) -> str:
     html_path = ROOT / name
     if not html_path.exists():
         return ""
+    html = html_path.read_text(encoding="utf-8")
     converter = _HtmlToMarkdown()
     try:
-        converter.feed(html_path.read_text(encoding="utf-8"))
+        converter.feed(_main_region(html) or html)
     except Exception:
         return ""
     return converter.to_markdown()
 
 
-def build_llms_full_txt() -> str:
-    sections: list[str] = []
-    sections.append(f"# {SITE_TITLE} — Full Reference\n")
-    sections.append(f"> {SITE_DESCRIPTION}\n")
-    sections.append(
+def _llms_preamble(heading: str, note: str) -> list[str]:
+    return [
+        f"# {SITE_TITLE} — {heading}\n",
+        f"> {SITE_DESCRIPTION}\n",
         f"_Author: {SITE_AUTHOR}. License: MIT._  "
-        "_Repository: <https://github.com/avaluev/avaluev.github.io>._\n"
-    )
-    sections.append(
+        "_Repository: <https://github.com/avaluev/avaluev.github.io>._\n",
+        note,
+        "\n---\n",
+    ]
+
+
+def _llms_page_header(name: str, title: str, summary: str) -> list[str]:
+    canonical = _abs(name) if name != "index.html" else _abs("")
+    return [
+        f"\n## Page: {title}\n",
+        f"_Canonical: <{canonical}>_\n",
+        f"> {summary}\n",
+    ]
+
+
+def build_llms_full_txt() -> str:
+    sections = _llms_preamble(
+        "Full Reference",
         "_This file concatenates every published page in markdown for "
         "retrieval contexts. Page boundaries are marked by `# Page: …` "
         "headings. The original page lives at the canonical URL noted "
-        "directly under each heading._\n"
+        "directly under each heading._\n",
     )
-    sections.append("\n---\n")
 
     for name, title, summary in PAGES:
         body = _markdown_for_page(name)
         if not body:
             continue
-        canonical = _abs(name) if name != "index.html" else _abs("")
-        sections.append(f"\n## Page: {title}\n")
-        sections.append(f"_Canonical: <{canonical}>_\n")
-        sections.append(f"> {summary}\n")
+        sections.extend(_llms_page_header(name, title, summary))
         sections.append("\n" + body + "\n")
         sections.append("\n---\n")
 
     return "\n".join(sections).strip() + "\n"
 
 
+# ------------------------------------------------------ tiered llms variants
+
+# Size-tiered subsets of llms-full.txt for consumers with small context
+# windows. Budgets are in estimated tokens (see _estimate_tokens) and can
+# be overridden per run with --llms-budget NAME=TOKENS.
+LLMS_TIERS: dict[str, int] = {
+    "llms-small.txt": 1_500,
+    "llms-medium.txt": 4_000,
+}
+
+# What each tier is for, as llms.txt describes it next to the budget.
+LLMS_TIER_PURPOSES: dict[str, str] = {
+    "llms-small.txt": "Every page's summary and headings with a little body text; a map of "
+    "the site for deciding which page to fetch.",
+    "llms-medium.txt": "Summaries, headings and most of the body text; an overview of the "
+    "whole site that still fits a mid-sized context window.",
+}
+
+# Block priorities for greedy selection: lower is picked first.
+_PRIO_LEAD = 0
+_PRIO_HEADING = 1
+_PRIO_BODY = 2
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def _estimate_tokens(text: str) -> int:
+    """Cheap, deterministic stand-in for a BPE tokenizer.
+
+    Every word or punctuation mark costs one token per started four
+    characters, which tracks common English BPE vocabularies closely
+    enough for budgeting without pulling in a tokenizer dependency.
+    """
+    return sum((len(tok) + 3) // 4 for tok in _TOKEN_RE.findall(text))
+
+
+def _markdown_blocks(markdown: str) -> list[str]:
+    """Split Markdown on blank lines, keeping fenced code blocks whole."""
+    blocks: list[str] = []
+    current: list[str] = []
+    in_fence = False
+    for line in markdown.splitlines():
+        if line.startswith("```"):
+            in_fence = not in_fence
+        if not line.strip() and not in_fence:
+            if current:
+                blocks.append("\n".join(current))
+                current = []
+            continue
+        current.append(line)
+    if current:
+        blocks.append("\n".join(current))
+    return blocks
+
+
+def build_llms_tier_txt(budget: int) -> str:
+    """Return the subset of llms-full.txt that fits ``budget`` tokens.
+
+    Every page contributes its header and summary lead first, then its
+    headings, then body blocks, always in registry and document order
+    within a priority. A block is taken if it still fits the remaining
+    budget, so a large paragraph never starves the smaller ones after it.
+    Selected blocks are emitted in their original document order.
+    """
+    preamble = _llms_preamble(
+        f"Reference ({budget:,}-token budget)",
+        "_This file is a token-budgeted subset of "
+        f"<{_abs('llms-full.txt')}>: page summaries first, then section "
+        "headings, then body text while the budget lasts. Fetch the full "
+        "file or the canonical page for anything cut here._\n",
+    )
+    remaining = budget - _estimate_tokens("\n".join(preamble))
+
+    page_rule = "\n---\n"
+    # (priority, page index, block index, text); the lead is block -1.
+    candidates: list[tuple[int, int, int, str]] = []
+    for page_idx, (name, title, summary) in enumerate(PAGES):
+        body = _markdown_for_page(name)
+        if not body:
+            continue
+        lead = "\n".join(_llms_page_header(name, title, summary))
+        candidates.append((_PRIO_LEAD, page_idx, -1, lead))
+        for block_idx, block in enumerate(_markdown_blocks(body)):
+            prio = _PRIO_HEADING if block.startswith("#") else _PRIO_BODY
+            candidates.append((prio, page_idx, block_idx, block))
+
+    chosen: dict[int, list[tuple[int, str]]] = {}
+    for prio, page_idx, block_idx, text in sorted(candidates, key=lambda c: c[:3]):
+        cost = _estimate_tokens(text)
+        if prio == _PRIO_LEAD:
+            cost += _estimate_tokens(page_rule)
+        elif page_idx not in chosen:
+            continue
+        if cost > remaining:
+            continue
+        remaining -= cost
+        chosen.setdefault(page_idx, []).append((block_idx, text))
+
+    sections = list(preamble)
+    for page_idx in sorted(chosen):
+        blocks = sorted(chosen[page_idx])
+        sections.append(blocks[0][1])
+        body = "\n\n".join(text for _idx, text in blocks[1:])
+        if body:
+            sections.append("\n" + body + "\n")
+        sections.append(page_rule)
+
+    return "\n".join(sections).strip() + "\n"
+
+
+# ------------------------------------------------------------ search index
+
+
+def build_search_index_json() -> str:
+    """BM25 index over the same Markdown that feeds llms-full.txt."""
+    docs: list[tuple[str, str, str]] = []
+    for name, title, summary in PAGES:
+        body = _markdown_for_page(name)
+        if not body:
+            continue
+        canonical = _abs(name) if name != "index.html" else _abs("")
+        docs.append((canonical, title, f"{summary}\n\n{body}"))
+    return search_index.dumps(search_index.build_index(docs))
+
+
 # ----------------------------------------------------------------- sitemap
 
 
@@ -552,37 +799,192 @@ def build_sitemap_xml() -> str:
 
 # ------------------------------------------------------------------- feed
 
+# Newest items per feed document. Older items spill into paged archives
+# (feed-page-2.xml, …) linked with RFC 5005 first/next/previous/last
+# relations, so polling clients download a bounded document no matter
+# how many pages are published.
+FEED_PAGE_SIZE = 20
+
+# Every format renders the same item stream. Paged files are named
+# "{stem}-page-{n}{ext}"; page 1 is "{stem}{ext}".
+FEED_FORMATS: dict[str, tuple[str, str]] = {
+    "rss": ("feed", ".xml"),
+    "atom": ("atom", ".xml"),
+    "json": ("feed", ".json"),
+}
 
-def build_rss_feed() -> str:
-    build_dt = dt.datetime.fromisoformat(f"{BUILD_DATE}T00:00:00+00:00")
-    now = build_dt.strftime("%a, %d %b %Y %H:%M:%S +0000")
-    items: list[str] = []
-    for name, title, summary in PAGES:
-        if name == "index.html":
-            continue
-        items.append(
-            f"""    <item>
-      <title><![CDATA[{title}]]></title>
-      <link>{_abs(name)}</link>
-      <guid isPermaLink="true">{_abs(name)}</guid>
-      <description><![CDATA[{summary}]]></description>
-      <pubDate>{now}</pubDate>
-    </item>"""
-        )
-    return f"""<?xml version="1.0" encoding="UTF-8"?>
+
+@dataclass(frozen=True)
+class FeedItem:
+    title: str
+    url: str
+    summary: str
+    date: str  # ISO-8601 date (YYYY-MM-DD)
+
+
+def feed_items() -> list[FeedItem]:
+    """Every page except the landing page, newest lastmod first.
+
+    A list, not a stream: ordering by date and counting pages both need
+    every item. Only the rendering in build_feeds() is incremental.
+    """
+    lastmods = page_lastmods()
+    items = [
+        FeedItem(title, _abs(name), summary, lastmods[name]["lastmod"])
+        for name, title, summary in PAGES
+        if name != "index.html"
+    ]
+    # Stable sort: equal dates keep registry order.
+    return sorted(items, key=lambda item: item.date, reverse=True)
+
+
+def feed_page_name(fmt: str, page: int) -> str:
+    stem, ext = FEED_FORMATS[fmt]
+    return f"{stem}{ext}" if page == 1 else f"{stem}-page-{page}{ext}"
+
+
+def _paged_links(fmt: str, page: int, pages: int) -> list[tuple[str, str]]:
+    """RFC 5005 §3 (rel, absolute URL) pairs; none for a single-page feed."""
+    if pages == 1:
+        return []
+    links = [("first", _abs(feed_page_name(fmt, 1)))]
+    if page > 1:
+        links.append(("previous", _abs(feed_page_name(fmt, page - 1))))
+    if page < pages:
+        links.append(("next", _abs(feed_page_name(fmt, page + 1))))
+    links.append(("last", _abs(feed_page_name(fmt, pages))))
+    return links
+
+
+def _cdata(text: str) -> str:
+    return "<![CDATA[" + text.replace("]]>", "]]]]><![CDATA[>") + "]]>"
+
+
+def _rfc3339(date: str) -> str:
+    return f"{date}T00:00:00Z"
+
+
+def iter_rss_feed(items: Sequence[FeedItem], page: int, pages: int, updated: str) -> Iterator[str]:
+    self_url = _abs(feed_page_name("rss", page))
+    yield f"""<?xml version="1.0" encoding="UTF-8"?>
 <rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom">
   <channel>
-    <title><![CDATA[{SITE_TITLE}]]></title>
+    <title>{_cdata(SITE_TITLE)}</title>
     <link>{SITE_ORIGIN}/</link>
-    <atom:link href="{SITE_ORIGIN}/feed.xml" rel="self" type="application/rss+xml" />
-    <description><![CDATA[{SITE_DESCRIPTION}]]></description>
+    <atom:link href="{self_url}" rel="self" type="application/rss+xml" />
+"""
+    for rel, href in _paged_links("rss", page, pages):
+        yield f'    <atom:link href="{href}" rel="{rel}" type="application/rss+xml" />\n'
+    yield f"""    <description>{_cdata(SITE_DESCRIPTION)}</description>
     <language>en</language>
     <copyright>MIT licensed</copyright>
-    <lastBuildDate>{now}</lastBuildDate>
-{chr(10).join(items)}
-  </channel>
-</rss>
+    <lastBuildDate>{_rfc822(updated)}</lastBuildDate>
+"""
+    for item in items:
+        yield f"""    <item>
+      <title>{_cdata(item.title)}</title>
+      <link>{item.url}</link>
+      <guid isPermaLink="true">{item.url}</guid>
+      <description>{_cdata(item.summary)}</description>
+      <pubDate>{_rfc822(item.date)}</pubDate>
+    </item>
+"""
+    yield "  </channel>\n</rss>\n"
+
+
+def iter_atom_feed(items: Sequence[FeedItem], page: int, pages: int, updated: str) -> Iterator[str]:
+    self_url = _abs(feed_page_name("atom", page))
+    yield f"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="en">
+  <title>{xml_escape(SITE_TITLE)}</title>
+  <subtitle>{xml_escape(SITE_DESCRIPTION)}</subtitle>
+  <id>{SITE_ORIGIN}/</id>
+  <link href="{SITE_ORIGIN}/" />
+  <link href="{self_url}" rel="self" type="application/atom+xml" />
+"""
+    for rel, href in _paged_links("atom", page, pages):
+        yield f'  <link href="{href}" rel="{rel}" type="application/atom+xml" />\n'
+    yield f"""  <updated>{_rfc3339(updated)}</updated>
+  <author><name>{xml_escape(SITE_AUTHOR)}</name></author>
+  <rights>MIT licensed</rights>
 """
+    for item in items:
+        yield f"""  <entry>
+    <title>{xml_escape(item.title)}</title>
+    <link href="{item.url}" />
+    <id>{item.url}</id>
+    <updated>{_rfc3339(item.date)}</updated>
+    <summary>{xml_escape(item.summary)}</summary>
+  </entry>
+"""
+    yield "</feed>\n"
+
+
+def iter_json_feed(items: Sequence[FeedItem], page: int, pages: int, updated: str) -> Iterator[str]:
+    """JSON Feed 1.1; paging uses its native ``next_url``."""
+    head: dict[str, object] = {
+        "version": "https://jsonfeed.org/version/1.1",
+        "title": SITE_TITLE,
+        "home_page_url": f"{SITE_ORIGIN}/",
+        "feed_url": _abs(feed_page_name("json", page)),
+        "description": SITE_DESCRIPTION,
+        "language": "en",
+        "authors": [{"name": SITE_AUTHOR}],
+    }
+    if page < pages:
+        head["next_url"] = _abs(feed_page_name("json", page + 1))
+    yield "{\n"
+    for key, value in head.items():
+        # Same layout as json.dumps(indent=2), one level in.
+        text = json.dumps(value, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+        yield f"  {json.dumps(key)}: {text},\n"
+    yield '  "items": ['
+    for i, item in enumerate(items):
+        entry = {
+            "id": item.url,
+            "url": item.url,
+            "title": item.title,
+            "summary": item.summary,
+            "date_modified": _rfc3339(item.date),
+        }
+        yield ("," if i else "") + "\n    " + json.dumps(entry, ensure_ascii=False)
+    yield "\n  ]\n}\n"
+
+
+_FEED_RENDERERS: dict[str, Callable[[Sequence[FeedItem], int, int, str], Iterator[str]]] = {
+    "rss": iter_rss_feed,
+    "atom": iter_atom_feed,
+    "json": iter_json_feed,
+}
+
+
+def build_feeds(formats: Iterable[str]) -> Iterator[tuple[Path, Iterable[str]]]:
+    """Yield ``(path, chunks)`` for every page of every requested format.
+
+    Items are sliced into FEED_PAGE_SIZE batches and rendered lazily, so
+    at most one page of items is formatted at a time.
+    """
+    items = feed_items()
+    pages = max(1, -(-len(items) // FEED_PAGE_SIZE))
+    updated = max(entry["lastmod"] for entry in page_lastmods().values())
+    for fmt in formats:
+        render = _FEED_RENDERERS[fmt]
+        for page in range(1, pages + 1):
+            batch = items[(page - 1) * FEED_PAGE_SIZE : page * FEED_PAGE_SIZE]
+            yield ROOT / feed_page_name(fmt, page), render(batch, page, pages, updated)
+
+
+def stale_feed_pages(formats: Iterable[str]) -> list[Path]:
+    """Archive pages left over from a build that had more items."""
+    pages = max(1, -(-len(feed_items()) // FEED_PAGE_SIZE))
+    stale: list[Path] = []
+    for fmt in formats:
+        stem, ext = FEED_FORMATS[fmt]
+        for path in sorted(ROOT.glob(f"{stem}-page-*{ext}")):
+            suffix = path.name[len(f"{stem}-page-") : -len(ext)]
+            if suffix.isdigit() and int(suffix) > pages:
+                stale.append(path)
+    return stale
 
 
 # ----------------------------------------------------------------- humans
@@ -646,13 +1048,41 @@ MANIFEST_JSON = """\
 # ------------------------------------------------------------------- main
 
 
-def write(path: Path, content: str) -> bool:
-    """Write only if content differs. Returns True if written."""
+def write(path: Path, chunks: Iterable[str]) -> tuple[bool, int]:
+    """Stream chunks to ``path`` only if the result differs.
+
+    Chunks go to a sibling temp file while being hashed; the temp file
+    replaces ``path`` only when the digest differs from the file on disk,
+    so peak memory is one chunk regardless of artefact size. Returns
+    ``(written, size_in_bytes)``.
+    """
     path.parent.mkdir(parents=True, exist_ok=True)
-    if path.exists() and path.read_text(encoding="utf-8") == content:
-        return False
-    path.write_text(content, encoding="utf-8")
-    return True
+    tmp = path.with_name(path.name + ".tmp")
+    digest = hashlib.sha256()
+    size = 0
+    with tmp.open("wb") as fh:
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            digest.update(data)
+            size += len(data)
+            fh.write(data)
+    if path.exists() and _file_digest(path) == digest.digest():
+        tmp.unlink()
+        return False, size
+    tmp.replace(path)
+    return True, size
+
+
+def _file_digest(path: Path) -> bytes:
+    with path.open("rb") as fh:
+        return hashlib.file_digest(fh, "sha256").digest()
+
+
+def is_fresh(path: Path, chunks: Iterable[str]) -> bool:
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk.encode("utf-8"))
+    return path.exists() and _file_digest(path) == digest.digest()
 
 
 def main() -> int:
@@ -660,14 +1090,39 @@ def main() -> int:
     parser.add_argument(
         "--check", action="store_true", help="Verify only, no writes."
     )
+    parser.add_argument(
+        "--llms-budget",
+        action="append",
+        default=[],
+        metavar="NAME=TOKENS",
+        help="Override a tiered llms variant's token budget, e.g. llms-small.txt=1000.",
+    )
+    parser.add_argument(
+        "--feed-format",
+        action="append",
+        choices=sorted(FEED_FORMATS),
+        help="Feed format(s) to build (default: all).",
+    )
     args = parser.parse_args()
+    feed_formats: list[str] = args.feed_format or list(FEED_FORMATS)
+
+    tiers = dict(LLMS_TIERS)
+    for spec in args.llms_budget:
+        name, sep, tokens = spec.partition("=")
+        if not sep or name not in tiers or not tokens.isdigit():
+            parser.error(f"--llms-budget expects one of {sorted(tiers)}=TOKENS, got {spec!r}")
+        tiers[name] = int(tokens)
 
-    artifacts: list[tuple[Path, str]] = [
+    artifacts: list[tuple[Path, Iterable[str]]] = [
         (ROOT / "robots.txt", ROBOTS_TXT),
-        (ROOT / "llms.txt", build_llms_txt()),
+        (ROOT / "llms.txt", build_llms_txt(tiers)),
         (ROOT / "llms-full.txt", build_llms_full_txt()),
+        *((ROOT / name, build_llms_tier_txt(budget)) for name, budget in tiers.items()),
+        (ROOT / "search-index.json", build_search_index_json()),
         (ROOT / "sitemap.xml", build_sitemap_xml()),
-        (ROOT / "feed.xml", build_rss_feed()),
+        *build_feeds(feed_formats),
+        (ROOT / "changed-urls.txt", build_changed_urls_txt()),
+        (LASTMOD_MANIFEST, build_lastmod_manifest()),
         (ROOT / "humans.txt", HUMANS_TXT),
         (ROOT / ".well-known" / "security.txt", SECURITY_TXT),
         (ROOT / "manifest.webmanifest", MANIFEST_JSON),
@@ -676,18 +1131,27 @@ def main() -> int:
     written = 0
     for path, content in artifacts:
         rel = path.relative_to(ROOT)
+        chunks = [content] if isinstance(content, str) else content
         if args.check:
-            if not path.exists() or path.read_text(encoding="utf-8") != content:
+            if not is_fresh(path, chunks):
                 print(f"[stale] {rel}", file=sys.stderr)
                 return 1
             print(f"[ok]    {rel}")
             continue
-        did = write(path, content)
+        did, size = write(path, chunks)
         verb = "wrote" if did else "nochange"
-        print(f"[{verb}] {rel} ({len(content):,} bytes)")
+        print(f"[{verb}] {rel} ({size:,} bytes)")
         if did:
             written += 1
 
+    for path in stale_feed_pages(feed_formats):
+        rel = path.relative_to(ROOT)
+        if args.check:
+            print(f"[stale] {rel}", file=sys.stderr)
+            return 1
+        path.unlink()
+        print(f"[removed] {rel}")
+
     if not args.check:
         print(f"\nTotal new/changed: {written}/{len(artifacts)}")
     return 0
@@ -33,6 +33,8 @@ WELL_KNOWN_FILES = [
     "sitemap.xml",
     "llms.txt",
     "llms-full.txt",
+    "llms-small.txt",
+    "llms-medium.txt",
     "feed.xml",
     "humans.txt",
     "manifest.webmanifest",
@@ -0,0 +1,472 @@
+#!/usr/bin/env python3
+"""Losslessly re-encode the committed PNGs at their smallest size.
+
+Pure stdlib, built on the PNG writer in ``build_og_image.py``. Each file
+is decoded to RGBA and re-encoded under every combination of:
+
+- colour reduction: palette (with tRNS) at the smallest bit depth when
+  there are at most 256 distinct RGBA values, grey (bit-depth reduced
+  where the levels allow), grey+alpha, RGB, or RGBA
+- row filters: each of the five PNG filters on every row, plus the
+  per-row minimum-sum-of-absolute-differences heuristic
+- zlib strategies: default, ``Z_FILTERED`` and ``Z_RLE`` at level 9
+
+Every (reduction, filter) stream is filtered once and compressed under
+each strategy on a process pool; the smallest result wins. Output keeps
+only the chunks needed to reproduce the pixels (IHDR, PLTE, tRNS, IDAT,
+IEND) plus the build fingerprint tEXt that ``build_og_image.py`` uses to
+skip unchanged cards, so colour-management and metadata chunks are
+dropped and sRGB is assumed. A file is rewritten only when the result is
+strictly smaller, so a second run is a no-op.
+
+Usage::
+
+    python3 scripts/optimize_png.py               # icons + social cards
+    python3 scripts/optimize_png.py --check       # report, exit 1 if any would shrink
+    python3 scripts/optimize_png.py some/file.png
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import struct
+import sys
+import zlib
+from collections import Counter
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from build_og_image import (
+    CHANNELS,
+    COLOR_GRAY,
+    COLOR_GRAY_ALPHA,
+    COLOR_PALETTE,
+    COLOR_RGB,
+    COLOR_RGBA,
+    FILTER_AVERAGE,
+    FILTER_NONE,
+    FILTER_PAETH,
+    FILTER_SUB,
+    FILTER_UP,
+    FINGERPRINT_KEY,
+    OG_DIR,
+    OUT,
+    PNG_SIGNATURE,
+    encode_png,
+    filter_rows,
+    pack_indices,
+    smallest_bit_depth,
+)
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Every PNG shipped to visitors. og/*.png is globbed at run time.
+DEFAULT_TARGETS: tuple[Path, ...] = (
+    ROOT / "android-chrome-512x512.png",
+    ROOT / "android-chrome-192x192.png",
+    ROOT / "apple-touch-icon.png",
+    ROOT / "favicon-32x32.png",
+    ROOT / "favicon-16x16.png",
+    OUT,
+)
+
+# Filter sets tried per stream: each fixed filter, then the adaptive
+# heuristic choosing among all five per row.
+TRIAL_FILTERS: tuple[tuple[int, ...], ...] = (
+    (FILTER_NONE,),
+    (FILTER_SUB,),
+    (FILTER_UP,),
+    (FILTER_AVERAGE,),
+    (FILTER_PAETH,),
+    (FILTER_NONE, FILTER_SUB, FILTER_UP, FILTER_AVERAGE, FILTER_PAETH),
+)
+ZLIB_STRATEGIES: tuple[int, ...] = (zlib.Z_DEFAULT_STRATEGY, zlib.Z_FILTERED, zlib.Z_RLE)
+
+# tEXt keywords that survive optimisation; everything else is dropped.
+KEEP_TEXT_KEYS = frozenset({FINGERPRINT_KEY})
+
+
+@dataclass
+class Image:
+    """8-bit RGBA pixels, row-major, 4 bytes per pixel."""
+
+    width: int
+    height: int
+    rgba: bytes
+
+
+# ------------------------------------------------------------------ decode
+
+
+def iter_chunks(data: bytes) -> Iterator[tuple[bytes, bytes]]:
+    """Yield ``(tag, payload)`` for every chunk, verifying CRCs."""
+    if not data.startswith(PNG_SIGNATURE):
+        raise ValueError("not a PNG file")
+    pos = len(PNG_SIGNATURE)
+    while pos < len(data):
+        length, tag = struct.unpack(">I4s", data[pos : pos + 8])
+        payload = data[pos + 8 : pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length : pos + 12 + length])
+        if zlib.crc32(tag + payload) & 0xFFFFFFFF != crc:
+            raise ValueError(f"bad CRC in {tag.decode('latin-1')} chunk")
+        yield tag, payload
+        pos += 12 + length
+        if tag == b"IEND":
+            return
+
+
+def read_header(data: bytes) -> tuple[int, int, int, int, int]:
+    """``(width, height, bit_depth, color_type, interlace)`` from IHDR."""
+    width, height, depth, color_type, _comp, _filt, interlace = struct.unpack(
+        ">IIBBBBB", data[16:29]
+    )
+    return width, height, depth, color_type, interlace
+
+
+def read_text(data: bytes) -> list[tuple[str, str]]:
+    """All tEXt chunks as ``(keyword, value)`` pairs, in file order."""
+    text: list[tuple[str, str]] = []
+    for tag, payload in iter_chunks(data):
+        if tag == b"tEXt":
+            key, _sep, value = payload.partition(b"\0")
+            text.append((key.decode("latin-1"), value.decode("latin-1")))
+    return text
+
+
+def _unfilter(raw: bytes, height: int, stride: int, bpp: int) -> Iterator[bytearray]:
+    prev = bytearray(stride)
+    for y in range(height):
+        off = y * (stride + 1)
+        ftype = raw[off]
+        row = bytearray(raw[off + 1 : off + 1 + stride])
+        if ftype == FILTER_SUB:
+            for i in range(bpp, stride):
+                row[i] = (row[i] + row[i - bpp]) & 0xFF
+        elif ftype == FILTER_UP:
+            row = bytearray((x + b) & 0xFF for x, b in zip(row, prev, strict=True))
+        elif ftype == FILTER_AVERAGE:
+            for i in range(stride):
+                left = row[i - bpp] if i >= bpp else 0
+                row[i] = (row[i] + ((left + prev[i]) >> 1)) & 0xFF
+        elif ftype == FILTER_PAETH:
+            for i in range(stride):
+                a = row[i - bpp] if i >= bpp else 0
+                b = prev[i]
+                c = prev[i - bpp] if i >= bpp else 0
+                p = a + b - c
+                pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+                pred = a if pa <= pb and pa <= pc else b if pb <= pc else c
+                row[i] = (row[i] + pred) & 0xFF
+        elif ftype != FILTER_NONE:
+            raise ValueError(f"unknown filter type {ftype} on row {y}")
+        yield row
+        prev = row
+
+
+def _unpack_samples(row: bytes | bytearray, depth: int, count: int) -> bytes:
+    """One byte per sample from ``depth``-bit packed samples (MSB first).
+
+    Sample ``k`` of every byte is extracted by one ``translate`` and
+    interleaved with a slice assignment, so unpacking runs at C speed.
+    """
+    if depth == 8:
+        return bytes(row[:count])
+    tables = _unpack_tables(depth)
+    per_byte = len(tables)
+    out = bytearray(len(row) * per_byte)
+    for k, table in enumerate(tables):
+        out[k::per_byte] = row.translate(table)
+    return bytes(out[:count])
+
+
+@functools.cache
+def _unpack_tables(depth: int) -> tuple[bytes, ...]:
+    """Per position within a byte: table mapping a packed byte to that sample."""
+    mask = (1 << depth) - 1
+    return tuple(
+        bytes((b >> (8 - depth * (k + 1))) & mask for b in range(256)) for k in range(8 // depth)
+    )
+
+
+def decode_png(data: bytes) -> Image:
+    """Decode any non-interlaced PNG to 8-bit RGBA.
+
+    Handles every colour type at every legal bit depth (16-bit samples
+    keep their high byte), plus tRNS transparency. Ancillary chunks are
+    otherwise ignored.
+    """
+    palette = b""
+    trns = b""
+    idat: list[bytes] = []
+    for tag, payload in iter_chunks(data):
+        if tag == b"PLTE":
+            palette = payload
+        elif tag == b"tRNS":
+            trns = payload
+        elif tag == b"IDAT":
+            idat.append(payload)
+    width, height, depth, color_type, interlace = read_header(data)
+    if interlace:
+        raise ValueError("Adam7-interlaced PNGs are not supported")
+    channels = CHANNELS[color_type]
+    bpp = max(1, channels * depth // 8)
+    stride = (width * channels * depth + 7) // 8
+    raw = zlib.decompress(b"".join(idat))
+
+    sample_depth = 8 if depth == 16 else depth
+    palette = palette.ljust(768, b"\0")
+    lookups = [palette[i::3] for i in range(3)]
+    lookups.append(trns.ljust(256, b"\xff") if color_type == COLOR_PALETTE else b"")
+    gray_scale = bytes(min(255, v * 255 // ((1 << sample_depth) - 1)) for v in range(256))
+    if trns and color_type in (COLOR_GRAY, COLOR_RGB):
+        # 16-bit keys keep their high byte, like the samples; lower
+        # depths store the key in the low byte at the sample's depth.
+        key_bytes = trns[0::2] if depth == 16 else trns[1::2]
+        if color_type == COLOR_GRAY:
+            key_bytes = key_bytes.translate(gray_scale)
+    else:
+        key_bytes = b""
+    opaque = bytes([255]) * width
+
+    out = bytearray(width * height * 4)
+    for y, row in enumerate(_unfilter(raw, height, stride, bpp)):
+        samples = _unpack_samples(row[0::2] if depth == 16 else row, sample_depth, width * channels)
+        dest = memoryview(out)[y * width * 4 : (y + 1) * width * 4]
+        if color_type == COLOR_PALETTE:
+            for i, table in enumerate(lookups):
+                dest[i::4] = samples.translate(table)
+            continue
+        if color_type in (COLOR_GRAY, COLOR_GRAY_ALPHA) and sample_depth < 8:
+            samples = samples.translate(gray_scale)
+        if color_type == COLOR_GRAY:
+            dest[0::4] = dest[1::4] = dest[2::4] = samples
+            dest[3::4] = opaque
+        elif color_type == COLOR_GRAY_ALPHA:
+            dest[0::4] = dest[1::4] = dest[2::4] = samples[0::2]
+            dest[3::4] = samples[1::2]
+        elif color_type == COLOR_RGB:
+            dest[0::4] = samples[0::3]
+            dest[1::4] = samples[1::3]
+            dest[2::4] = samples[2::3]
+            dest[3::4] = opaque
+        else:
+            dest[:] = samples
+        if key_bytes:
+            for x in range(width):
+                if samples[x * channels : (x + 1) * channels] == key_bytes:
+                    dest[x * 4 + 3] = 0
+    return Image(width, height, bytes(out))
+
+
+# -------------------------------------------------------------- reductions
+
+
+@dataclass(frozen=True)
+class Reduction:
+    """One lossless representation of an image: IHDR fields + packed rows."""
+
+    color_type: int
+    bit_depth: int
+    palette: tuple[tuple[int, ...], ...]
+    rows: tuple[bytes, ...]
+
+    @property
+    def bpp(self) -> int:
+        return max(1, CHANNELS[self.color_type] * self.bit_depth // 8)
+
+    @property
+    def stride(self) -> int:
+        return len(self.rows[0]) if self.rows else 0
+
+
+def _gray_depth(levels: set[int]) -> int:
+    """Smallest bit depth whose scaled levels include every grey value."""
+    for depth in (1, 2, 4):
+        step = 255 // ((1 << depth) - 1)
+        if all(v % step == 0 for v in levels):
+            return depth
+    return 8
+
+
+def reductions(image: Image) -> list[Reduction]:
+    """Every colour type / bit depth worth trying for ``image``.
+
+    A palette of at most 16 colours packs below 8 bits per pixel, which
+    no truecolour form can beat (except an equally packed grey form), so
+    the truecolour candidates are skipped then.
+    """
+    w, h, px = image.width, image.height, image.rgba
+    pixels = memoryview(px).cast("I")
+    counts = Counter(pixels)
+    opaque = px[3::4] == bytes([255]) * (w * h)
+    gray = px[0::4] == px[1::4] == px[2::4]
+    forms: list[Reduction] = []
+
+    palette_depth = 8
+    if len(counts) <= 256:
+        # Translucent entries first keeps tRNS short; then most frequent,
+        # so the common indices are small and compress alike.
+        order = sorted(
+            counts,
+            key=lambda c: (c.to_bytes(4, sys.byteorder)[3] == 255, -counts[c], c),
+        )
+        slots = {c: n for n, c in enumerate(order)}
+        palette_depth = smallest_bit_depth(len(order))
+        indices = bytes(map(slots.__getitem__, pixels))
+        forms.append(
+            Reduction(
+                COLOR_PALETTE,
+                palette_depth,
+                tuple(tuple(c.to_bytes(4, sys.byteorder)) for c in order),
+                tuple(pack_indices(indices[y * w : (y + 1) * w], palette_depth) for y in range(h)),
+            )
+        )
+
+    if gray and opaque:
+        levels = px[0::4]
+        depth = _gray_depth(set(levels))
+        if depth <= palette_depth:
+            if depth < 8:
+                levels = levels.translate(bytes(v * ((1 << depth) - 1) // 255 for v in range(256)))
+            forms.append(
+                Reduction(
+                    COLOR_GRAY,
+                    depth,
+                    (),
+                    tuple(pack_indices(levels[y * w : (y + 1) * w], depth) for y in range(h)),
+                )
+            )
+    if palette_depth < 8:
+        return forms
+
+    if gray and opaque:
+        return forms
+    color_type = (COLOR_GRAY_ALPHA if gray else COLOR_RGBA) if not opaque else COLOR_RGB
+    keep = {
+        COLOR_GRAY_ALPHA: (0, 3),
+        COLOR_RGB: (0, 1, 2),
+        COLOR_RGBA: (0, 1, 2, 3),
+    }[color_type]
+    channels = len(keep)
+    rows: list[bytes] = []
+    for y in range(h):
+        src = px[y * w * 4 : (y + 1) * w * 4]
+        if channels == 4:
+            rows.append(src)
+            continue
+        row = bytearray(w * channels)
+        for n, c in enumerate(keep):
+            row[n::channels] = src[c::4]
+        rows.append(bytes(row))
+    forms.append(Reduction(color_type, 8, (), tuple(rows)))
+    return forms
+
+
+# ------------------------------------------------------------------ search
+
+
+def _trial(form: Reduction, filters: tuple[int, ...]) -> list[int]:
+    """Compressed IDAT size of ``form`` under ``filters`` for each strategy."""
+    stream = b"".join(filter_rows(form.rows, form.stride, form.bpp, filters))
+    sizes: list[int] = []
+    for strategy in ZLIB_STRATEGIES:
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 15, 9, strategy)
+        sizes.append(len(compressor.compress(stream)) + len(compressor.flush()))
+    return sizes
+
+
+def optimize_image(
+    image: Image,
+    text: Sequence[tuple[str, str]] = (),
+    executor: Executor | None = None,
+) -> bytes:
+    """Smallest encoding of ``image`` found by the reduction x filter x strategy search.
+
+    Trials run on ``executor`` when given. Ties go to the earlier
+    candidate, so the result depends only on the pixels and ``text``.
+    """
+    forms = reductions(image)
+    jobs = [(form, filters) for form in forms for filters in TRIAL_FILTERS]
+    if executor is None:
+        results = [_trial(form, filters) for form, filters in jobs]
+    else:
+        results = list(executor.map(_trial, *zip(*jobs, strict=True)))
+    _size, _job, strategy_index, (form, filters) = min(
+        (size, j, s, jobs[j]) for j, sizes in enumerate(results) for s, size in enumerate(sizes)
+    )
+    return encode_png(
+        image.width,
+        image.height,
+        form.rows,
+        color_type=form.color_type,
+        bit_depth=form.bit_depth,
+        palette=form.palette,
+        filters=filters,
+        strategy=ZLIB_STRATEGIES[strategy_index],
+        text=text,
+    )
+
+
+def optimize_file(path: Path, executor: Executor | None = None) -> bytes | None:
+    """Optimised bytes for ``path``, or None when it can't be made smaller.
+
+    16-bit and interlaced files are left alone: the decoder keeps only
+    the high byte of 16-bit samples, and interlacing isn't decoded.
+    """
+    data = path.read_bytes()
+    _w, _h, depth, _ct, interlace = read_header(data)
+    if depth == 16 or interlace:
+        return None
+    text = [(k, v) for k, v in read_text(data) if k in KEEP_TEXT_KEYS]
+    best = optimize_image(decode_png(data), text, executor)
+    return best if len(best) < len(data) else None
+
+
+def _rel(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(ROOT))
+    except ValueError:
+        return str(path)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("paths", nargs="*", type=Path, help="PNG files (default: shipped PNGs).")
+    parser.add_argument(
+        "--check", action="store_true", help="Report only; exit 1 if any file would shrink."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=os.cpu_count() or 1, help="Trial worker processes."
+    )
+    args = parser.parse_args()
+
+    paths: list[Path] = args.paths or [*DEFAULT_TARGETS, *sorted(OG_DIR.glob("*.png"))]
+    saved = 0
+    shrinkable = 0
+    with ProcessPoolExecutor(max_workers=max(1, args.jobs)) as executor:
+        for path in paths:
+            before = path.stat().st_size
+            best = optimize_file(path, executor)
+            if best is None:
+                print(f"[nochange] {_rel(path)} ({before:,} bytes)")
+                continue
+            shrinkable += 1
+            saved += before - len(best)
+            verb = "would shrink" if args.check else "optimized"
+            print(
+                f"[{verb}] {_rel(path)}: {before:,} -> {len(best):,} bytes "
+                f"(-{before - len(best):,}, {100 * (before - len(best)) / before:.1f}%)"
+            )
+            if not args.check:
+                path.write_bytes(best)
+    verb = "could be saved" if args.check else "saved"
+    print(f"\n{shrinkable} of {len(paths)} file(s) shrinkable, {saved:,} bytes {verb}.")
+    return 1 if args.check and shrinkable else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""Point links in the published pages straight at their final targets.
+
+Redirect stubs (the root-level pages ``build_b2g_redirects.py`` writes,
+or any other page that only sends the browser on with a meta refresh or
+``location.replace``) cost a visitor an extra page load per hop, plus a
+301 first when the link omits the trailing slash. This finds every stub
+in the tree, follows stub-to-stub chains to the page they end on, and
+rewrites ``<a href>`` values in the published pages (``PAGES`` in
+``build_seo_assets.py``, plus 404.html) that land on a stub. Links to a
+path with no page that the slug router in 404.html would redirect
+(``build_b2g_redirects.py --router``) are rewritten the same way.
+Fragments are kept; links the visitor would not be redirected from are
+untouched.
+
+Stubs are recognised by the same rules ``audit_links.py`` uses to report
+redirect chains. Idempotent: a second run finds nothing left to rewrite.
+
+Usage::
+
+    python3 scripts/rewrite_redirect_links.py [--check]
+"""
+
+from __future__ import annotations
+
+import argparse
+import re
+import urllib.parse
+from html import escape, unescape
+from pathlib import Path
+from typing import Any
+
+from audit_links import MAX_REDIRECTS, PERSONAL, PageReader, canonicalize, normalise
+from build_b2g_redirects import NOT_FOUND, read_router, route
+from build_seo_assets import PAGES
+
+ROOT = Path(__file__).resolve().parents[1]
+PUBLISHED = [name for name, _title, _description in PAGES] + ["404.html"]
+
+_ANCHOR_RE = re.compile(r"<a\b[^>]*>", re.IGNORECASE)
+_HREF_RE = re.compile(r"""(\bhref\s*=\s*)(["'])(.*?)\2""", re.IGNORECASE | re.DOTALL)
+
+
+def page_url(path: Path) -> str:
+    """The URL GitHub Pages serves ``path`` at."""
+    rel = path.relative_to(ROOT).as_posix()
+    if rel == "index.html" or rel.endswith("/index.html"):
+        rel = rel[: -len("index.html")]
+    return f"{PERSONAL}/{rel}"
+
+
+def find_stubs(root: Path = ROOT) -> dict[str, str]:
+    """Map each URL a stub answers at to where the stub sends the browser.
+
+    A directory stub also answers at its slug without the trailing slash
+    (after a 301), and ``foo.html`` at ``foo``.
+    """
+    stubs: dict[str, str] = {}
+    for path in sorted(root.rglob("*.html")):
+        rel = path.relative_to(root)
+        if rel.as_posix() in PUBLISHED or any(part.startswith(".") for part in rel.parts):
+            continue
+        url = page_url(path)
+        reader = PageReader(url)
+        reader.consume(200, {"content-type": "text/html"})
+        reader.feed(path.read_bytes())
+        reader.links(url)
+        redirect = reader.redirect(url)
+        if redirect is None:
+            continue
+        target = redirect[1]
+        url = canonicalize(url)
+        stubs[url] = target
+        if url.endswith("/") and url != f"{PERSONAL}/":
+            stubs[url.rstrip("/")] = target
+        elif url.endswith(".html"):
+            stubs[url.removesuffix(".html")] = target
+    return stubs
+
+
+def final_target(url: str, stubs: dict[str, str]) -> str:
+    """Follow stubs from ``url`` until a page that isn't one, or a loop."""
+    seen = {url}
+    for _hop in range(MAX_REDIRECTS):
+        nxt = stubs.get(url)
+        if nxt is None or nxt in seen:
+            break
+        seen.add(nxt)
+        url = nxt
+    return url
+
+
+def served(url: str, root: Path = ROOT) -> bool:
+    """Whether GitHub Pages has a file for ``url`` on our site, rather
+    than answering with 404.html."""
+    path = root / urllib.parse.unquote(urllib.parse.urlsplit(url).path).lstrip("/")
+    html = path.with_name(path.name + ".html")
+    return path.is_file() or (path / "index.html").is_file() or html.is_file()
+
+
+def redirect_target(
+    url: str, stubs: dict[str, str], router: dict[str, Any] | None = None
+) -> str | None:
+    """Where a visitor following a link to ``url`` ends up, if they are
+    redirected at all."""
+    if url in stubs:
+        return final_target(url, stubs)
+    if router is not None and url.startswith(f"{PERSONAL}/") and not served(url):
+        return route(router, urllib.parse.urlsplit(url).path)
+    return None
+
+
+def rewrite(
+    html: str, base: str, stubs: dict[str, str], router: dict[str, Any] | None = None
+) -> tuple[str, int]:
+    """Rewrite ``<a href>`` values that land on a redirect; return the
+    new text and how many links changed."""
+    changed = 0
+
+    def fix_href(m: re.Match[str]) -> str:
+        nonlocal changed
+        value = unescape(m.group(3))
+        url = normalise(value, base)
+        target = redirect_target(url, stubs, router) if url is not None else None
+        if target is None:
+            return m.group(0)
+        parts = urllib.parse.urlsplit(target)
+        if not urllib.parse.urlsplit(value).netloc and target.startswith(f"{PERSONAL}/"):
+            # Keep links to our own pages relative to the site root.
+            target = urllib.parse.urlunsplit(("", "", parts.path, parts.query, ""))
+        fragment = urllib.parse.urldefrag(value).fragment
+        if fragment:
+            target += "#" + fragment
+        changed += 1
+        return f"{m.group(1)}{m.group(2)}{escape(target)}{m.group(2)}"
+
+    def fix_anchor(m: re.Match[str]) -> str:
+        return _HREF_RE.sub(fix_href, m.group(0))
+
+    return _ANCHOR_RE.sub(fix_anchor, html), changed
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--check", action="store_true", help="Change nothing; exit 1 if a link would be rewritten."
+    )
+    args = parser.parse_args()
+
+    stubs = find_stubs()
+    router = read_router(NOT_FOUND.read_text(encoding="utf-8"))
+    written = unchanged = 0
+    for name in PUBLISHED:
+        path = ROOT / name
+        if not path.exists():
+            continue
+        old = path.read_text(encoding="utf-8")
+        new, links = rewrite(old, page_url(path), stubs, router)
+        if new == old:
+            unchanged += 1
+            print(f"[nochange] {name}")
+            continue
+        written += 1
+        if args.check:
+            print(f"[stale]    {name} ({links} link(s) through redirects)")
+            continue
+        path.write_text(new, encoding="utf-8")
+        print(f"[wrote]    {name} ({links} link(s) now direct)")
+    verb = "stale" if args.check else "written"
+    routes = "a slug router" if router is not None else "no slug router"
+    print(f"\nTotal: {written} {verb}, {unchanged} unchanged, {len(stubs)} stub URL(s), {routes}.")
+    return 1 if args.check and written else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Static BM25 full-text search over the published pages.
+
+``build_seo_assets.py`` calls :func:`build_index` with the same Markdown
+it writes to ``llms-full.txt`` and publishes the result as
+``search-index.json``. This module is also a small query CLI over that
+file, so retrieval can be tried locally without a server.
+
+Index layout (compact JSON, one line)::
+
+    {
+      "version": 1,
+      "k1": 1.2, "b": 0.75, "avgdl": 812.4,
+      "boosts": {"title": 3, "heading": 2, "body": 1},
+      "docs": [[url, title, length], ...],
+      "terms": {term: [doc_gap, tf, doc_gap, tf, ...], ...}
+    }
+
+Posting lists are delta-encoded: each ``doc_gap`` is the distance from
+the previous document id in the same list, starting from 0. ``tf`` and
+the document ``length`` are field-boosted counts (a title token counts
+``boosts["title"]`` times), so BM25 scoring needs no further lookups.
+
+Usage::
+
+    python3 scripts/search_index.py "ai healthcare product"
+    python3 scripts/search_index.py --limit 3 coaching
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import re
+import sys
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+INDEX_PATH = ROOT / "search-index.json"
+
+INDEX_VERSION = 1
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Integer field boosts keep term frequencies and lengths integral.
+FIELD_BOOSTS: dict[str, int] = {"title": 3, "heading": 2, "body": 1}
+
+STOP_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "be",
+        "by",
+        "for",
+        "from",
+        "has",
+        "have",
+        "in",
+        "is",
+        "it",
+        "its",
+        "of",
+        "on",
+        "or",
+        "that",
+        "the",
+        "this",
+        "to",
+        "was",
+        "were",
+        "will",
+        "with",
+    }
+)
+
+_WORD_RE = re.compile(r"[^\W_]+")
+_LINK_TARGET_RE = re.compile(r"\]\([^)]*\)")
+_AUTOLINK_RE = re.compile(r"<https?://[^>]*>")
+
+
+def tokenize(text: str) -> list[str]:
+    """Lower-cased word tokens, minus stop words."""
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOP_WORDS]
+
+
+def _fields(title: str, markdown: str) -> dict[str, list[str]]:
+    """Split a page into boosted fields: title, headings, body."""
+    markdown = _AUTOLINK_RE.sub(" ", _LINK_TARGET_RE.sub("]", markdown))
+    headings: list[str] = []
+    body: list[str] = []
+    for line in markdown.splitlines():
+        if line.startswith("#"):
+            headings.extend(tokenize(line.lstrip("#")))
+        else:
+            body.extend(tokenize(line))
+    return {"title": tokenize(title), "heading": headings, "body": body}
+
+
+def build_index(docs: Iterable[tuple[str, str, str]]) -> dict[str, Any]:
+    """Build the index from ``(url, title, markdown)`` triples."""
+    doc_rows: list[list[Any]] = []
+    postings: dict[str, list[tuple[int, int]]] = {}
+    for doc_id, (url, title, markdown) in enumerate(docs):
+        tf: Counter[str] = Counter()
+        for field, tokens in _fields(title, markdown).items():
+            boost = FIELD_BOOSTS[field]
+            for token in tokens:
+                tf[token] += boost
+        doc_rows.append([url, title, sum(tf.values())])
+        for term, count in tf.items():
+            postings.setdefault(term, []).append((doc_id, count))
+
+    terms: dict[str, list[int]] = {}
+    for term in sorted(postings):
+        flat: list[int] = []
+        prev = 0
+        for doc_id, count in postings[term]:
+            flat.extend((doc_id - prev, count))
+            prev = doc_id
+        terms[term] = flat
+
+    total = sum(row[2] for row in doc_rows)
+    return {
+        "version": INDEX_VERSION,
+        "k1": BM25_K1,
+        "b": BM25_B,
+        "avgdl": round(total / len(doc_rows), 2) if doc_rows else 0,
+        "boosts": FIELD_BOOSTS,
+        "docs": doc_rows,
+        "terms": terms,
+    }
+
+
+def dumps(index: dict[str, Any]) -> str:
+    return json.dumps(index, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def search(index: dict[str, Any], query: str, limit: int = 10) -> list[tuple[float, int]]:
+    """Return up to ``limit`` ``(score, doc_id)`` pairs, best first."""
+    docs: list[list[Any]] = index["docs"]
+    n_docs = len(docs)
+    if not n_docs:
+        return []
+    k1: float = index["k1"]
+    b: float = index["b"]
+    avgdl: float = index["avgdl"] or 1.0
+    scores: dict[int, float] = {}
+    for term in set(tokenize(query)):
+        flat: list[int] | None = index["terms"].get(term)
+        if not flat:
+            continue
+        df = len(flat) // 2
+        idf = math.log(1 + (n_docs - df + 0.5) / (df + 0.5))
+        doc_id = 0
+        for i in range(0, len(flat), 2):
+            doc_id += flat[i]
+            tf = flat[i + 1]
+            norm = k1 * (1 - b + b * docs[doc_id][2] / avgdl)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+    ranked = sorted(((s, d) for d, s in scores.items()), key=lambda p: (-p[0], p[1]))
+    return ranked[:limit]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("query", nargs="+", help="Search terms.")
+    parser.add_argument("--limit", type=int, default=10, help="Maximum results.")
+    parser.add_argument("--index", type=Path, default=INDEX_PATH, help="Index file.")
+    args = parser.parse_args()
+
+    if not args.index.exists():
+        print(f"[missing] {args.index} — run scripts/build_seo_assets.py", file=sys.stderr)
+        return 2
+    index = json.loads(args.index.read_text(encoding="utf-8"))
+    if index.get("version") != INDEX_VERSION:
+        print(f"[stale] {args.index} has version {index.get('version')}", file=sys.stderr)
+        return 2
+
+    results = search(index, " ".join(args.query), args.limit)
+    if not results:
+        print("No matches.")
+        return 1
+    for rank, (score, doc_id) in enumerate(results, start=1):
+        url, title, _length = index["docs"][doc_id]
+        print(f"{rank:>2}. {score:6.2f}  {title}\n    {url}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,249 @@
+"""Link auditor internals: HTTP parsing, caches, retries and the Bloom filter."""
+
+from __future__ import annotations
+
+import asyncio
+import socket
+import ssl
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import audit_links
+from audit_links import (
+    READ_CHUNK,
+    UNREACHABLE,
+    AuditCache,
+    BloomFilter,
+    CacheEntry,
+    CircuitOpenError,
+    HttpClient,
+    ProtocolError,
+    Response,
+    _iter_body,
+    _read_head,
+    canonicalize,
+    failure_status,
+    head,
+    timed_get,
+)
+
+
+def _reader(data: bytes) -> asyncio.StreamReader:
+    """A stream that yields ``data`` then EOF; call inside a running loop."""
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+    return reader
+
+
+def _body(data: bytes, headers: dict[str, str]) -> bytes:
+    async def read() -> bytes:
+        pieces = [piece async for piece in _iter_body(_reader(data), headers)]
+        assert all(len(piece) <= READ_CHUNK for piece in pieces)
+        return b"".join(pieces)
+
+    return asyncio.run(read())
+
+
+def _head(data: bytes) -> tuple[str, int, dict[str, str]]:
+    async def read() -> tuple[str, int, dict[str, str]]:
+        return await _read_head(_reader(data))
+
+    return asyncio.run(read())
+
+
+CHUNKED = {"transfer-encoding": "chunked"}
+
+
+def test_chunked_body_with_extensions_and_trailers() -> None:
+    data = b"5;name=value\r\nhello\r\n6\r\n world\r\n0\r\nExpires: never\r\n\r\nNEXT"
+    assert _body(data, CHUNKED) == b"hello world"
+
+
+def test_chunked_body_larger_than_read_chunk() -> None:
+    payload = bytes(range(256)) * (3 * READ_CHUNK // 256 + 1)
+    data = b"%x\r\n%s\r\n0\r\n\r\n" % (len(payload), payload)
+    assert _body(data, {"transfer-encoding": "gzip, Chunked"}) == payload
+
+
+def test_chunked_body_stops_at_last_chunk() -> None:
+    async def read() -> tuple[bytes, bytes]:
+        reader = _reader(b"3\r\nabc\r\n0\r\n\r\nHTTP/1.1 200 OK\r\n")
+        body = b"".join([piece async for piece in _iter_body(reader, CHUNKED)])
+        return body, await reader.read()
+
+    assert asyncio.run(read()) == (b"abc", b"HTTP/1.1 200 OK\r\n")
+
+
+@pytest.mark.parametrize("size_line", [b"zz", b"-5", b"0x5", b"+5", b"5_0"])
+def test_bad_chunk_size(size_line: bytes) -> None:
+    with pytest.raises(ProtocolError):
+        _body(size_line + b"\r\nhello\r\n0\r\n\r\n", CHUNKED)
+
+
+def test_chunked_body_cut_short() -> None:
+    with pytest.raises(asyncio.IncompleteReadError):
+        _body(b"a\r\nhello", CHUNKED)
+    with pytest.raises(asyncio.IncompleteReadError):
+        _body(b"5\r\nhello\r\n", CHUNKED)
+
+
+def test_content_length_and_unframed_bodies() -> None:
+    assert _body(b"hello, extra", {"content-length": "5"}) == b"hello"
+    assert _body(b"until close", {}) == b"until close"
+    with pytest.raises(ProtocolError):
+        _body(b"hello", {"content-length": "five"})
+    with pytest.raises(asyncio.IncompleteReadError):
+        _body(b"hell", {"content-length": "5"})
+
+
+def test_read_head() -> None:
+    head = b"HTTP/1.1 301 Moved Permanently\r\nLocation: /a\r\nSet-Cookie: a=1\r\nset-cookie: b=2\r\n\r\n"
+    version, status, headers = _head(head)
+    assert (version, status) == ("HTTP/1.1", 301)
+    assert headers == {"location": "/a", "set-cookie": "a=1, b=2"}
+    assert _head(b"HTTP/1.0 200\r\n\r\n")[:2] == ("HTTP/1.0", 200)
+
+
+@pytest.mark.parametrize(
+    "status_line", [b"HTCPCP/1.0 418 I'm a teapot\r\n", b"HTTP/1.1 2000 OK\r\n", b"HTTP/1.1 OK\r\n"]
+)
+def test_bad_status_line(status_line: bytes) -> None:
+    with pytest.raises(ProtocolError):
+        _head(status_line + b"\r\n")
+
+
+def test_closed_before_response() -> None:
+    with pytest.raises(ConnectionResetError):
+        _head(b"")
+
+
+@pytest.mark.parametrize(
+    ("url", "canonical"),
+    [
+        ("HTTPS://Example.COM:443/a/./b/../c", "https://example.com/a/c"),
+        ("http://example.com:8080", "http://example.com:8080/"),
+        ("https://example.com/docs/index.html#top", "https://example.com/docs/"),
+        ("https://example.com/%7euser/%2f?", "https://example.com/~user/%2F"),
+    ],
+)
+def test_canonicalize(url: str, canonical: str) -> None:
+    assert canonicalize(url) == canonical
+
+
+def test_bloom_filter_has_no_false_negatives() -> None:
+    bloom = BloomFilter(1000, error_rate=0.01)
+    added = [f"https://example.com/page/{i}" for i in range(1000)]
+    for url in added:
+        bloom.add(url)
+    assert all(url in bloom for url in added)
+    false_positives = sum(f"https://example.com/other/{i}" in bloom for i in range(10_000))
+    assert false_positives < 300  # ~1% expected at capacity
+
+
+def test_timed_out_lookup_is_not_cancelled_for_other_requests(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    async def slow_lookup(host: str, port: int) -> str:
+        await asyncio.sleep(0.05)
+        return "192.0.2.1"
+
+    monkeypatch.setattr(HttpClient, "_lookup", staticmethod(slow_lookup))
+
+    async def resolve_twice() -> str:
+        client = HttpClient()
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(0.01):
+                await client._resolve("example.com", 443)
+        address = await client._resolve("example.com", 443)
+        assert client.stats["dns lookups"] == 1
+        return address
+
+    assert asyncio.run(resolve_twice()) == "192.0.2.1"
+
+
+def test_not_modified_keeps_stored_validators(tmp_path: Path) -> None:
+    class NotModified:
+        async def get(self, url: str, **_kwargs: Any) -> Response:
+            return Response(304, {}, b"", url)
+
+    url = "https://example.com/file.pdf"
+    cache = AuditCache(tmp_path / "cache.db", ttl=0)
+    cache.put(CacheEntry(url, 200, '"v1"', "Sat, 01 Jan 2000 00:00:00 GMT", None, None, 0.0))
+    assert asyncio.run(head(NotModified(), url, cache)) == 200
+    entry = cache.get(url)
+    assert entry is not None
+    assert (entry.etag, entry.last_modified) == ('"v1"', "Sat, 01 Jan 2000 00:00:00 GMT")
+    cache.close()
+
+
+def test_retry_after_temporary_dns_failure_resolves_again(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    answers: list[BaseException | str] = [socket.gaierror(socket.EAI_AGAIN, "try again")]
+
+    async def flaky_lookup(host: str, port: int) -> str:
+        answer = answers.pop(0) if answers else "127.0.0.1"
+        if isinstance(answer, BaseException):
+            raise answer
+        return answer
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    monkeypatch.setattr(HttpClient, "_lookup", staticmethod(flaky_lookup))
+    monkeypatch.setattr(audit_links, "backoff_delay", lambda attempt: 0.0)
+
+    async def fetch() -> tuple[int, bytes, int]:
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server, HttpClient() as client:
+            resp = await client.request("GET", f"http://example.test:{port}/")
+            return resp.status, resp.body, client.stats["dns lookups"]
+
+    assert asyncio.run(fetch()) == (200, b"ok", 2)
+
+
+@pytest.mark.parametrize(
+    ("exc", "status"),
+    [
+        (TimeoutError(), UNREACHABLE),
+        (ConnectionResetError(), UNREACHABLE),
+        (socket.gaierror(socket.EAI_AGAIN, "try again"), UNREACHABLE),
+        (CircuitOpenError("example.com: circuit open"), UNREACHABLE),
+        (socket.gaierror(socket.EAI_NONAME, "unknown host"), 0),
+        (ConnectionRefusedError(), 0),
+        (ssl.SSLCertVerificationError(), 0),
+        (ProtocolError("bad status line"), 0),
+    ],
+)
+def test_only_transient_failures_are_unreachable(exc: BaseException, status: int) -> None:
+    assert failure_status(exc) == status
+
+
+def test_benchmark_samples_are_not_retried() -> None:
+    hits = 0
+
+    async def serve(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        nonlocal hits
+        hits += 1
+        await reader.readuntil(b"\r\n\r\n")
+        writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    async def sample() -> int:
+        server = await asyncio.start_server(serve, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server, HttpClient() as client:
+            result = await timed_get(client, f"http://127.0.0.1:{port}/")
+            assert client.stats["retries"] == 0
+            return result.status
+
+    assert asyncio.run(sample()) == 503
+    assert hits == 1
@@ -0,0 +1,188 @@
+"""Round trips through the hand-written PNG and ICO codecs."""
+
+from __future__ import annotations
+
+import random
+import struct
+
+import pytest
+
+from build_icons import build_ico
+from build_og_image import (
+    CHANNELS,
+    COLOR_GRAY,
+    COLOR_GRAY_ALPHA,
+    COLOR_PALETTE,
+    COLOR_RGB,
+    COLOR_RGBA,
+    FILTER_AVERAGE,
+    FILTER_NONE,
+    FILTER_PAETH,
+    FILTER_SUB,
+    FILTER_UP,
+    encode_png,
+    filter_row,
+    pack_indices,
+)
+from optimize_png import Image, _unfilter, decode_png, iter_chunks, optimize_image, read_header
+
+FILTERS = (FILTER_NONE, FILTER_SUB, FILTER_UP, FILTER_AVERAGE, FILTER_PAETH)
+ALL_FILTERS = (FILTERS,)  # adaptive: best of all five per row
+
+# Every legal (colour type, bit depth) pair.
+FORMATS = [
+    *((COLOR_GRAY, depth) for depth in (1, 2, 4, 8, 16)),
+    (COLOR_RGB, 8),
+    (COLOR_RGB, 16),
+    *((COLOR_PALETTE, depth) for depth in (1, 2, 4, 8)),
+    (COLOR_GRAY_ALPHA, 8),
+    (COLOR_GRAY_ALPHA, 16),
+    (COLOR_RGBA, 8),
+    (COLOR_RGBA, 16),
+]
+
+
+def _paeth(a: int, b: int, c: int) -> int:
+    p = a + b - c
+    pa, pb, pc = abs(p - a), abs(p - b), abs(p - c)
+    if pa <= pb and pa <= pc:
+        return a
+    return b if pb <= pc else c
+
+
+def _reference_filter(ftype: int, row: bytes, prev: bytes, bpp: int) -> bytes:
+    """The PNG spec's filters, one byte at a time."""
+    left = bytes(bpp) + row[:-bpp]
+    upleft = bytes(bpp) + prev[:-bpp]
+    predict = {
+        FILTER_NONE: lambda a, b, c: 0,
+        FILTER_SUB: lambda a, b, c: a,
+        FILTER_UP: lambda a, b, c: b,
+        FILTER_AVERAGE: lambda a, b, c: (a + b) >> 1,
+        FILTER_PAETH: _paeth,
+    }[ftype]
+    return bytes(
+        (x - predict(a, b, c)) & 0xFF for x, a, b, c in zip(row, left, prev, upleft, strict=True)
+    )
+
+
+def _sample_image(
+    color_type: int, depth: int, width: int, height: int, seed: int
+) -> tuple[list[bytes], bytes, tuple[tuple[int, ...], ...]]:
+    """Packed rows, the RGBA decode_png should return, and the palette."""
+    rng = random.Random(seed)
+    channels = CHANNELS[color_type]
+    top = (1 << depth) - 1
+    palette: tuple[tuple[int, ...], ...] = ()
+    if color_type == COLOR_PALETTE:
+        palette = tuple(
+            (rng.randrange(256), rng.randrange(256), rng.randrange(256), rng.choice((0, 128, 255)))
+            for _ in range(1 << depth)
+        )
+    rows: list[bytes] = []
+    rgba = bytearray()
+    for y in range(height):
+        # Repeat some rows so the identical-row shortcuts are exercised.
+        if y % 3 == 2:
+            rows.append(rows[-1])
+            rgba += rgba[-width * 4 :]
+            continue
+        samples = [rng.randint(0, top) for _ in range(width * channels)]
+        if depth == 16:
+            rows.append(b"".join(struct.pack(">H", s) for s in samples))
+            samples = [s >> 8 for s in samples]
+        else:
+            rows.append(pack_indices(bytes(samples), depth))
+        if color_type == COLOR_PALETTE:
+            for index in samples:
+                rgba += bytes(palette[index])
+            continue
+        if color_type in (COLOR_GRAY, COLOR_GRAY_ALPHA) and depth < 8:
+            samples = [s * 255 // top for s in samples]
+        for x in range(width):
+            pixel = samples[x * channels : (x + 1) * channels]
+            if color_type == COLOR_GRAY:
+                rgba += bytes((pixel[0],) * 3 + (255,))
+            elif color_type == COLOR_GRAY_ALPHA:
+                rgba += bytes((pixel[0],) * 3 + (pixel[1],))
+            elif color_type == COLOR_RGB:
+                rgba += bytes((*pixel, 255))
+            else:
+                rgba += bytes(pixel)
+    return rows, bytes(rgba), palette
+
+
+@pytest.mark.parametrize("bpp", [1, 2, 3, 4, 6, 8])
+@pytest.mark.parametrize("ftype", FILTERS)
+def test_filter_row_matches_spec_and_unfilters(ftype: int, bpp: int) -> None:
+    rng = random.Random(ftype * 10 + bpp)
+    stride = bpp * 13
+    # Include the byte values where a carry or borrow would cross bytes.
+    edge = (0, 1, 127, 128, 254, 255)
+    rows = [
+        bytes(rng.choice(edge) if rng.random() < 0.5 else rng.randrange(256) for _ in range(stride))
+        for _ in range(8)
+    ]
+    prev = bytes(stride)
+    raw = bytearray()
+    for row in rows:
+        filtered = filter_row(ftype, row, prev, bpp)
+        assert filtered == _reference_filter(ftype, row, prev, bpp)
+        raw += bytes((ftype,)) + filtered
+        prev = row
+    assert [bytes(r) for r in _unfilter(bytes(raw), len(rows), stride, bpp)] == rows
+
+
+@pytest.mark.parametrize("filters", [*((f,) for f in FILTERS), *ALL_FILTERS])
+@pytest.mark.parametrize(("color_type", "depth"), FORMATS)
+def test_encode_decode_round_trip(color_type: int, depth: int, filters: tuple[int, ...]) -> None:
+    width, height = 13, 7  # odd sizes leave padding bits in packed rows
+    rows, rgba, palette = _sample_image(color_type, depth, width, height, seed=depth)
+    data = encode_png(
+        width,
+        height,
+        rows,
+        color_type=color_type,
+        bit_depth=depth,
+        palette=palette,
+        filters=filters,
+        text=[("Comment", "round trip")],
+    )
+    assert read_header(data) == (width, height, depth, color_type, 0)
+    assert decode_png(data) == Image(width, height, rgba)
+
+
+def _image(width: int, height: int, colors: int, seed: int) -> Image:
+    rng = random.Random(seed)
+    pool = [bytes(rng.randrange(256) for _ in range(4)) for _ in range(colors)]
+    return Image(width, height, b"".join(rng.choice(pool) for _ in range(width * height)))
+
+
+@pytest.mark.parametrize(
+    "image",
+    [
+        _image(9, 5, 2, seed=1),  # packs to a 1-bit palette
+        _image(9, 5, 200, seed=2),  # 8-bit palette
+        _image(24, 6, 24 * 6, seed=3),  # every pixel distinct: truecolour
+        Image(4, 2, bytes([7, 7, 7, 255] * 8)),  # flat grey
+    ],
+)
+def test_optimize_image_is_lossless(image: Image) -> None:
+    data = optimize_image(image, text=[("Fingerprint", "x")])
+    assert decode_png(data) == image
+
+
+def test_build_ico_entries_decode_to_their_images() -> None:
+    images = [_image(size, size, 5, seed=size) for size in (16, 32)] + [_image(256, 256, 3, seed=9)]
+    ico = build_ico(images)
+    reserved, kind, count = struct.unpack_from("<HHH", ico)
+    assert (reserved, kind, count) == (0, 1, len(images))
+    for i, image in enumerate(images):
+        dim, _h, _colors, _r, planes, bits, size, offset = struct.unpack_from(
+            "<BBBBHHII", ico, 6 + 16 * i
+        )
+        assert dim == (image.width if image.width < 256 else 0)
+        assert (planes, bits) == (1, 32)
+        blob = ico[offset : offset + size]
+        assert [tag for tag, _payload in iter_chunks(blob)][-1] == b"IEND"
+        assert decode_png(blob) == image
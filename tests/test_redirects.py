@@ -0,0 +1,71 @@
+"""The 404 slug router: trie, route() and the embedded script block."""
+
+from __future__ import annotations
+
+import pytest
+
+from build_b2g_redirects import (
+    PROJECT_BASE,
+    build_trie,
+    read_router,
+    render_router,
+    route,
+    with_router,
+)
+
+SLUGS = ["donors", "trends", "decrees/kg", "decrees/uz", "mvp", "mvp/kg", "mvp/uz"]
+
+
+@pytest.fixture
+def trie() -> dict[str, object]:
+    return build_trie(SLUGS)
+
+
+def test_build_trie_collapses_leaves() -> None:
+    assert build_trie(["decrees/kg", "decrees/uz", "mvp", "mvp/kg"]) == {
+        "decrees": {"kg": 1, "uz": 1},
+        "mvp": {"": 1, "kg": 1},
+    }
+
+
+@pytest.mark.parametrize(
+    ("path", "target"),
+    [
+        ("/donors", "/donors/"),
+        ("/donors/", "/donors/"),
+        ("/donors/index.html", "/donors/"),
+        ("/decrees/kg", "/decrees/kg/"),
+        ("/mvp", "/mvp/"),
+        ("/mvp/uz/idea-7", "/mvp/uz/idea-7/"),
+        ("/trends/chart.png", "/trends/chart.png"),
+        # Segments are matched decoded and sent on re-encoded.
+        ("/trends/%20a", "/trends/%20a/"),
+        ("/trends/a%2Fb", "/trends/a%2Fb/"),
+        ("/people/caf%C3%A9", None),
+        ("/donors/caf%C3%A9", "/donors/caf%C3%A9/"),
+        ("/donors/it's(1)*!~", "/donors/it's(1)*!~/"),
+        ("/%64onors", "/donors/"),
+        # A malformed escape stays as it came instead of failing.
+        ("/trends/%E0%A4%A", "/trends/%E0%A4%A/"),
+        ("/trends/%zz/x.png", "/trends/%zz/x.png"),
+        ("/trends/%C3%28", "/trends/%C3%28/"),
+        # Not at or below a slug.
+        ("/", None),
+        ("/decrees", None),
+        ("/decrees/xx", None),
+        ("/unknown/donors", None),
+        ("/%E0%A4%A", None),
+    ],
+)
+def test_route(trie: dict[str, object], path: str, target: str | None) -> None:
+    expected = None if target is None else PROJECT_BASE + target
+    assert route(trie, path) == expected
+
+
+def test_router_block_round_trips(trie: dict[str, object]) -> None:
+    page = '<!doctype html>\n<html>\n<head>\n<meta charset="utf-8">\n<title>404</title>\n'
+    routed = with_router(page, render_router(trie))
+    assert read_router(routed) == trie
+    assert with_router(routed, render_router(trie)) == routed
+    assert with_router(routed, "") == page
+    assert read_router(page) is None
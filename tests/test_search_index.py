@@ -0,0 +1,43 @@
+"""The static BM25 index behind search-index.json."""
+
+from __future__ import annotations
+
+import json
+
+from search_index import build_index, dumps, search, tokenize
+
+DOCS = [
+    ("/a", "Healthcare AI", "# Overview\nClinical models for patients.\n"),
+    ("/b", "Coaching", "# Interviews\nHealthcare is mentioned once in the body.\n"),
+    ("/c", "Contact", "Email and [links](https://example.com/healthcare).\n"),
+]
+
+
+def test_tokenize_drops_stop_words_and_punctuation() -> None:
+    assert tokenize("The AI-first roadmap, and its risks_2") == [
+        "ai",
+        "first",
+        "roadmap",
+        "risks",
+        "2",
+    ]
+
+
+def test_postings_are_delta_encoded() -> None:
+    index = build_index([("/x", "", "alpha"), ("/y", "", "beta"), ("/z", "", "alpha alpha")])
+    assert index["terms"]["alpha"] == [0, 1, 2, 2]
+    assert index["docs"] == [["/x", "", 1], ["/y", "", 1], ["/z", "", 2]]
+
+
+def test_title_outranks_body_and_link_targets_are_ignored() -> None:
+    index = build_index(DOCS)
+    ranked = [doc_id for _score, doc_id in search(index, "healthcare")]
+    assert ranked == [0, 1]
+
+
+def test_search_survives_serialisation() -> None:
+    index = build_index(DOCS)
+    loaded = json.loads(dumps(index))
+    assert search(loaded, "clinical interviews") == search(index, "clinical interviews")
+    assert search(loaded, "the and") == []
+    assert search(build_index([]), "anything") == []